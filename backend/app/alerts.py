@@ -0,0 +1,191 @@
+"""Budget alerts, evaluated as expenses are written instead of when budgets are read.
+
+Transaction writes that change a month's expenses publish (user, month,
+category) events once they commit. A pool of ALERT_WORKERS threads takes
+them off in-process queues and, in one session per batch, records in
+budget_alerts every ALERT_THRESHOLDS percent of a budget's cap that its
+spending has reached (alert_service.evaluate_alerts). Spending is already
+kept per (user, month, kind, category) by the monthly rollups, so an
+evaluation reads a row per affected budget, however many transactions the
+month holds. GET /budgets/alerts is then an indexed read of stored rows.
+
+Events of a user always go to the same worker, so a budget's alerts are
+evaluated by one thread at a time, in order. Events queued while a worker
+was busy are coalesced: a burst of expenses in one category costs one
+evaluation.
+
+Alerts lag their write by the queue's latency. They are recomputed from
+the rollups, never accumulated, so an evaluation that fails (it is logged)
+or an event lost to a restart is made good by the next expense in the same
+category. In-memory SQLite databases (tests) and ALERTS_ENABLED=false
+evaluate in the writer's session, right after its commit, instead.
+"""
+import logging
+import os
+import queue
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from . import db as app_db
+from .db import _is_memory_sqlite
+from .services import alert_service
+from .services.alert_service import AlertKey
+
+logger = logging.getLogger("pfms.alerts")
+
+ALERTS_ENABLED = os.getenv("ALERTS_ENABLED", "true").lower() == "true"
+ALERT_WORKERS = int(os.getenv("ALERT_WORKERS", "2"))
+ALERT_BATCH_MAX = int(os.getenv("ALERT_BATCH_MAX", "256"))
+
+
+class AlertEvent(NamedTuple):
+    bind: Engine  # the database (shard primary) the expense was written to
+    key: AlertKey
+
+
+_STOP = None
+
+
+class AlertPipeline:
+    """Queues alert events and evaluates them on a pool of worker threads."""
+
+    def __init__(self, workers: int = ALERT_WORKERS, max_batch: int = ALERT_BATCH_MAX):
+        self.max_batch = max(1, max_batch)
+        self._queues: List["queue.SimpleQueue[Optional[AlertEvent]]"] = [
+            queue.SimpleQueue() for _ in range(max(1, workers))
+        ]
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._sessions: Dict[Engine, sessionmaker] = {}
+        self.events = 0
+        self.evaluations = 0
+        self.alerts = 0
+        self.failures = 0
+
+    def publish(self, bind: Engine, keys: Iterable[AlertKey]):
+        """Queue an evaluation of each (user, month, category) key on bind."""
+        with self._lock:
+            if not self._threads:
+                self._threads = [
+                    threading.Thread(target=self._run, args=(events,), name=f"budget-alerts-{i}", daemon=True)
+                    for i, events in enumerate(self._queues)
+                ]
+                for thread in self._threads:
+                    thread.start()
+            for key in keys:
+                self.events += 1
+                self._queues[key[0] % len(self._queues)].put(AlertEvent(bind, key))
+
+    def _next_batch(self, events) -> List[Optional[AlertEvent]]:
+        # Whatever queued up while the last batch was evaluated
+        batch = [events.get()]
+        while batch[-1] is not _STOP and len(batch) < self.max_batch:
+            try:
+                batch.append(events.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, events):
+        while True:
+            batch = self._next_batch(events)
+            by_bind = defaultdict(set)
+            for event in batch:
+                if event is not _STOP:
+                    by_bind[event.bind].add(event.key)
+            for bind, keys in by_bind.items():
+                self._evaluate(bind, keys)
+            if batch[-1] is _STOP:
+                return
+
+    def _evaluate(self, bind: Engine, keys):
+        with self._lock:
+            if bind not in self._sessions:
+                self._sessions[bind] = sessionmaker(bind=bind, autoflush=False)
+            sessions = self._sessions[bind]
+        with sessions() as db:
+            try:
+                raised = alert_service.evaluate_alerts(db, keys)
+                db.commit()
+            except Exception:
+                db.rollback()
+                self.failures += 1
+                logger.exception("Budget alert evaluation failed for %s", sorted(keys))
+                return
+        self.evaluations += 1
+        self.alerts += raised
+
+    def stop(self):
+        """Evaluate what is queued, then end the worker threads."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+            if threads:
+                for events in self._queues:
+                    events.put(_STOP)
+        for thread in threads:
+            thread.join()
+
+    def render_metrics(self) -> str:
+        """The pipeline's counters in Prometheus text format, for GET /metrics."""
+        lines = []
+        for name in ("events", "evaluations", "alerts", "failures"):
+            metric = f"pfms_budget_alert_{name}_total"
+            lines += [f"# HELP {metric} Budget alert pipeline {name}.", f"# TYPE {metric} counter",
+                      f"{metric} {getattr(self, name)}"]
+        return "\n".join(lines) + "\n"
+
+
+pipeline = AlertPipeline()
+
+
+def expense_keys(rows: Iterable[dict]) -> set:
+    """The (user, month, category) keys of the expenses among transaction rows."""
+    return {(row["user_id"], row["created_at"].strftime("%Y-%m"), row["category"])
+            for row in rows if row["kind"] == "expense"}
+
+
+def queued(bind: Engine) -> bool:
+    # Any driver: sqlite+aiosqlite:// is in memory too
+    url = bind.url.set(drivername=bind.url.get_backend_name())
+    return ALERTS_ENABLED and not _is_memory_sqlite(url.render_as_string())
+
+
+def publish(db: Session, keys: Iterable[AlertKey]):
+    """
+    After a commit that changed expenses, have the budgets of keys evaluated:
+    by the pipeline, or in db and committed there when the pipeline is not used.
+    """
+    keys = set(keys)
+    if not keys:
+        return
+    bind = db.get_bind()
+    if queued(bind):
+        pipeline.publish(bind, keys)
+        return
+    try:
+        alert_service.evaluate_alerts(db, keys)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+async def publish_async(db, keys: Iterable[AlertKey]):
+    """publish() for the AsyncSession of DB_ASYNC, which serves the single database of DB_URL."""
+    keys = set(keys)
+    if not keys:
+        return
+    if queued(db.bind):
+        # The workers are threads: they use the sync engine of the same database
+        pipeline.publish(app_db.db_router.directory.primary, keys)
+        return
+    try:
+        await db.run_sync(lambda session: alert_service.evaluate_alerts(session, keys))
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
@@ -0,0 +1,248 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+
+class TTLCache:
+    """A small thread-safe LRU cache whose entries also expire after ttl seconds.
+
+    maxsize=0 disables caching: every get misses and set is a no-op.
+    `evictions` counts entries dropped for space or on expiry.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.evictions += 1
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+            return default if item is None else item[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class MemoryBackend:
+    """ResponseCache backend on an in-process TTLCache (per worker process)."""
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 60.0):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value):
+        self._cache.set(key, value)
+
+    def delete(self, *keys):
+        for key in keys:
+            self._cache.pop(key)
+
+    def clear(self):
+        self._cache.clear()
+
+    @property
+    def evictions(self) -> int:
+        return self._cache.evictions
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Cannot cache {type(value).__name__}")
+
+
+class RedisBackend:
+    """ResponseCache backend on a Redis-compatible client, shared by all workers.
+
+    Values are stored as JSON (Decimals become strings, which the response
+    models parse back) with a TTL. Only get/set/delete/info are used, so any
+    redis-py compatible client works, including MemoryRedis below.
+    """
+
+    def __init__(self, client, ttl: float = 60.0, prefix: str = "pfms:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, json.dumps(value, default=_json_default),
+                        ex=max(1, int(self.ttl)))
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def clear(self):
+        self.client.flushdb()
+
+    @property
+    def evictions(self) -> int:
+        """Server-wide evicted_keys from INFO stats (includes other users of the server)."""
+        return int(self.client.info("stats").get("evicted_keys", 0))
+
+
+class MemoryRedis:
+    """In-process stand-in for a Redis client (get/set with ex/delete/flushdb/info).
+
+    Lets the Redis backend run, and be tested, without a server.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            item = self._data.get(name)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[name]
+                return None
+            return value
+
+    def set(self, name, value, ex=None):
+        if isinstance(value, str):
+            value = value.encode()
+        with self._lock:
+            self._data[name] = (value, None if ex is None else time.monotonic() + ex)
+        return True
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+    def flushdb(self):
+        with self._lock:
+            self._data.clear()
+        return True
+
+    def info(self, section=None):
+        return {"evicted_keys": 0}
+
+
+def make_backend(url: str, maxsize: int = 4096, ttl: float = 60.0):
+    """
+    Backend for a cache URL: "lru" (in-process), "redis://..." / "rediss://..."
+    (needs the redis package) or "memory-redis://" (the in-process stand-in).
+    """
+    if url in ("", "lru"):
+        return MemoryBackend(maxsize=maxsize, ttl=ttl)
+    if url.startswith("memory-redis://"):
+        return RedisBackend(MemoryRedis(), ttl=ttl)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        import redis
+
+        return RedisBackend(redis.Redis.from_url(url), ttl=ttl)
+    raise ValueError(f"Unsupported cache URL: {url}")
+
+
+class ResponseCache:
+    """Read-through cache of computed values with hit/miss/invalidation counters.
+
+    A failing backend (e.g. Redis down) degrades to computing every value.
+    """
+
+    def __init__(self, backend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def lookup(self, key: str):
+        """The cached value for key, or None (counted as a miss)."""
+        if not self.enabled:
+            return None
+        try:
+            value = self.backend.get(key)
+        except Exception:
+            self._count("errors")
+            value = None
+        self._count("misses" if value is None else "hits")
+        return value
+
+    def store(self, key: str, value):
+        if not self.enabled:
+            return
+        try:
+            self.backend.set(key, value)
+        except Exception:
+            self._count("errors")
+
+    def get_or_compute(self, key: str, compute):
+        value = self.lookup(key)
+        if value is None:
+            value = compute()
+            self.store(key, value)
+        return value
+
+    async def get_or_compute_async(self, key: str, compute):
+        """get_or_compute for a coroutine function `compute`."""
+        value = self.lookup(key)
+        if value is None:
+            value = await compute()
+            self.store(key, value)
+        return value
+
+    def invalidate(self, *keys: str):
+        if not self.enabled or not keys:
+            return
+        try:
+            self.backend.delete(*keys)
+        except Exception:
+            self._count("errors")
+        self._count("invalidations", len(keys))
+
+    def stats(self) -> dict:
+        try:
+            evictions = self.backend.evictions
+        except Exception:
+            evictions = None
+        return {"hits": self.hits, "misses": self.misses, "evictions": evictions,
+                "invalidations": self.invalidations, "errors": self.errors}
@@ -1,12 +1,214 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+import itertools
 import os
+import threading
+import time
+import zlib
 
 DB_URL = os.getenv("DB_URL", "sqlite:///./pfms_dev.sqlite3")
-engine = create_engine(DB_URL, connect_args={"check_same_thread": False} if "sqlite" in DB_URL else {})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Serve the transactions and budgets routers from AsyncSession instead of the
+# sync engine (needs the async driver, e.g. pip install -e ".[async]")
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"
+
+# Pool settings (ignored for in-memory SQLite, which uses a single-connection pool)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# SQLite journaling: WAL lets readers proceed during a write, and NORMAL only
+# fsyncs at checkpoints, which is safe in WAL mode
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+# Shards separated by ";", each "primary_url[,replica_url...]"; users are
+# hash-partitioned across the shards. Empty: one shard, DB_URL, no replicas.
+DB_SHARDS = os.getenv("DB_SHARDS", "")
+# After a user writes, their reads go to the primary for this many seconds
+# (read-your-writes while replicas catch up)
+DB_REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "5"))
+
+def _is_memory_sqlite(url):
+    return url.startswith("sqlite") and (url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url)
+
+def _sqlite_pragmas(url):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not _is_memory_sqlite(url):
+            cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.close()
+    return set_pragmas
+
+def make_engine(url):
+    """Create an engine with the configured pool and SQLite pragmas."""
+    kwargs = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if "sqlite" in url:
+        kwargs["connect_args"] = {"check_same_thread": False}
+    if not _is_memory_sqlite(url):
+        kwargs.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+    new_engine = create_engine(url, **kwargs)
+
+    if new_engine.dialect.name == "sqlite":
+        event.listen(new_engine, "connect", _sqlite_pragmas(url))
+    return new_engine
+
+def parse_shards(spec: str, default_url: str) -> List[List[str]]:
+    """DB_SHARDS as [[primary, replica, ...], ...]; one shard of default_url when empty."""
+    shards = [[url.strip() for url in shard.split(",") if url.strip()] for shard in spec.split(";")]
+    return [urls for urls in shards if urls] or [[default_url]]
+
+class Shard:
+    """A primary engine and its read replicas, used in turn."""
+
+    def __init__(self, primary: Engine, replicas: List[Engine] = ()):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self._turn = itertools.cycle(self.replicas or [primary])
+        self._lock = threading.Lock()
+
+    def replica(self) -> Engine:
+        with self._lock:
+            return next(self._turn)
+
+class DatabaseRouter:
+    """
+    Maps a user to the engine for a statement. Users are hash-partitioned
+    across shards by id; the first shard is also the directory, which holds
+    every user row (emails are looked up before the user is known) and
+    allocates user ids. Writes go to the shard's primary, reads to its
+    replicas, except for sticky_seconds after the user's last write, when
+    they go to the primary too. That window is tracked per process.
+    """
+
+    def __init__(self, shards: List[Shard], sticky_seconds: float = DB_REPLICA_STICKY_SECONDS,
+                 clock=time.monotonic):
+        self.shards = shards
+        self.sticky_seconds = sticky_seconds
+        self.clock = clock
+        self._written: Dict[Optional[int], float] = {}
+        self._written_lock = threading.Lock()
+
+    @classmethod
+    def from_urls(cls, shard_urls: List[List[str]], **kwargs) -> "DatabaseRouter":
+        return cls([Shard(make_engine(primary), [make_engine(url) for url in replicas])
+                    for primary, *replicas in shard_urls], **kwargs)
+
+    @property
+    def directory(self) -> Shard:
+        return self.shards[0]
+
+    def shard_index(self, user_id: int) -> int:
+        # crc32 rather than hash(): the placement must not change between processes
+        return zlib.crc32(int(user_id).to_bytes(8, "big")) % len(self.shards)
+
+    def shard(self, user_id: Optional[int]) -> Shard:
+        """The user's shard; the directory before the user is known."""
+        if user_id is None or len(self.shards) == 1:
+            return self.directory
+        return self.shards[self.shard_index(user_id)]
+
+    def mark_written(self, user_id: Optional[int]):
+        now = self.clock()
+        with self._written_lock:
+            self._written[user_id] = now
+            # Forget expired entries once they pile up
+            if len(self._written) > 10_000:
+                for key in [k for k, at in self._written.items() if now - at >= self.sticky_seconds]:
+                    del self._written[key]
+
+    def reads_from_primary(self, user_id: Optional[int]) -> bool:
+        written = self._written.get(user_id)
+        return written is not None and self.clock() - written < self.sticky_seconds
+
+    def engine(self, user_id: Optional[int], write: bool) -> Engine:
+        shard = self.shard(user_id)
+        if write:
+            self.mark_written(user_id)
+            return shard.primary
+        if shard.replicas and not self.reads_from_primary(user_id):
+            return shard.replica()
+        return shard.primary
+
+    def engines(self) -> List[Engine]:
+        return [engine for shard in self.shards for engine in (shard.primary, *shard.replicas)]
+
+# Key of the session's user in Session.info; set by route_to_user
+USER_ID = "user_id"
+
+class RoutingSession(Session):
+    """
+    A Session that picks an engine per statement through a DatabaseRouter:
+    SELECTs go to a replica of the session user's shard, everything else
+    (flushes, INSERT/UPDATE/DELETE, db.connection()) to its primary. A Core
+    read on the session's connection takes it with
+    db.connection(bind_arguments={"clause": stmt}) to reach a replica.
+    """
+
+    def __init__(self, *args, router: Optional[DatabaseRouter] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.router = router
+
+    def get_bind(self, mapper=None, *, clause=None, bind=None, **kwargs):
+        if bind is not None:
+            return bind
+        router = self.router or db_router
+        return router.engine(self.info.get(USER_ID), write=not getattr(clause, "is_select", False))
+
+def route_to_user(db: Session, user_id: int):
+    """Send db's later statements to the user's shard."""
+    db.info[USER_ID] = user_id
+
+def session_for_user(user_id: int) -> Session:
+    return SessionLocal(info={USER_ID: user_id})
+
+@contextmanager
+def shard_sessions() -> Iterator[List[Session]]:
+    """A session on each shard's primary, for jobs that cover every user."""
+    sessions = [Session(bind=shard.primary, autoflush=False) for shard in db_router.shards]
+    try:
+        yield sessions
+    finally:
+        for session in sessions:
+            session.close()
+
+db_router = DatabaseRouter.from_urls(parse_shards(DB_SHARDS, DB_URL))
+# The directory shard's primary: the database when there is one shard
+engine = db_router.directory.primary
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
 Base = declarative_base()
 
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+def async_url(url):
+    """Map a sync DB URL onto its async driver (sqlite -> aiosqlite, postgresql -> asyncpg)."""
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+_async_engine = None
+_async_sessionmaker = None
+
+def get_async_sessionmaker():
+    """Lazily build the async engine so the async driver is only needed when used."""
+    global _async_engine, _async_sessionmaker
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        if len(db_router.engines()) > 1:
+            raise RuntimeError("DB_ASYNC does not support DB_SHARDS; use the sync routers")
+        url = async_url(DB_URL)
+        kwargs = {"pool_pre_ping": DB_POOL_PRE_PING}
+        if not _is_memory_sqlite(DB_URL):
+            kwargs.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+        _async_engine = create_async_engine(url, **kwargs)
+        if _async_engine.dialect.name == "sqlite":
+            event.listen(_async_engine.sync_engine, "connect", _sqlite_pragmas(DB_URL))
+        # Objects stay usable after commit without an implicit (sync) refresh
+        _async_sessionmaker = async_sessionmaker(_async_engine, expire_on_commit=False)
+    return _async_sessionmaker
+
 def create_tables():
     from . import models
-    Base.metadata.create_all(bind=engine)
+    for shard in db_router.shards:
+        Base.metadata.create_all(bind=shard.primary)
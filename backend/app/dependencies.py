@@ -0,0 +1,19 @@
+from .db import SessionLocal, get_async_sessionmaker
+
+def get_db():
+    """Request-scoped database session.
+
+    FastAPI caches a dependency's value for the duration of a request, so the
+    auth dependency and the handler that both depend on get_db share this one
+    session (and one pooled connection).
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    """Request-scoped AsyncSession, used by the routers when DB_ASYNC is on."""
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -0,0 +1,26 @@
+"""Conditional GETs for list endpoints, keyed by version_service's per-user counters."""
+from typing import Optional
+
+from fastapi import Request, Response
+
+from .services.version_service import etag_matches
+
+# Clients may store list responses but must revalidate them on every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def variant(request: Request) -> str:
+    """The request's query parameters in a canonical order, for the ETag digest."""
+    return "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    A 304 response when the request's If-None-Match covers etag. Otherwise None,
+    after setting ETag and Cache-Control on the handler's response.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
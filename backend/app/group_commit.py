@@ -0,0 +1,225 @@
+"""Group commit: small writes from concurrent requests share one transaction.
+
+Each create endpoint used to commit on its own. On SQLite every commit takes
+the database's write lock and appends to the WAL, which is fsynced when
+SQLITE_SYNCHRONOUS is FULL, so commits per second capped writes per second.
+With batching on, callers hand a write to the committer of their engine and
+wait for its result. A write is an item (the new row's values) and the
+function that applies a list of such items in a session without committing,
+e.g. transaction_service.insert_transactions. One writer thread per engine
+takes the queued writes, up to WRITE_BATCH_MAX of them or whatever arrives
+within WRITE_BATCH_WAIT_MS of the first. The default wait, 0, takes what
+queued up while the previous batch committed, so a lone writer is not
+delayed. It applies each kind of write once
+for all its items, so a batch of transactions is one executemany INSERT ...
+RETURNING and one round of rollup updates, and commits once.
+
+If a batch fails, in any write or in the commit, it is rolled back and each
+write is replayed in a transaction of its own. The writes that failed then
+report their own errors, and the rest still commit. Apply functions must
+therefore be safe to run twice: stage rows and return, with no side effects
+outside the session. Should anything else in a batch raise, say a rollback on
+a dropped connection, every write of the batch still waiting gets that error
+and the writer goes on; if the writer thread has died regardless, the next
+submit starts a new one. A caller waits at most WRITE_COMMIT_TIMEOUT_SECONDS
+for its write: one still queued by then is cancelled, but one already in a
+batch may yet commit after the caller has seen the timeout.
+
+In-memory SQLite databases (tests) have a single shared connection, so there
+writes run and commit directly in the caller's session, as they do with
+WRITE_BATCHING off.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from .db import _is_memory_sqlite
+
+WRITE_BATCHING = os.getenv("WRITE_BATCHING", "true").lower() == "true"
+WRITE_BATCH_MAX = int(os.getenv("WRITE_BATCH_MAX", "64"))
+WRITE_BATCH_WAIT_MS = float(os.getenv("WRITE_BATCH_WAIT_MS", "0"))
+WRITE_COMMIT_TIMEOUT_SECONDS = float(os.getenv("WRITE_COMMIT_TIMEOUT_SECONDS", "30"))
+
+Apply = Callable[[Session, List], List]
+
+
+class _Write(NamedTuple):
+    apply: Apply
+    item: object
+    future: Future
+
+
+_STOP = None
+
+
+class GroupCommitter:
+    """Commits the writes queued for one engine in batches, from one thread."""
+
+    def __init__(self, bind: Engine, max_batch: int = WRITE_BATCH_MAX,
+                 max_wait: float = WRITE_BATCH_WAIT_MS / 1000):
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait)
+        self._sessions = sessionmaker(bind=bind, autoflush=False, expire_on_commit=False)
+        self._queue: "queue.SimpleQueue[Optional[_Write]]" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.batches = 0
+        self.writes = 0
+        self.replays = 0
+
+    def submit(self, apply: Apply, item) -> Future:
+        """
+        Queue item for the next batch, where apply(session, [..., item, ...])
+        stages it. The future resolves to apply's result for item once it is
+        committed. Cancelling the future before its batch starts drops the write.
+        """
+        future = Future()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+                self._thread.start()
+            self._queue.put(_Write(apply, item, future))
+        return future
+
+    def _next_batch(self) -> List[Optional[_Write]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while batch[-1] is not _STOP and len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            writes = [item for item in batch
+                      if item is not _STOP and item.future.set_running_or_notify_cancel()]
+            if writes:
+                try:
+                    self._commit(writes)
+                except BaseException as e:
+                    for item in writes:
+                        if not item.future.done():
+                            item.future.set_exception(e)
+                    if not isinstance(e, Exception):
+                        raise
+            if _STOP in batch:
+                return
+
+    def _commit(self, writes: List[_Write]):
+        self.batches += 1
+        self.writes += len(writes)
+        by_apply: Dict[Apply, List[_Write]] = {}
+        for item in writes:
+            by_apply.setdefault(item.apply, []).append(item)
+        results = []
+        with self._sessions() as db:
+            try:
+                for apply, group in by_apply.items():
+                    results += zip(group, apply(db, [item.item for item in group]))
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                if len(writes) == 1:
+                    writes[0].future.set_exception(e)
+                    return
+                results = None
+        if results is None:
+            # Find the failing writes: each one again, on its own
+            self.replays += 1
+            for item in writes:
+                self._commit_one(item)
+            return
+        for item, result in results:
+            item.future.set_result(result)
+
+    def _commit_one(self, item: _Write):
+        with self._sessions() as db:
+            try:
+                [result] = item.apply(db, [item.item])
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                item.future.set_exception(e)
+                return
+        item.future.set_result(result)
+
+    def stop(self):
+        """Commit what is queued, then end the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join()
+
+
+_committers: Dict[Engine, GroupCommitter] = {}
+_committers_lock = threading.Lock()
+
+
+def committer(bind: Engine) -> GroupCommitter:
+    """The process's committer for an engine, created on first use."""
+    with _committers_lock:
+        if bind not in _committers:
+            _committers[bind] = GroupCommitter(bind)
+        return _committers[bind]
+
+
+def batching(bind: Engine) -> bool:
+    return WRITE_BATCHING and not _is_memory_sqlite(bind.url.render_as_string())
+
+
+def run(db: Session, apply: Apply, item):
+    """
+    Stage item with apply(session, [item]) and commit it, in a group commit
+    when batching applies. apply's result for item is returned once it is
+    committed; its exception, if it raised, is re-raised here. With batching,
+    apply runs in the writer's session, not db, so db must not hold
+    uncommitted writes of its own, and a write that has not committed within
+    WRITE_COMMIT_TIMEOUT_SECONDS raises TimeoutError.
+    """
+    bind = db.get_bind()
+    if batching(bind):
+        future = committer(bind).submit(apply, item)
+        try:
+            return future.result(timeout=WRITE_COMMIT_TIMEOUT_SECONDS)
+        except FutureTimeout:
+            future.cancel()
+            raise
+    try:
+        [result] = apply(db, [item])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return result
+
+
+def stop_all():
+    with _committers_lock:
+        committers = list(_committers.values())
+    for item in committers:
+        item.stop()
+
+
+def render_metrics() -> str:
+    """Batch counters in Prometheus text format, for GET /metrics."""
+    totals = {"batches": 0, "writes": 0, "replays": 0}
+    with _committers_lock:
+        for item in _committers.values():
+            for name in totals:
+                totals[name] += getattr(item, name)
+    lines = []
+    for name, value in totals.items():
+        metric = f"pfms_group_commit_{name}_total"
+        lines += [f"# HELP {metric} Group commit {name}.", f"# TYPE {metric} counter", f"{metric} {value}"]
+    return "\n".join(lines) + "\n"
@@ -1,9 +1,49 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+import time
 
-from .routers import auth_router, transactions_router, budgets_router, reminders_router, goals_router
+_import_started = time.perf_counter()
 
-app = FastAPI()
+from contextlib import asynccontextmanager  # noqa: E402
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+
+from . import alerts, group_commit, profiling  # noqa: E402
+from .db import shard_sessions  # noqa: E402
+from .scheduler import REMINDER_SCHEDULER_ENABLED, scheduler  # noqa: E402
+from .services import aggregate_cache, reminder_service  # noqa: E402
+from .routers import auth_router, transactions_router, budgets_router, reminders_router, goals_router, analytics_router, recurring_router  # noqa: E402
+
+def _run_scheduler():
+    # Only the worker holding the lease (in the directory, the first shard)
+    # keeps reminders and announces them, so each event fires once; the others
+    # try again at every refresh and take over once the lease lapses
+    with shard_sessions() as dbs:
+        if not reminder_service.hold_scheduler_lease(dbs[0]):
+            scheduler.unload()
+        elif scheduler.loaded:
+            reminder_service.refresh_scheduler(*dbs)
+        else:
+            reminder_service.load_scheduler(*dbs)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    # Load upcoming reminders once, in the worker that wins the lease;
+    # create/delete keep the scheduler current, and the refresh brings in what
+    # other processes wrote
+    if REMINDER_SCHEDULER_ENABLED:
+        _run_scheduler()
+        scheduler.start(refresh=_run_scheduler)
+    profiling.startup_seconds["lifespan"] = time.perf_counter() - started
+    yield
+    scheduler.stop()
+    if scheduler.loaded:
+        with shard_sessions() as dbs:
+            reminder_service.release_scheduler_lease(dbs[0])
+    group_commit.stop_all()
+    alerts.pipeline.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -12,6 +52,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 app.include_router(auth_router)
@@ -19,3 +60,15 @@ app.include_router(transactions_router)
 app.include_router(budgets_router)
 app.include_router(reminders_router)
 app.include_router(goals_router)
+app.include_router(analytics_router)
+app.include_router(recurring_router)
+
+# Server-Timing headers, request metrics and slow-request flamegraphs (opt-in)
+if profiling.PROFILING_ENABLED:
+    profiling.install(app)
+profiling.collectors.append(aggregate_cache.render_metrics)
+profiling.collectors.append(group_commit.render_metrics)
+profiling.collectors.append(alerts.pipeline.render_metrics)
+app.add_api_route("/metrics", profiling.read_metrics, methods=["GET"], include_in_schema=False)
+
+profiling.startup_seconds["import"] = time.perf_counter() - _import_started
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, Date, CheckConstraint, UniqueConstraint, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Date, CheckConstraint, UniqueConstraint, ForeignKey, Index, DDL, event
 from .db import Base
+from .money import Cents
 from datetime import datetime, date
 
 class Transaction(Base):
@@ -7,25 +8,110 @@ class Transaction(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     kind = Column(String, index=True)          # "income" | "expense"
-    amount = Column(Numeric(12,2), nullable=False)
+    amount = Column(Cents, nullable=False)
     category = Column(String, default="general")
     note = Column(String, default="")
     created_at = Column(DateTime, default=datetime.utcnow)
     __table_args__ = (
         CheckConstraint("kind IN ('income', 'expense')", name="ck_transaction_kind"),
         CheckConstraint("amount > 0", name="ck_transaction_amount_positive"),
+        # Listing / keyset pagination: user_id + created_at range, newest first
+        Index("ix_transactions_user_created", "user_id", "created_at", "id"),
+        # Totals and rollup rebuilds: user_id + kind + created_at range
+        Index("ix_transactions_user_kind_created", "user_id", "kind", "created_at"),
+        # Category filters and per-category month sums
+        Index("ix_transactions_user_category_created", "user_id", "category", "created_at"),
     )
 
+# Full-text index over transaction notes and categories (SQLite FTS5). It is
+# an external-content table: it stores only the index and reads text back
+# from transactions. Triggers keep it in step with every insert, update and
+# delete, whichever path (API, bulk import, recurring job) made them. user_id
+# is indexed as well, so a search intersects the user's rows inside the index
+# instead of filtering all users' matches afterwards.
+TRANSACTIONS_FTS = "transactions_fts"
+TRANSACTIONS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE transactions_fts USING fts5(user_id, note, category, "
+    "content='transactions', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER transactions_fts_insert AFTER INSERT ON transactions BEGIN "
+    "INSERT INTO transactions_fts (rowid, user_id, note, category) "
+    "VALUES (new.id, new.user_id, new.note, new.category); END",
+    "CREATE TRIGGER transactions_fts_delete AFTER DELETE ON transactions BEGIN "
+    "INSERT INTO transactions_fts (transactions_fts, rowid, user_id, note, category) "
+    "VALUES ('delete', old.id, old.user_id, old.note, old.category); END",
+    "CREATE TRIGGER transactions_fts_update AFTER UPDATE ON transactions BEGIN "
+    "INSERT INTO transactions_fts (transactions_fts, rowid, user_id, note, category) "
+    "VALUES ('delete', old.id, old.user_id, old.note, old.category); "
+    "INSERT INTO transactions_fts (rowid, user_id, note, category) "
+    "VALUES (new.id, new.user_id, new.note, new.category); END",
+)
+for _statement in TRANSACTIONS_FTS_DDL:
+    event.listen(Transaction.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(Transaction.__table__, "before_drop",
+             DDL(f"DROP TABLE IF EXISTS {TRANSACTIONS_FTS}").execute_if(dialect="sqlite"))
+
+def include_name(name, type_, parent_names):
+    """Alembic autogenerate filter: the FTS index and its shadow tables are not models."""
+    return not (type_ == "table" and name.startswith(TRANSACTIONS_FTS))
+
+class MonthlyRollup(Base):
+    __tablename__ = "monthly_rollups"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    month = Column(String, primary_key=True)  # YYYY-MM
+    kind = Column(String, primary_key=True)   # "income" | "expense"
+    category = Column(String, primary_key=True)
+    total = Column(Cents, nullable=False, default=0)
+    tx_count = Column(Integer, nullable=False, default=0)
+
+class ResourceVersion(Base):
+    """Per-user change counter for a listed resource, bumped with every write to it."""
+    __tablename__ = "resource_versions"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    resource = Column(String, primary_key=True)  # "transactions" | "budgets" | "reminders" | "goals"
+    version = Column(Integer, nullable=False, default=0)
+    # When version last moved: processes that follow writes made elsewhere (the
+    # reminder scheduler) read the rows changed since they last looked
+    changed_at = Column(DateTime, nullable=True)
+    __table_args__ = (
+        Index("ix_resource_versions_resource_changed", "resource", "changed_at"),
+    )
+
+class SchedulerLease(Base):
+    """The process that runs a once-per-deployment job, until expires_at unless it renews."""
+    __tablename__ = "scheduler_leases"
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
 class Budget(Base):
     __tablename__ = "budgets"
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     category = Column(String, nullable=False)
     month = Column(String, nullable=False)  # YYYY-MM
-    cap_amount = Column(Numeric(12,2), nullable=False)
+    cap_amount = Column(Cents, nullable=False)
     __table_args__ = (
         UniqueConstraint("user_id", "category","month", name="uq_budget_user_cat_month"),
         CheckConstraint("cap_amount >= 0", name="ck_budget_cap_amount_non_negative"),
+        Index("ix_budgets_user_month", "user_id", "month"),
+    )
+
+class BudgetAlert(Base):
+    """A budget's spending that has reached one of ALERT_THRESHOLDS percent of its cap."""
+    __tablename__ = "budget_alerts"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    budget_id = Column(Integer, ForeignKey("budgets.id"), nullable=False)
+    category = Column(String, nullable=False)
+    month = Column(String, nullable=False)  # YYYY-MM
+    threshold = Column(Integer, nullable=False)  # percent of cap_amount
+    spent = Column(Cents, nullable=False)  # when the threshold was reached
+    cap_amount = Column(Cents, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        UniqueConstraint("budget_id", "threshold", name="uq_budget_alert_budget_threshold"),
+        # GET /budgets/alerts: a user's alerts, optionally for one month, newest first
+        Index("ix_budget_alerts_user_month_created", "user_id", "month", "created_at"),
     )
 
 class Reminder(Base):
@@ -34,11 +120,40 @@ class Reminder(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     name = Column(String, nullable=False)
     due_date = Column(Date, nullable=False)
-    amount = Column(Numeric(12,2), nullable=False)
+    amount = Column(Cents, nullable=False)
     payee = Column(String, default="")
     notes = Column(String, default="")
     __table_args__ = (
         CheckConstraint("amount >= 0", name="ck_reminder_amount_non_negative"),
+        Index("ix_reminders_user_due_date", "user_id", "due_date"),
+    )
+
+class RecurringRule(Base):
+    """A repeating transaction or reminder, materialized by the recurring job (app/recurring.py)."""
+    __tablename__ = "recurring_rules"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    target = Column(String, nullable=False)   # "transaction" | "reminder"
+    rrule = Column(String, nullable=False)    # e.g. FREQ=MONTHLY;BYMONTHDAY=1;COUNT=12
+    dtstart = Column(Date, nullable=False)
+    lead_days = Column(Integer, nullable=False, default=0)  # create reminders this many days early
+    # Template of the materialized rows
+    name = Column(String, default="")         # reminder name
+    kind = Column(String, nullable=True)      # transaction kind
+    amount = Column(Cents, nullable=False)
+    category = Column(String, default="general")
+    payee = Column(String, default="")
+    note = Column(String, default="")         # transaction note / reminder notes
+    # Watermark: occurrences materialized so far, and the day the next one is
+    # due to be materialized (NULL once the schedule has ended)
+    occurrences = Column(Integer, nullable=False, default=0)
+    next_run = Column(Date, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        CheckConstraint("target IN ('transaction', 'reminder')", name="ck_recurring_rule_target"),
+        CheckConstraint("amount >= 0", name="ck_recurring_rule_amount_non_negative"),
+        # The job only reads rules whose next run has come
+        Index("ix_recurring_rules_next_run", "next_run"),
     )
 
 class Goal(Base):
@@ -46,8 +161,8 @@ class Goal(Base):
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     name = Column(String, nullable=False)
-    target_amount = Column(Numeric(12,2), nullable=False)
-    current_amount = Column(Numeric(12,2), default=0.0)
+    target_amount = Column(Cents, nullable=False)
+    current_amount = Column(Cents, default=0)
     target_date = Column(Date, nullable=True)
     category = Column(String, default="savings")
     description = Column(String, default="")
@@ -57,6 +172,20 @@ class Goal(Base):
         CheckConstraint("target_amount > 0", name="ck_goal_target_amount_positive"),
         CheckConstraint("current_amount >= 0", name="ck_goal_current_amount_non_negative"),
         CheckConstraint("is_completed IN ('true', 'false')", name="ck_goal_is_completed"),
+        Index("ix_goals_user_created", "user_id", "created_at"),
+    )
+
+class GoalContribution(Base):
+    """Ledger of goal contributions; goals.current_amount is their running sum."""
+    __tablename__ = "goal_contributions"
+    id = Column(Integer, primary_key=True)
+    goal_id = Column(Integer, ForeignKey("goals.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    amount = Column(Cents, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        CheckConstraint("amount > 0", name="ck_goal_contribution_amount_positive"),
+        Index("ix_goal_contributions_goal_created", "goal_id", "created_at"),
     )
 
 class User(Base):
@@ -66,6 +195,9 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     is_active = Column(String, default="true")  # Using string for SQLite compatibility
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Bumped whenever the password or is_active changes; access tokens carry
+    # the version they were issued at, and older ones lose their claims
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     __table_args__ = (
         CheckConstraint("is_active IN ('true', 'false')", name="ck_user_is_active"),
     )
@@ -0,0 +1,74 @@
+"""Money as integer cents.
+
+Amounts are stored as BIGINT minor units (cents), so SQL sums are exact
+integer arithmetic instead of floating-point sums of REAL values, which is
+what SQLite keeps for NUMERIC columns. Python code sees Decimal amounts: the
+Cents column type converts on the way in and out. Bound values are always in
+major units, so Transaction(amount=Decimal("4.50")) stores 450.
+
+Aggregations that only add and compare amounts can skip the Decimals and
+read the integers as they are stored, through cents(column). The API side is
+schemas.Money, which admits amounts in whole cents only.
+"""
+from decimal import Decimal
+
+from sqlalchemy import BigInteger
+from sqlalchemy.sql import type_coerce
+from sqlalchemy.types import TypeDecorator
+
+CENT = Decimal("0.01")
+
+# Largest amount a BIGINT of cents holds
+MAX_CENTS = 2 ** 63 - 1
+
+
+def to_cents(value) -> int:
+    """An amount in major units as exact cents; sub-cent amounts are rejected."""
+    if isinstance(value, float):
+        value = Decimal(repr(value))
+    elif not isinstance(value, Decimal):
+        value = Decimal(value)
+    if not value.is_finite():
+        raise ValueError("Amount must be a finite number")
+    cents = value.scaleb(2)
+    if cents != cents.to_integral_value():
+        raise ValueError("Amount must have at most 2 decimal places")
+    cents = int(cents)
+    if abs(cents) > MAX_CENTS:
+        raise ValueError("Amount is too large")
+    return cents
+
+
+def from_cents(cents: int) -> Decimal:
+    """Cents as a Decimal amount with two places, e.g. 450 -> Decimal("4.50")."""
+    return Decimal(cents).scaleb(-2)
+
+
+def _result_value(value, _decimal=Decimal):
+    return None if value is None else _decimal(value).scaleb(-2)
+
+
+class Cents(TypeDecorator):
+    """A money column: Decimal amounts in Python, integer cents in the database."""
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_cents(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else from_cents(value)
+
+    def result_processor(self, dialect, coltype):
+        # Runs per row read: the conversion itself, without the generic
+        # TypeDecorator wrapper around process_result_value (half the cost)
+        return _result_value
+
+    def coerce_compared_value(self, op, value):
+        # Literals compared with or added to a money column are amounts too
+        return self
+
+
+def cents(column):
+    """A money column (or SUM of one) read as the stored integer cents."""
+    return type_coerce(column, BigInteger)
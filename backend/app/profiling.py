@@ -0,0 +1,393 @@
+"""Opt-in per-request profiling: SQL, auth, handler and serialization timings.
+
+With PROFILING_ENABLED=true, main.py calls install(app), which:
+
+- counts SQL statements and their time through SQLAlchemy engine events,
+- times the endpoint call and response serialization by wrapping FastAPI's
+  run_endpoint_function / serialize_response (auth is timed by @timed on
+  get_current_user),
+- reports them per request in a Server-Timing header and aggregated per route
+  in Prometheus text format on GET /metrics (which main.py always mounts, for
+  the other registered collectors),
+- with PROFILE_SLOW_MS > 0, samples thread stacks during each request and
+  writes a flamegraph (SVG plus folded stacks) to PROFILE_DIR for requests
+  slower than that.
+
+Metrics are per process; with several Uvicorn workers, scrape each one.
+"""
+import functools
+import html
+import inspect
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+# Requests at least this slow get a flamegraph; 0 turns the sampler off
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "0"))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SPANS = ("auth", "handler", "serialize")
+
+
+class RequestStats:
+    """Timings collected while one request is being handled."""
+
+    __slots__ = ("sql_count", "sql_time", "spans")
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.spans: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def server_timing(self, total: float) -> str:
+        parts = [f'db;dur={self.sql_time * 1000:.2f};desc="{self.sql_count} queries"']
+        parts += [f"{name};dur={self.spans[name] * 1000:.2f}" for name in SPANS if name in self.spans]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+# Set by the middleware; copied into threadpool workers along with the context
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+@contextmanager
+def span(name: str):
+    """Add the time spent in the block to the current request's span `name`."""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add(name, time.perf_counter() - start)
+
+
+def timed(name: str):
+    """Decorator form of span() for sync and async functions (FastAPI dependencies included)."""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("profiling_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.get("profiling_started")
+    if stats is not None and started:
+        stats.sql_count += 1
+        stats.sql_time += time.perf_counter() - started.pop()
+
+
+def instrument_sql():
+    """Listen on every Engine (sync engines and the sync side of async ones)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def instrument_fastapi():
+    """Time endpoint calls and response serialization inside FastAPI's request handler."""
+    from fastapi import routing
+
+    if getattr(routing.run_endpoint_function, "_profiled", False):
+        return
+    run_endpoint_function = routing.run_endpoint_function
+    serialize_response = routing.serialize_response
+
+    async def profiled_run_endpoint_function(**kwargs):
+        with span("handler"):
+            return await run_endpoint_function(**kwargs)
+
+    async def profiled_serialize_response(**kwargs):
+        with span("serialize"):
+            return await serialize_response(**kwargs)
+
+    profiled_run_endpoint_function._profiled = True
+    routing.run_endpoint_function = profiled_run_endpoint_function
+    routing.serialize_response = profiled_serialize_response
+
+
+class Metrics:
+    """Per-route request counters and latency histograms in Prometheus text format."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._requests = Counter()      # (method, route, status) -> count
+        self._latency = {}              # (method, route) -> [bucket counts..., +Inf count, sum]
+        self._sql_count = Counter()     # (method, route) -> statements
+        self._seconds = Counter()       # (method, route, part) -> seconds
+
+    def observe(self, method: str, route: str, status: int, total: float, stats: RequestStats):
+        key = (method, route)
+        with self._lock:
+            self._requests[(method, route, status)] += 1
+            histogram = self._latency.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            for i, bound in enumerate(self.buckets):
+                if total <= bound:
+                    histogram[i] += 1
+            histogram[len(self.buckets)] += 1
+            histogram[-1] += total
+            self._sql_count[key] += stats.sql_count
+            self._seconds[key + ("db",)] += stats.sql_time
+            for name, seconds in stats.spans.items():
+                self._seconds[key + (name,)] += seconds
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._latency.clear()
+            self._sql_count.clear()
+            self._seconds.clear()
+
+    def render(self) -> str:
+        def labels(method, route, **extra):
+            pairs = {"method": method, "route": route, **extra}
+            return ",".join(f'{k}="{v}"' for k, v in pairs.items())
+
+        lines = [
+            "# HELP pfms_requests_total HTTP requests by route and status.",
+            "# TYPE pfms_requests_total counter",
+        ]
+        with self._lock:
+            for (method, route, status), count in sorted(self._requests.items()):
+                lines.append(f"pfms_requests_total{{{labels(method, route, status=status)}}} {count}")
+            lines += [
+                "# HELP pfms_request_duration_seconds Time until the response started.",
+                "# TYPE pfms_request_duration_seconds histogram",
+            ]
+            for (method, route), histogram in sorted(self._latency.items()):
+                for bound, count in zip(self.buckets, histogram):
+                    lines.append(f"pfms_request_duration_seconds_bucket{{{labels(method, route, le=bound)}}} {count}")
+                count = histogram[len(self.buckets)]
+                lines.append(f'pfms_request_duration_seconds_bucket{{{labels(method, route, le="+Inf")}}} {count}')
+                lines.append(f"pfms_request_duration_seconds_sum{{{labels(method, route)}}} {histogram[-1]:.6f}")
+                lines.append(f"pfms_request_duration_seconds_count{{{labels(method, route)}}} {count}")
+            lines += [
+                "# HELP pfms_sql_statements_total SQL statements executed while handling requests.",
+                "# TYPE pfms_sql_statements_total counter",
+            ]
+            for (method, route), count in sorted(self._sql_count.items()):
+                lines.append(f"pfms_sql_statements_total{{{labels(method, route)}}} {count}")
+            lines += [
+                "# HELP pfms_request_part_seconds_total Time per request part (db, auth, handler, serialize).",
+                "# TYPE pfms_request_part_seconds_total counter",
+            ]
+            for (method, route, part), seconds in sorted(self._seconds.items()):
+                lines.append(f"pfms_request_part_seconds_total{{{labels(method, route, part=part)}}} {seconds:.6f}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+# Waiting threads (idle pool workers, the event loop's select) are not work
+_IDLE_LEAF_FILES = ("threading.py", "selectors.py", "queue.py")
+
+
+class StackSampler:
+    """Samples every thread's Python stack at a fixed interval into folded-stack counts."""
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.counts
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or os.path.basename(frame.f_code.co_filename) in _IDLE_LEAF_FILES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.counts[";".join(reversed(stack))] += 1
+
+
+# One sampler at a time: it already sees every thread
+_sampler_lock = threading.Lock()
+
+
+def render_flamegraph(counts: Counter, title: str, width: int = 1200, row: int = 16) -> str:
+    """A minimal static SVG flamegraph (root at the bottom) of folded-stack counts."""
+    root = {"children": {}, "count": 0}
+    for stack, count in counts.items():
+        node = root
+        node["count"] += count
+        for frame in stack.split(";"):
+            node = node["children"].setdefault(frame, {"children": {}, "count": 0})
+            node["count"] += count
+
+    def depth(node):
+        return 1 + max((depth(child) for child in node["children"].values()), default=0)
+
+    height = (depth(root) + 1) * row
+    total = root["count"] or 1
+    rects = []
+
+    def draw(node, name, x, level):
+        w = node["count"] / total * width
+        if w < 0.5:
+            return
+        y = height - (level + 1) * row
+        hue = 20 + hash(name) % 40
+        label = html.escape(name)
+        pct = node["count"] / total * 100
+        rects.append(
+            f'<g><title>{label} ({node["count"]} samples, {pct:.1f}%)</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{row - 1}" fill="hsl({hue},90%,60%)"/>'
+            + (f'<text x="{x + 3:.1f}" y="{y + row - 4}" font-size="11">{label[:int(w / 7)]}</text>'
+               if w > 30 else "")
+            + "</g>"
+        )
+        for child_name, child in sorted(node["children"].items()):
+            draw(child, child_name, x, level + 1)
+            x += child["count"] / total * width
+
+    draw(root, "all", 0.0, 0)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height + row}" '
+        f'font-family="monospace"><text x="4" y="{row - 3}" font-size="12">{html.escape(title)}</text>'
+        + "".join(rects) + "</svg>\n"
+    )
+
+
+def dump_profile(counts: Counter, method: str, path: str, total: float,
+                 directory: Optional[str] = None) -> str:
+    """Write <PROFILE_DIR>/<time>-<method>-<path>-<ms>ms.svg and .folded; returns the base path."""
+    directory = directory or PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    base = os.path.join(directory, f"{stamp}-{method}-{slug}-{total * 1000:.0f}ms")
+    with open(base + ".folded", "w") as f:
+        f.writelines(f"{stack} {count}\n" for stack, count in counts.most_common())
+    with open(base + ".svg", "w") as f:
+        f.write(render_flamegraph(counts, f"{method} {path} {total * 1000:.0f} ms"))
+    return base
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that collects RequestStats for each HTTP request."""
+
+    def __init__(self, app, slow_ms: float = PROFILE_SLOW_MS, metrics: Metrics = metrics):
+        self.app = app
+        self.slow_ms = slow_ms
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        sampler = None
+        if self.slow_ms > 0 and _sampler_lock.acquire(blocking=False):
+            sampler = StackSampler().start()
+        start = time.perf_counter()
+        status = 500
+        elapsed = None
+
+        async def send_with_timing(message):
+            nonlocal status, elapsed
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = time.perf_counter() - start
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing(elapsed).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            total = elapsed if elapsed is not None else time.perf_counter() - start
+            # Route templates ("/budgets/{budget_id}") keep label cardinality bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            self.metrics.observe(scope["method"], route, status, total, stats)
+            if sampler is not None:
+                counts = sampler.stop()
+                _sampler_lock.release()
+                if counts and total * 1000 >= self.slow_ms:
+                    dump_profile(counts, scope["method"], scope["path"], total)
+
+
+# Seconds spent in each startup phase of this process: "import" (importing
+# and assembling app.main) and "lifespan" (work before the first request)
+startup_seconds: Dict[str, float] = {}
+
+
+def render_startup() -> str:
+    lines = [
+        "# HELP pfms_startup_seconds Time spent in each startup phase of this process.",
+        "# TYPE pfms_startup_seconds gauge",
+    ]
+    lines += [f'pfms_startup_seconds{{phase="{phase}"}} {seconds:.6f}' for phase, seconds in startup_seconds.items()]
+    return "\n".join(lines) + "\n"
+
+
+# Callables returning Prometheus text, concatenated by GET /metrics
+collectors = [render_startup]
+
+
+def read_metrics():
+    from fastapi.responses import PlainTextResponse
+
+    return PlainTextResponse("".join(collect() for collect in collectors),
+                             media_type="text/plain; version=0.0.4")
+
+
+def install(app):
+    """Enable profiling on app: middleware, SQL and FastAPI hooks, request metrics."""
+    instrument_sql()
+    instrument_fastapi()
+    app.add_middleware(ProfilingMiddleware)
+    collectors.append(metrics.render)
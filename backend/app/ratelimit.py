@@ -0,0 +1,58 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class SlidingWindowLimiter:
+    """Allow at most `limit` hits per key within the last `window` seconds.
+
+    Keys are tracked in LRU order and at most `max_keys` are remembered, so the
+    limiter's memory stays bounded under a flood of distinct keys.
+    limit=0 disables limiting.
+    """
+
+    def __init__(self, limit: int, window: float, max_keys: int = 10_000):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._hits = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, key) -> float:
+        """Like hit, without recording one: 0 if a hit would be allowed."""
+        if self.limit <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits.get(key)
+            if hits is None:
+                return 0.0
+            while hits and hits[0] <= now - self.window:
+                hits.popleft()
+            return hits[0] + self.window - now if len(hits) >= self.limit else 0.0
+
+    def hit(self, key) -> float:
+        """Record a hit for key. Returns 0 if allowed, else seconds until a retry may succeed."""
+        if self.limit <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits.get(key)
+            if hits is None:
+                hits = self._hits[key] = deque()
+            self._hits.move_to_end(key)
+            while hits and hits[0] <= now - self.window:
+                hits.popleft()
+            if len(hits) >= self.limit:
+                return hits[0] + self.window - now
+            hits.append(now)
+            while len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+            return 0.0
+
+    def reset(self, key=None):
+        with self._lock:
+            if key is None:
+                self._hits.clear()
+            else:
+                self._hits.pop(key, None)
@@ -0,0 +1,38 @@
+import argparse
+import sys
+import pathlib
+from datetime import date
+
+# Ensure backend folder is on sys.path so absolute imports like "app.db" work
+ROOT = pathlib.Path(__file__).resolve().parents[1]  # backend/
+sys.path.insert(0, str(ROOT))
+
+from app import alerts  # noqa: E402
+from app.db import shard_sessions  # noqa: E402
+from app.services import recurring_service  # noqa: E402
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Materialize the transactions and reminders of recurring rules that have come due. "
+                    "Safe to rerun; run it daily (e.g. from cron)."
+    )
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None,
+                        help="Materialize occurrences due up to this date (default: today, UTC)")
+    parser.add_argument("--chunk-size", type=int, default=recurring_service.RECURRING_CHUNK_SIZE,
+                        help="Rules per DB transaction")
+    args = parser.parse_args(argv)
+
+    # Each shard holds its own users' rules
+    try:
+        with shard_sessions() as dbs:
+            results = [recurring_service.materialize_due(db, args.as_of, args.chunk_size) for db in dbs]
+    finally:
+        # Evaluate the budget alerts of the new expenses before the process exits
+        alerts.pipeline.stop()
+    total = {field: sum(getattr(r, field) for r in results) for field in ("rules", "chunks", "transactions", "reminders")}
+    print(f"Processed {total['rules']} rules in {total['chunks']} chunks: "
+          f"{total['transactions']} transactions, {total['reminders']} reminders.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+import argparse
+import sys
+import pathlib
+
+# Ensure backend folder is on sys.path so absolute imports like "app.db" work
+ROOT = pathlib.Path(__file__).resolve().parents[1]  # backend/
+sys.path.insert(0, str(ROOT))
+
+from app.db import create_tables, db_router  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from app.services import rollup_service  # noqa: E402
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild or verify the monthly_rollups table.")
+    parser.add_argument("command", choices=["rebuild", "verify"])
+    parser.add_argument("--user-id", type=int, default=None, help="Limit to a single user")
+    args = parser.parse_args(argv)
+
+    create_tables()
+    # One user's shard, or every shard
+    shards = [db_router.shard(args.user_id)] if args.user_id is not None else db_router.shards
+    dbs = [Session(bind=shard.primary) for shard in shards]
+    try:
+        if args.command == "rebuild":
+            rows = sum(rollup_service.rebuild_rollups(db, args.user_id) for db in dbs)
+            print(f"Rebuilt {rows} rollup rows.")
+            return 0
+
+        drift = [d for db in dbs for d in rollup_service.verify_rollups(db, args.user_id)]
+        for d in drift:
+            print(
+                f"DRIFT user={d['user_id']} month={d['month']} kind={d['kind']} "
+                f"category={d['category']}: stored {d['stored_total']} ({d['stored_count']} tx), "
+                f"expected {d['expected_total']} ({d['expected_count']} tx)"
+            )
+        print(f"{len(drift)} drifted rollup rows." if drift else "Rollups match transactions.")
+        return 1 if drift else 0
+    finally:
+        for db in dbs:
+            db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
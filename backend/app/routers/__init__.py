@@ -1,9 +1,13 @@
-from .budgets import router as budgets_router
-from .reminders import router as reminders_router
-from .goals import router as goals_router
+from ..db import DB_ASYNC
 
-from .transactions import router as transactions_router
-from .budgets import router as budgets_router
+if DB_ASYNC:
+    from .async_transactions import router as transactions_router
+    from .async_budgets import router as budgets_router
+else:
+    from .transactions import router as transactions_router
+    from .budgets import router as budgets_router
 from .reminders import router as reminders_router
 from .goals import router as goals_router
+from .analytics import router as analytics_router
+from .recurring import router as recurring_router
 from .auth import router as auth_router
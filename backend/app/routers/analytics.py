@@ -0,0 +1,26 @@
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from ..dependencies import get_db
+from .. import schemas
+from .auth import get_current_user
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+@router.get("/", response_model=schemas.AnalyticsOut)
+def get_analytics(
+    from_date: date | None = None,
+    to: date | None = None,
+    window: int = Query(3, ge=1, le=24),
+    top: int = Query(5, ge=0, le=50),
+    db: Session = Depends(get_db),
+    current_user: schemas.CurrentUser = Depends(get_current_user),
+):
+    # Imported here: the service pulls in numpy, which would otherwise be
+    # loaded by every worker at startup
+    from ..services import analytics_service
+
+    try:
+        return analytics_service.get_analytics(db, current_user.id, from_date, to, window, top)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
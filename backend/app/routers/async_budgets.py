@@ -0,0 +1,44 @@
+"""Async variant of the budgets router, mounted instead of it when DB_ASYNC is on."""
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..dependencies import get_async_db
+from .. import etags, schemas, serialization
+from ..services import async_budget_service, async_version_service
+from .auth import get_current_user
+
+router = APIRouter(prefix="/budgets", tags=["budgets"])
+
+@router.post("/", response_model=schemas.BudgetOut, status_code=201)
+async def create_budget(budget: schemas.BudgetIn, db: AsyncSession = Depends(get_async_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
+    try:
+        return await async_budget_service.create_budget(db, budget, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/", response_model=list[schemas.BudgetOut])
+async def list_budgets(request: Request, response: Response, month: str | None = None, db: AsyncSession = Depends(get_async_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
+    # Utilization depends on spending, so transactions are part of the version
+    etag = await async_version_service.current_etag(db, current_user.id, ["budgets", "transactions"], etags.variant(request))
+    cached = etags.not_modified(request, response, etag)
+    if cached:
+        return cached
+    try:
+        budgets = await async_budget_service.get_budgets(db, current_user.id, month)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return serialization.json_list(schemas.BudgetOut, budgets, response.headers)
+
+@router.get("/alerts", response_model=list[schemas.BudgetAlertOut])
+async def list_alerts(response: Response, month: str | None = None, db: AsyncSession = Depends(get_async_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
+    try:
+        alerts = await async_budget_service.get_alerts(db, current_user.id, month)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return serialization.json_list(schemas.BudgetAlertOut, alerts, response.headers)
+
+@router.delete("/{budget_id}")
+async def delete_budget(budget_id: int, db: AsyncSession = Depends(get_async_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
+    try:
+        return await async_budget_service.delete_budget(db, budget_id, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
@@ -0,0 +1,111 @@
+"""Async variant of the transactions router, mounted instead of it when DB_ASYNC is on."""
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..db import get_async_sessionmaker
+from ..dependencies import get_async_db
+from .. import etags, schemas, serialization
+from ..routers.auth import get_current_user
+from ..services import async_transaction_service, async_version_service
+from .transactions import bulk_import, export_tx
+
+router = APIRouter(prefix="/transactions", tags=["transactions"])
+
+# Bulk import and export are batch jobs on the sync engine in both modes
+router.add_api_route("/bulk", bulk_import, methods=["POST"], response_model=schemas.BulkImportResult)
+router.add_api_route("/export", export_tx, methods=["GET"])
+
+@router.post("/", response_model=schemas.TxOut, status_code=201)
+async def create_tx(tx: schemas.TxIn, current_user: schemas.CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await async_transaction_service.create_transaction(db, tx, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/", response_model=list[schemas.TxOut])
+async def list_tx(
+    request: Request,
+    response: Response,
+    kind: str | None = None,
+    category: str | None = None,
+    from_date: date | None = None,
+    to: date | None = None,
+    limit: int | None = Query(None, ge=1, le=1000),
+    cursor: str | None = None,
+    stream: bool = False,
+    current_user: schemas.CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    etag = await async_version_service.current_etag(db, current_user.id, ["transactions"], etags.variant(request))
+    cached = etags.not_modified(request, response, etag)
+    if cached:
+        return cached
+
+    if stream:
+        # The stream outlives this handler, so it gets its own session
+        stream_db = get_async_sessionmaker()()
+        try:
+            rows = async_transaction_service.stream_transactions(
+                stream_db, current_user.id, kind, from_date, to, category
+            )
+        except ValueError as e:
+            await stream_db.close()
+            raise HTTPException(status_code=400, detail=str(e))
+
+        async def ndjson():
+            try:
+                async for tx in rows:
+                    yield tx.model_dump_json() + "\n"
+            finally:
+                await stream_db.close()
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson", headers=dict(response.headers))
+
+    try:
+        rows, next_cursor = await async_transaction_service.list_transaction_rows(
+            db, current_user.id, kind, limit, cursor, from_date, to, category
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return serialization.json_list(schemas.TxOut, rows, response.headers)
+
+@router.get("/search", response_model=schemas.SearchResult)
+async def search_tx(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: str | None = Query(None, pattern="^(income|expense)$"),
+    category: str | None = None,
+    month: str | None = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10_000),
+    current_user: schemas.CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    etag = await async_version_service.current_etag(db, current_user.id, ["transactions"], etags.variant(request))
+    cached = etags.not_modified(request, response, etag)
+    if cached:
+        return cached
+    try:
+        return await async_transaction_service.search_transactions(
+            db, current_user.id, q, kind, category, month, limit, offset
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/totals", response_model=schemas.MonthlyTotalsOut)
+async def get_totals(current_user: schemas.CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await async_transaction_service.get_monthly_totals(db, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.delete("/{transaction_id}")
+async def delete_tx(transaction_id: int, current_user: schemas.CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await async_transaction_service.delete_transaction(db, transaction_id, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
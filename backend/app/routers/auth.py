@@ -1,58 +1,216 @@
 from datetime import datetime, timedelta
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-import jwt
-from jwt.exceptions import InvalidTokenError
-from passlib.context import CryptContext
+from sqlalchemy import event, inspect, select
 from sqlalchemy.orm import Session
-from ..db import SessionLocal
-from .. import models, schemas
+from ..cache import ResponseCache, TTLCache, make_backend
+from ..ratelimit import SlidingWindowLimiter
+from ..db import db_router, route_to_user, session_for_user
+from ..dependencies import get_db
+from .. import models, profiling, schemas
+import asyncio
+import math
 import os  # For environment variables
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # JWT Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "fallback-secret-key")  # Use environment variable
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Resolved users, keyed by token subject (email). The cache is per process,
+# and an entry is only served while its token_version is the current one.
+USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "4096"))
+USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+# The current users.token_version per email, which decides whether a token's
+# claims (and a cached user) still hold; a miss means "ask the database".
+# Entries are dropped when the user changes. With "lru" each worker keeps its
+# own, so a change made in another worker reaches this one when the entry
+# expires (AUTH_USER_CACHE_TTL); with a Redis URL every worker sees it at once.
+AUTH_CACHE_URL = os.getenv("AUTH_CACHE_URL", "lru")
+user_versions = ResponseCache(
+    make_backend(AUTH_CACHE_URL, USER_CACHE_SIZE, USER_CACHE_TTL),
+    enabled=USER_CACHE_SIZE > 0 and USER_CACHE_TTL > 0,
+)
+# Session.info keys of the emails and ids of users changed in the session's transaction
+CHANGED_USERS = "changed_users"
+CHANGED_USER_IDS = "changed_user_ids"
+
+# Password hashing. Changing PASSWORD_HASH_ROUNDS makes existing hashes
+# "need update", and they are transparently rehashed at the user's next login.
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "29000"))
+# Hashing runs in this many dedicated threads so a burst of logins queues here
+# instead of blocking the event loop or starving the request threadpool.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# Within the window: failed logins allowed per email, and login attempts of
+# any outcome per client IP, checked first (0 disables a limit). Only failures
+# count against an email, so nobody can lock its owner out by logging in.
+LOGIN_RATE_LIMIT = int(os.getenv("LOGIN_RATE_LIMIT", "10"))
+LOGIN_IP_RATE_LIMIT = int(os.getenv("LOGIN_IP_RATE_LIMIT", "100"))
+LOGIN_RATE_WINDOW = float(os.getenv("LOGIN_RATE_WINDOW", "60"))
+
+# passlib and PyJWT are imported, and the CryptContext built, on first use
+# rather than at import, which keeps them out of every worker's cold start
+_pwd_context = None
+_pwd_context_lock = threading.Lock()
+login_limiter = SlidingWindowLimiter(LOGIN_RATE_LIMIT, LOGIN_RATE_WINDOW)
+login_ip_limiter = SlidingWindowLimiter(LOGIN_IP_RATE_LIMIT, LOGIN_RATE_WINDOW)
+_hash_executor = None
+_hash_executor_lock = threading.Lock()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
-def get_db():
-    """Dependency to get a database session."""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def get_pwd_context():
+    """The password CryptContext, built on first use."""
+    global _pwd_context
+    with _pwd_context_lock:
+        if _pwd_context is None:
+            from passlib.context import CryptContext
+
+            _pwd_context = CryptContext(
+                schemes=["pbkdf2_sha256"],
+                deprecated="auto",
+                pbkdf2_sha256__default_rounds=PASSWORD_HASH_ROUNDS,
+                pbkdf2_sha256__min_rounds=PASSWORD_HASH_ROUNDS,
+                pbkdf2_sha256__max_rounds=PASSWORD_HASH_ROUNDS,
+            )
+        return _pwd_context
 
 def verify_password(plain_password, hashed_password):
     """Verify a plain password against a hashed password."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     """Hash a plain password."""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
-def authenticate_user(db: Session, email: str, password: str):
-    """Authenticate a user by email and password."""
-    user = db.query(models.User).filter(models.User.email == email).first()
-    if not user or not verify_password(password, user.hashed_password):
+def _get_hash_executor():
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+            )
+        return _hash_executor
+
+async def verify_and_update_password(plain_password, hashed_password):
+    """Verify a password in the hash pool.
+
+    Returns (verified, new_hash); new_hash is set when the stored hash uses
+    outdated parameters and should be replaced.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_hash_executor(), get_pwd_context().verify_and_update, plain_password, hashed_password
+    )
+
+def _get_user_by_email(db: Session, email: str):
+    return db.query(models.User).filter(models.User.email == email).first()
+
+def _store_rehash(db: Session, user: models.User, new_hash: str):
+    user.hashed_password = new_hash
+    db.commit()
+
+async def authenticate_user(db: Session, email: str, password: str):
+    """Authenticate a user by email and password, rehashing outdated hashes."""
+    user = await run_in_threadpool(_get_user_by_email, db, email)
+    if not user:
         return False
+    verified, new_hash = await verify_and_update_password(password, user.hashed_password)
+    if not verified:
+        return False
+    if new_hash:
+        await run_in_threadpool(_store_rehash, db, user, new_hash)
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token."""
     to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    now = datetime.utcnow()
+    expire = now + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    to_encode.update({"exp": expire, "iat": now})
+    import jwt
+
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def user_claims(user: models.User) -> dict:
+    """Claims carried in a user's access token so requests can skip the user lookup."""
+    return {"sub": user.email, "uid": user.id, "active": user.is_active, "ver": user.token_version}
+
+def _version_key(email: str) -> str:
+    return f"user-version:{email}"
+
+def remember_version(email: str, token_version: int):
+    """Record a user's current token_version, as just read from the database."""
+    user_versions.store(_version_key(email), token_version)
+
+def issue_access_token(user: models.User) -> str:
+    """An access token for user, whose claims this process can trust right away."""
+    remember_version(user.email, user.token_version)
+    return create_access_token(
+        data=user_claims(user), expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+
+def invalidate_user(email: str):
+    """Forget a cached user and their current version, so the next request reads the database."""
+    user_versions.invalidate(_version_key(email))
+    user_cache.pop(email)
+
+@event.listens_for(models.User, "before_update")
+def _bump_token_version(mapper, connection, target):
+    attrs = inspect(target).attrs
+    if attrs.hashed_password.history.has_changes() or attrs.is_active.history.has_changes():
+        # In SQL, so a concurrent bump is not lost
+        target.token_version = models.User.token_version + 1
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target):
+    state = inspect(target)
+    emails = {target.email, *(state.attrs.email.history.deleted or ())}
+    for email in emails:
+        invalidate_user(email)
+    # Again once committed: a request may have read the old row in between
+    if state.session is not None:
+        state.session.info.setdefault(CHANGED_USERS, set()).update(emails)
+        state.session.info.setdefault(CHANGED_USER_IDS, set()).add(target.id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session):
+    for email in session.info.pop(CHANGED_USERS, ()):
+        invalidate_user(email)
+    for user_id in session.info.pop(CHANGED_USER_IDS, ()):
+        _sync_home_shard(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session):
+    session.info.pop(CHANGED_USERS, None)
+    session.info.pop(CHANGED_USER_IDS, None)
+
+def _load_user(db: Session, email: str) -> Optional[schemas.CurrentUser]:
+    user = db.query(models.User).filter(models.User.email == email).first()
+    if user is None:
+        return None
+    return schemas.CurrentUser(id=user.id, email=user.email, is_active=user.is_active,
+                               token_version=user.token_version)
+
+@profiling.timed("auth")
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Get the current user from the JWT token."""
+    """Get the current user from the JWT token.
+
+    Resolution order: the user cache, then the token's own uid/active claims,
+    then the database. The first two only count while the user's current
+    token_version is known and matches theirs.
+    """
+    import jwt
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -63,12 +221,38 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
-        token_data = schemas.TokenData(email=email)
-    except InvalidTokenError:
+        token_data = schemas.TokenData(
+            email=email,
+            user_id=payload.get("uid"),
+            is_active=payload.get("active"),
+            token_version=payload.get("ver"),
+            issued_at=payload.get("iat"),
+        )
+    except jwt.InvalidTokenError:
         raise credentials_exception
-    user = db.query(models.User).filter(models.User.email == token_data.email).first()
+
+    version = user_versions.lookup(_version_key(token_data.email))
+    user = user_cache.get(token_data.email)
+    if user is not None and user.token_version != version:
+        user = None
     if user is None:
+        if (version is not None and token_data.token_version == version
+                and token_data.user_id is not None and token_data.is_active is not None):
+            user = schemas.CurrentUser(
+                id=token_data.user_id, email=token_data.email, is_active=token_data.is_active,
+                token_version=version,
+            )
+        else:
+            # Blocking query: keep it off the event loop
+            user = await run_in_threadpool(_load_user, db, token_data.email)
+            if user is None:
+                raise credentials_exception
+            remember_version(user.email, user.token_version)
+        user_cache.set(token_data.email, user)
+    if user.is_active != "true":
         raise credentials_exception
+    # The handler shares this session: send its queries to the user's shard
+    route_to_user(db, user.id)
     return user
 
 @router.post("/register", response_model=schemas.UserOut)
@@ -85,25 +269,72 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    _copy_to_home_shard(db_user)
     return db_user
 
+def _copy_to_home_shard(user: models.User):
+    # The directory allocated the id; the user's shard gets its own copy of
+    # the row so its tables' foreign keys hold
+    if db_router.shard(user.id) is db_router.directory:
+        return
+    home = session_for_user(user.id)
+    try:
+        home.add(models.User(id=user.id, email=user.email, hashed_password=user.hashed_password,
+                             is_active=user.is_active, created_at=user.created_at))
+        home.commit()
+    finally:
+        home.close()
+
+# The user columns that can change after registration
+SYNCED_USER_COLUMNS = ("email", "hashed_password", "is_active", "token_version")
+
+def _sync_home_shard(user_id: int):
+    """Bring the user's shard copy of their row up to date with the directory's."""
+    if db_router.shard(user_id) is db_router.directory:
+        return
+    table = models.User.__table__
+    with Session(bind=db_router.directory.primary) as directory:
+        row = directory.execute(
+            select(*(table.c[name] for name in SYNCED_USER_COLUMNS)).where(table.c.id == user_id)
+        ).mappings().first()
+    if row is None:
+        return
+    home = session_for_user(user_id)
+    try:
+        # Core UPDATE: the copy takes the directory's token_version as is, no second bump
+        home.execute(table.update().where(table.c.id == user_id).values(**row))
+        home.commit()
+    finally:
+        home.close()
+
 @router.post("/token", response_model=schemas.Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_for_access_token(request: Request, form_data: OAuth2PasswordRequestForm = Depends(),
+                                 db: Session = Depends(get_db)):
     """Login and generate an access token."""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    email = form_data.username.lower()
+    client_ip = request.client.host if request.client else None
+    retry_after = login_ip_limiter.hit(client_ip) or login_limiter.check(email)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
+        login_limiter.hit(email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
+    login_limiter.reset(email)
+    return {"access_token": issue_access_token(user), "token_type": "bearer"}
 
 @router.get("/me", response_model=schemas.UserOut)
-async def read_users_me(current_user: models.User = Depends(get_current_user)):
+def read_users_me(current_user: schemas.CurrentUser = Depends(get_current_user), db: Session = Depends(get_db)):
     """Get the current authenticated user."""
-    return current_user
\ No newline at end of file
+    user = db.get(models.User, current_user.id)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return user
\ No newline at end of file
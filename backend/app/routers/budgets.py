@@ -1,34 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from ..db import SessionLocal
-from ..models import Budget, User
-from .. import schemas
-from ..services import budget_service
+from ..dependencies import get_db
+from ..models import Budget
+from .. import etags, schemas, serialization
+from ..services import budget_service, version_service
 from .auth import get_current_user
 
 router = APIRouter(prefix="/budgets", tags=["budgets"])
 
-def get_db():
-    db = SessionLocal()
-    try: yield db
-    finally: db.close()
-
 @router.post("/", response_model=schemas.BudgetOut, status_code=201)
-def create_budget(budget: schemas.BudgetIn, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def create_budget(budget: schemas.BudgetIn, db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
     try:
         return budget_service.create_budget(db, budget, current_user.id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/", response_model=list[schemas.BudgetOut])
-def list_budgets(month: str | None = None, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def list_budgets(request: Request, response: Response, month: str | None = None, db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
+    # Utilization depends on spending, so transactions are part of the version
+    etag = version_service.current_etag(db, current_user.id, ["budgets", "transactions"], etags.variant(request))
+    cached = etags.not_modified(request, response, etag)
+    if cached:
+        return cached
+    try:
+        budgets = budget_service.get_budgets(db, current_user.id, month)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return serialization.json_list(schemas.BudgetOut, budgets, response.headers)
+
+@router.get("/alerts", response_model=list[schemas.BudgetAlertOut])
+def list_alerts(response: Response, month: str | None = None, db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
+    # Recorded as expenses are written; reading them computes nothing
     try:
-        return budget_service.get_budgets(db, current_user.id, month)
+        alerts = budget_service.get_alerts(db, current_user.id, month)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return serialization.json_list(schemas.BudgetAlertOut, alerts, response.headers)
 
 @router.delete("/{budget_id}")
-def delete_budget(budget_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def delete_budget(budget_id: int, db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
     try:
         return budget_service.delete_budget(db, budget_id, current_user.id)
     except ValueError as e:
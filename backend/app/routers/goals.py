@@ -1,78 +1,72 @@
-from fastapi import APIRouter, Depends, HTTPException
+from decimal import Decimal
+from functools import partial
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from ..db import SessionLocal
-from .. import models, schemas
+from ..db import session_for_user
+from ..dependencies import get_db
+from .. import etags, schemas, serialization
+from ..services import export_service, goal_service, version_service
 from .auth import get_current_user
 
 router = APIRouter(prefix="/goals", tags=["goals"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/", response_model=schemas.GoalOut, status_code=201)
-def create_goal(goal: schemas.GoalIn, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    obj = models.Goal(user_id=current_user.id, **goal.model_dump())
-    db.add(obj)
-    db.commit()
-    db.refresh(obj)
-
-    # Calculate progress percentage
-    progress_percentage = (float(obj.current_amount) / float(obj.target_amount)) * 100 if obj.target_amount > 0 else 0
-
-    return {
-        **obj.__dict__,
-        "progress_percentage": progress_percentage
-    }
+def create_goal(goal: schemas.GoalIn, db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
+    return goal_service.create_goal(db, goal, current_user.id)
 
 @router.get("/", response_model=list[schemas.GoalOut])
-def list_goals(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    goals = db.query(models.Goal).filter(models.Goal.user_id == current_user.id).order_by(models.Goal.created_at.desc()).all()
-    result = []
-
-    for goal in goals:
-        progress_percentage = (float(goal.current_amount) / float(goal.target_amount)) * 100 if goal.target_amount > 0 else 0
-        result.append({
-            **goal.__dict__,
-            "progress_percentage": progress_percentage
-        })
-
-    return result
+def list_goals(request: Request, response: Response, db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
+    etag = version_service.current_etag(db, current_user.id, ["goals"], etags.variant(request))
+    cached = etags.not_modified(request, response, etag)
+    if cached:
+        return cached
+    return serialization.json_list(schemas.GoalOut, goal_service.list_goal_rows(db, current_user.id), response.headers)
+
+@router.get("/export")
+def export_goals(format: str = "csv", current_user: schemas.CurrentUser = Depends(get_current_user)):
+    try:
+        fmt = export_service.validate_format(format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    stmt = export_service.goal_export_query(current_user.id)
+    return StreamingResponse(
+        export_service.stream_export(partial(session_for_user, current_user.id), stmt, export_service.GOAL_COLUMNS, fmt),
+        media_type=export_service.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="goals.{fmt}"'},
+    )
 
 @router.put("/{goal_id}/contribute", response_model=schemas.GoalOut)
-def contribute_to_goal(goal_id: int, amount: float, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    if amount <= 0:
-        raise HTTPException(status_code=400, detail="Contribution amount must be positive")
-
-    goal = db.query(models.Goal).filter(models.Goal.id == goal_id, models.Goal.user_id == current_user.id).first()
-    if not goal:
-        raise HTTPException(status_code=404, detail="Goal not found")
-
-    goal.current_amount = float(goal.current_amount) + amount
-
-    # Check if goal is completed
-    if goal.current_amount >= goal.target_amount:
-        goal.is_completed = "true"
-
-    db.commit()
-    db.refresh(goal)
+def contribute_to_goal(goal_id: int, amount: Decimal, db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
+    try:
+        amount = goal_service.validate_amount(amount)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        [goal] = goal_service.contribute(db, current_user.id, [(goal_id, amount)])
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return goal
 
-    progress_percentage = (float(goal.current_amount) / float(goal.target_amount)) * 100 if goal.target_amount > 0 else 0
+@router.post("/contributions", response_model=list[schemas.GoalOut])
+def contribute_batch(batch: schemas.ContributionBatch, db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
+    try:
+        contributions = [(c.goal_id, goal_service.validate_amount(c.amount)) for c in batch.contributions]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        goals = goal_service.contribute(db, current_user.id, contributions)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return goals
 
-    return {
-        **goal.__dict__,
-        "progress_percentage": progress_percentage
-    }
+@router.get("/{goal_id}/contributions", response_model=list[schemas.ContributionOut])
+def list_contributions(goal_id: int, db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
+    return goal_service.list_contributions(db, goal_id, current_user.id)
 
 @router.delete("/{goal_id}")
-def delete_goal(goal_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    goal = db.query(models.Goal).filter(models.Goal.id == goal_id, models.Goal.user_id == current_user.id).first()
-    if not goal:
-        raise HTTPException(status_code=404, detail="Goal not found")
-
-    db.delete(goal)
-    db.commit()
-    return {"message": "Goal deleted successfully"}
+def delete_goal(goal_id: int, db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
+    try:
+        return goal_service.delete_goal(db, goal_id, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
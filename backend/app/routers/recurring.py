@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from ..dependencies import get_db
+from .. import schemas
+from ..services import recurring_service
+from .auth import get_current_user
+
+router = APIRouter(prefix="/recurring", tags=["recurring"])
+
+@router.post("/", response_model=schemas.RecurringRuleOut, status_code=201)
+def create_rule(rule: schemas.RecurringRuleIn, db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
+    try:
+        return recurring_service.create_rule(db, rule, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/", response_model=list[schemas.RecurringRuleOut])
+def list_rules(db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
+    return recurring_service.list_rules(db, current_user.id)
+
+@router.delete("/{rule_id}")
+def delete_rule(rule_id: int, db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
+    try:
+        return recurring_service.delete_rule(db, rule_id, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
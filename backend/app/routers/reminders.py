@@ -1,41 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from functools import partial
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from ..db import SessionLocal
-from .. import models, schemas
+from ..db import session_for_user
+from ..dependencies import get_db
+from .. import etags, schemas, serialization
+from ..services import export_service, reminder_service, version_service
 from .auth import get_current_user
 
 router = APIRouter(prefix="/reminders", tags=["reminders"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/", response_model=schemas.ReminderOut, status_code=201)
-def create_reminder(reminder: schemas.ReminderIn, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    obj = models.Reminder(user_id=current_user.id, **reminder.model_dump())
-    db.add(obj)
-    db.commit()
-    db.refresh(obj)
-    return obj
+def create_reminder(reminder: schemas.ReminderIn, db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
+    return reminder_service.create_reminder(db, reminder, current_user.id)
 
 @router.get("/", response_model=list[schemas.ReminderOut])
-def list_reminders(from_date: str | None = None, to: str | None = None, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    q = db.query(models.Reminder).filter(models.Reminder.user_id == current_user.id)
-    if from_date:
-        q = q.filter(models.Reminder.due_date >= from_date)
-    if to:
-        q = q.filter(models.Reminder.due_date <= to)
-    return q.order_by(models.Reminder.due_date).all()
+def list_reminders(request: Request, response: Response, from_date: str | None = None, to: str | None = None, db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
+    etag = version_service.current_etag(db, current_user.id, ["reminders"], etags.variant(request))
+    cached = etags.not_modified(request, response, etag)
+    if cached:
+        return cached
+    rows = reminder_service.list_reminder_rows(db, current_user.id, from_date, to)
+    return serialization.json_list(schemas.ReminderOut, rows, response.headers)
 
-@router.delete("/{reminder_id}")
-def delete_reminder(reminder_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    reminder = db.query(models.Reminder).filter(models.Reminder.id == reminder_id, models.Reminder.user_id == current_user.id).first()
-    if not reminder:
-        raise HTTPException(status_code=404, detail="Reminder not found")
+@router.get("/upcoming", response_model=list[schemas.ReminderOut])
+def upcoming_reminders(days: int = Query(7, ge=0, le=366), db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
+    return reminder_service.upcoming_reminders(db, current_user.id, days)
 
-    db.delete(reminder)
-    db.commit()
-    return {"message": "Reminder deleted successfully"}
+@router.get("/export")
+def export_reminders(format: str = "csv", from_date: date | None = None, to: date | None = None, current_user: schemas.CurrentUser = Depends(get_current_user)):
+    try:
+        fmt = export_service.validate_format(format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    stmt = export_service.reminder_export_query(current_user.id, from_date, to)
+    return StreamingResponse(
+        export_service.stream_export(partial(session_for_user, current_user.id), stmt, export_service.REMINDER_COLUMNS, fmt),
+        media_type=export_service.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="reminders.{fmt}"'},
+    )
+
+@router.delete("/{reminder_id}")
+def delete_reminder(reminder_id: int, db: Session = Depends(get_db), current_user: schemas.CurrentUser = Depends(get_current_user)):
+    try:
+        return reminder_service.delete_reminder(db, reminder_id, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
@@ -1,35 +1,149 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from functools import partial
+from tempfile import SpooledTemporaryFile
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from ..db import SessionLocal
-from .. import models, schemas
+from ..db import session_for_user
+from ..dependencies import get_db
+from .. import etags, schemas, serialization
 from ..routers.auth import get_current_user
-from ..services.transaction_service import create_transaction, list_transactions
+from ..services import export_service, import_service, search_service, version_service
+from ..services.transaction_service import create_transaction, list_transaction_rows, stream_transactions
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/", response_model=schemas.TxOut, status_code=201)
-def create_tx(tx: schemas.TxIn, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+def create_tx(tx: schemas.TxIn, current_user: schemas.CurrentUser = Depends(get_current_user), db: Session = Depends(get_db)):
     try:
         return create_transaction(db, tx, current_user.id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/bulk", response_model=schemas.BulkImportResult)
+async def bulk_import(
+    request: Request,
+    format: str | None = None,
+    current_user: schemas.CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Import many transactions from a JSON array, CSV or OFX body or multipart file upload."""
+    content_type = request.headers.get("content-type", "")
+    filename = ""
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Multipart upload must include a 'file' field")
+        body, filename = upload.file, upload.filename or ""
+        content_type = upload.content_type or ""
+    else:
+        # Spool the raw body so large imports go to disk, not memory
+        body = SpooledTemporaryFile(max_size=1024 * 1024)
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+    try:
+        fmt = import_service.detect_format(format, content_type, filename)
+        return await run_in_threadpool(import_service.import_transactions, db, current_user.id, body, fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        body.close()
+
 @router.get("/", response_model=list[schemas.TxOut])
-def list_tx(kind: str | None = None, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+def list_tx(
+    request: Request,
+    response: Response,
+    kind: str | None = None,
+    category: str | None = None,
+    from_date: date | None = None,
+    to: date | None = None,
+    limit: int | None = Query(None, ge=1, le=1000),
+    cursor: str | None = None,
+    stream: bool = False,
+    current_user: schemas.CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    etag = version_service.current_etag(db, current_user.id, ["transactions"], etags.variant(request))
+    cached = etags.not_modified(request, response, etag)
+    if cached:
+        return cached
+
+    if stream:
+        # The stream outlives this handler, so it gets its own session
+        stream_db = session_for_user(current_user.id)
+        try:
+            rows = stream_transactions(stream_db, current_user.id, kind, from_date, to, category)
+        except ValueError as e:
+            stream_db.close()
+            raise HTTPException(status_code=400, detail=str(e))
+
+        def ndjson():
+            try:
+                for tx in rows:
+                    yield tx.model_dump_json() + "\n"
+            finally:
+                stream_db.close()
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson", headers=dict(response.headers))
+
+    try:
+        rows, next_cursor = list_transaction_rows(
+            db, current_user.id, kind, limit, cursor, from_date, to, category
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return serialization.json_list(schemas.TxOut, rows, response.headers)
+
+@router.get("/search", response_model=schemas.SearchResult)
+def search_tx(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: str | None = Query(None, pattern="^(income|expense)$"),
+    category: str | None = None,
+    month: str | None = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10_000),
+    current_user: schemas.CurrentUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    etag = version_service.current_etag(db, current_user.id, ["transactions"], etags.variant(request))
+    cached = etags.not_modified(request, response, etag)
+    if cached:
+        return cached
+    try:
+        return search_service.search_transactions(db, current_user.id, q, kind, category, month, limit, offset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/export")
+def export_tx(
+    format: str = "csv",
+    kind: str | None = None,
+    category: str | None = None,
+    from_date: date | None = None,
+    to: date | None = None,
+    current_user: schemas.CurrentUser = Depends(get_current_user),
+):
+    """Stream the user's transactions as CSV, NDJSON or Parquet."""
     try:
-        return list_transactions(db, current_user.id, kind)
+        fmt = export_service.validate_format(format)
+        stmt = export_service.transaction_export_query(current_user.id, kind, category, from_date, to)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        export_service.stream_export(partial(session_for_user, current_user.id), stmt, export_service.TRANSACTION_COLUMNS, fmt),
+        media_type=export_service.MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="transactions.{fmt}"'},
+    )
 
-@router.get("/totals")
-def get_totals(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.get("/totals", response_model=schemas.MonthlyTotalsOut)
+def get_totals(current_user: schemas.CurrentUser = Depends(get_current_user), db: Session = Depends(get_db)):
     try:
         from ..services.transaction_service import get_monthly_totals
         return get_monthly_totals(db, current_user.id)
@@ -37,7 +151,7 @@ def get_totals(current_user: models.User = Depends(get_current_user), db: Sessio
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{transaction_id}")
-def delete_tx(transaction_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+def delete_tx(transaction_id: int, current_user: schemas.CurrentUser = Depends(get_current_user), db: Session = Depends(get_db)):
     try:
         from ..services.transaction_service import delete_transaction
         return delete_transaction(db, transaction_id, current_user.id)
@@ -0,0 +1,277 @@
+import heapq
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger("pfms.reminders")
+
+# Announce reminders as they come due. This only drives events: listings,
+# including GET /reminders/upcoming, always query the database, so every
+# worker answers alike whatever this is set to.
+REMINDER_SCHEDULER_ENABLED = os.getenv("REMINDER_SCHEDULER_ENABLED", "true").lower() == "true"
+# How often (seconds) to pick up reminders written by other processes, such as
+# other workers and the recurring job, and to renew the lease; 0 turns the
+# refresh off, so the first worker to start keeps the scheduler for good
+REMINDER_SCHEDULER_REFRESH_SECONDS = float(os.getenv("REMINDER_SCHEDULER_REFRESH_SECONDS", "60"))
+# One worker runs the scheduler, holding a lease it renews at every refresh;
+# when it stops renewing, another worker takes over once the lease lapses
+REMINDER_SCHEDULER_LEASE_SECONDS = float(os.getenv("REMINDER_SCHEDULER_LEASE_SECONDS", "180"))
+# A refresh re-reads changes this far (seconds) behind the newest it has seen,
+# so a write that committed late with an earlier timestamp is not missed
+REMINDER_SCHEDULER_LOOKBACK_SECONDS = float(os.getenv("REMINDER_SCHEDULER_LOOKBACK_SECONDS", "300"))
+
+DUE = "due"
+OVERDUE = "overdue"
+
+
+class ReminderEvent(NamedTuple):
+    kind: str  # "due" on the due date, "overdue" the day after
+    reminder_id: int
+    user_id: int
+    due_date: date
+
+
+def _today() -> date:
+    return datetime.utcnow().date()
+
+
+_ID_BITS = 40
+_ID_MASK = (1 << _ID_BITS) - 1
+_KIND_ORDER = {OVERDUE: 0, DUE: 1}  # on the same day, yesterday's overdue fires first
+_KINDS = [OVERDUE, DUE]
+
+
+def _heap_key(day: int, kind: str, reminder_id: int) -> int:
+    return (((day << 1) | _KIND_ORDER[kind]) << _ID_BITS) | reminder_id
+
+
+def _unpack(key: int) -> Tuple[int, str, int]:
+    head = key >> _ID_BITS
+    return head >> 1, _KINDS[head & 1], key & _ID_MASK
+
+
+_DAY_BITS = 22  # date ordinals stay below 2**22 (year 9999 is 3652059)
+_DAY_MASK = (1 << _DAY_BITS) - 1
+
+
+def _owner(user_id: int, day: int) -> int:
+    return (user_id << _DAY_BITS) | day
+
+
+def _unpack_owner(value: int) -> Tuple[int, int]:
+    return value >> _DAY_BITS, value & _DAY_MASK
+
+
+class ReminderScheduler:
+    """Due and overdue events of reminders across all users.
+
+    A min-heap of (fire day, kind, reminder id) drives the events: the
+    background thread sleeps until the day the heap's head fires. The
+    reminders table is read in full once, at load; writes made in this
+    process are applied with add/remove, and a periodic refresh re-reads only
+    the users whose reminders another process changed (replace_users).
+    Only the process holding the scheduler lease loads it; in the others it
+    stays unloaded, add/remove do nothing and no events fire.
+
+    add/remove cost O(log n) on the heap (removal is lazy: stale heap entries
+    are skipped when popped and compacted once they outnumber live ones).
+
+    Only reminders due from yesterday on are tracked: the overdue event of
+    anything older has already fired. Events are at-least-once: after a
+    restart, reminders due today or yesterday are announced again.
+    """
+
+    def __init__(self, clock: Callable[[], date] = _today):
+        self.clock = clock
+        self.loaded = False
+        self._lock = threading.Condition()
+        # Entries are ints packing (day, kind, id) in sort order, or
+        # (user, day): far smaller than tuples at a million reminders
+        self._heap: List[int] = []  # _heap_key(fire day ordinal, kind, id)
+        self._reminders: Dict[int, int] = {}  # id -> _owner(user_id, due day ordinal)
+        self._announced: Dict[int, int] = {}  # id -> due day ordinal, for reminders fully announced
+        # user_id -> the reminders version (version_service) the contents reflect
+        self.versions: Dict[int, int] = {}
+        # Newest resource_versions.changed_at the contents reflect
+        self.changed_since: Optional[datetime] = None
+        self._listeners: List[Callable[[ReminderEvent], None]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._refresh: Optional[Callable[[], None]] = None
+        self._refresh_seconds = 0.0
+
+    def __len__(self):
+        return len(self._reminders)
+
+    def subscribe(self, listener: Callable[[ReminderEvent], None]):
+        self._listeners.append(listener)
+
+    def _tracked(self, due: int) -> bool:
+        return due >= self.clock().toordinal() - 1
+
+    def _insert(self, reminder_id: int, user_id: int, due: int):
+        self._reminders[reminder_id] = _owner(user_id, due)
+        heapq.heappush(self._heap, _heap_key(due, DUE, reminder_id))
+
+    def _discard(self, reminder_id: int):
+        del self._reminders[reminder_id]
+        # Heap entries stay until popped; compact once most of the heap is stale
+        if len(self._heap) > 2 * len(self._reminders) + 64:
+            self._heap = [entry for entry in self._heap if self._live(entry)]
+            heapq.heapify(self._heap)
+
+    def _live(self, entry: int) -> bool:
+        day, kind, reminder_id = _unpack(entry)
+        current = self._reminders.get(reminder_id)
+        if current is None:
+            return False
+        return current & _DAY_MASK == (day if kind == DUE else day - 1)
+
+    def load(self, rows: Iterable[Tuple[int, int, date]]):
+        """Replace the contents with (reminder id, user id, due date) rows."""
+        with self._lock:
+            self._heap, self._reminders, self._announced = [], {}, {}
+            for reminder_id, user_id, due_date in rows:
+                due = due_date.toordinal()
+                if self._tracked(due):
+                    self._reminders[reminder_id] = _owner(user_id, due)
+                    self._heap.append(_heap_key(due, DUE, reminder_id))
+            heapq.heapify(self._heap)
+            self.loaded = True
+            self._lock.notify()
+
+    def unload(self):
+        """Drop the contents, as a process that does not run the scheduler."""
+        with self._lock:
+            self._heap, self._reminders, self._announced = [], {}, {}
+            self.versions, self.changed_since = {}, None
+            self.loaded = False
+
+    def add(self, reminder_id: int, user_id: int, due_date: date):
+        due = due_date.toordinal()
+        with self._lock:
+            if not self.loaded:
+                return
+            if reminder_id in self._reminders:
+                self._discard(reminder_id)
+            if self._tracked(due):
+                self._insert(reminder_id, user_id, due)
+                self._lock.notify()
+
+    def remove(self, reminder_id: int):
+        with self._lock:
+            if reminder_id in self._reminders:
+                self._discard(reminder_id)
+
+    def replace_users(self, user_ids: Iterable[int], rows: Iterable[Tuple[int, int, date]]):
+        """Replace the reminders of user_ids with rows, as read again from the database.
+
+        Reminders whose events already fired keep their progress, so nothing
+        is announced twice by this process.
+        """
+        users = set(user_ids)
+        fresh = {reminder_id: _owner(user_id, due_date.toordinal()) for reminder_id, user_id, due_date in rows}
+        with self._lock:
+            gone = [reminder_id for reminder_id, owner in self._reminders.items()
+                    if owner >> _DAY_BITS in users and reminder_id not in fresh]
+            for reminder_id in gone:
+                self._discard(reminder_id)
+            for reminder_id, owner in fresh.items():
+                user_id, due = _unpack_owner(owner)
+                current = self._reminders.get(reminder_id)
+                if current == owner or not self._tracked(due):
+                    continue
+                if current is None and self._announced.get(reminder_id) == due:
+                    continue
+                if current is not None:
+                    self._discard(reminder_id)
+                self._insert(reminder_id, user_id, due)
+            self._lock.notify()
+
+    def pop_events(self, today: Optional[date] = None) -> List[ReminderEvent]:
+        """Take every event that fires on or before today, in firing order."""
+        now = (today or self.clock()).toordinal()
+        events = []
+        with self._lock:
+            while self._heap and _unpack(self._heap[0])[0] <= now:
+                entry = heapq.heappop(self._heap)
+                if not self._live(entry):
+                    continue
+                _, kind, reminder_id = _unpack(entry)
+                user_id, due = _unpack_owner(self._reminders[reminder_id])
+                events.append(ReminderEvent(kind, reminder_id, user_id, date.fromordinal(due)))
+                if kind == DUE:
+                    heapq.heappush(self._heap, _heap_key(due + 1, OVERDUE, reminder_id))
+                else:
+                    # Announced in full; no longer upcoming
+                    self._discard(reminder_id)
+                    self._announced[reminder_id] = due
+            if events:
+                self._announced = {i: due for i, due in self._announced.items() if self._tracked(due)}
+        return events
+
+    def _seconds_until_next(self) -> Optional[float]:
+        if not self._heap:
+            return None
+        fire_at = datetime.combine(date.fromordinal(_unpack(self._heap[0])[0]), datetime.min.time())
+        return max(0.0, (fire_at - datetime.utcnow()).total_seconds())
+
+    def _emit(self, events: List[ReminderEvent]):
+        for event in events:
+            for listener in self._listeners or [_log_event]:
+                try:
+                    listener(event)
+                except Exception:
+                    logger.exception("Reminder listener failed for %s", event)
+
+    def _run(self):
+        next_refresh = time.monotonic() + self._refresh_seconds
+        while True:
+            with self._lock:
+                if self._stopping:
+                    return
+                wait = self._seconds_until_next()
+                refresh_in = next_refresh - time.monotonic() if self._refresh else None
+                if refresh_in is not None and (wait is None or refresh_in < wait):
+                    wait = max(0.0, refresh_in)
+                if wait is None or wait > 0:
+                    # add()/load()/stop() notify, so a sooner reminder wakes the thread
+                    self._lock.wait(timeout=None if wait is None else min(wait, 3600))
+                    continue
+            if refresh_in is not None and refresh_in <= 0:
+                next_refresh = time.monotonic() + self._refresh_seconds
+                try:
+                    self._refresh()
+                except Exception:
+                    logger.exception("Reminder scheduler refresh failed")
+                continue
+            self._emit(self.pop_events())
+
+    def start(self, refresh: Optional[Callable[[], None]] = None,
+              refresh_seconds: float = REMINDER_SCHEDULER_REFRESH_SECONDS):
+        """Start the event thread; it also calls refresh every refresh_seconds."""
+        if self._thread is None:
+            self._stopping = False
+            self._refresh = refresh if refresh_seconds > 0 else None
+            self._refresh_seconds = refresh_seconds
+            self._thread = threading.Thread(target=self._run, name="reminder-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            with self._lock:
+                self._stopping = True
+                self._lock.notify()
+            self._thread.join()
+            self._thread = None
+
+
+def _log_event(event: ReminderEvent):
+    logger.info("Reminder %s is %s (user %s, due %s)", event.reminder_id, event.kind,
+                event.user_id, event.due_date)
+
+
+scheduler = ReminderScheduler()
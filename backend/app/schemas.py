@@ -1,10 +1,15 @@
 from pydantic import BaseModel, Field
 from decimal import Decimal
 from datetime import datetime, date
-from typing import Optional
+from typing import Annotated, Optional
+
+# An amount of money in whole cents, e.g. 12.30. Columns store it as integer
+# cents (money.Cents); up to 18 digits fits their BIGINT.
+Money = Annotated[Decimal, Field(max_digits=18, decimal_places=2)]
+
 class TxIn(BaseModel):
     kind: str = Field(pattern="^(income|expense)$")
-    amount: Decimal = Field(gt=0)
+    amount: Money = Field(gt=0)
     category: str = "general"
     note: str = ""
 class TxOut(TxIn):
@@ -12,20 +17,84 @@ class TxOut(TxIn):
     created_at: datetime
     class Config: from_attributes = True
 
+class TxImport(TxIn):
+    """One row of a bulk import; created_at defaults to the time of import."""
+    created_at: datetime | None = None
+
+class BulkRowError(BaseModel):
+    row: int
+    error: str
+
+class BulkImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: list[BulkRowError] = []
+
+class SearchFacets(BaseModel):
+    """Match counts per value, over all matches rather than just the page."""
+    category: dict[str, int]
+    kind: dict[str, int]
+    month: dict[str, int]
+
+class SearchResult(BaseModel):
+    total: int
+    items: list[TxOut]
+    facets: SearchFacets
+
 class BudgetIn(BaseModel):
     category: str
     month: str = Field(pattern=r"^\d{4}-\d{2}$")
-    cap_amount: Decimal = Field(ge=0)
+    cap_amount: Money = Field(ge=0)
 
 class BudgetOut(BudgetIn):
     id: int
     utilization: float = 0.0
+    spent: Money = Decimal("0.00")
+    remaining: Money = Decimal("0.00")
+    percentage: float | None = None
+    over_cap: bool = False
     class Config: from_attributes = True
 
+class BudgetAlertOut(BaseModel):
+    """A budget whose spending reached threshold percent of its cap."""
+    id: int
+    budget_id: int
+    category: str
+    month: str
+    threshold: int
+    spent: Money
+    cap_amount: Money
+    created_at: datetime
+    class Config: from_attributes = True
+
+class CategorySeries(BaseModel):
+    category: str
+    expense: list[Money]
+    total: Money
+    share: float
+
+class AnalyticsOut(BaseModel):
+    """Per-month series over a date range; every list is aligned with months."""
+    months: list[str]
+    income: list[Money]
+    expense: list[Money]
+    net: list[Money]
+    expense_rolling_avg: list[Money]
+    net_rolling_avg: list[Money]
+    expense_change: list[Money | None]
+    expense_change_pct: list[float | None]
+    categories: list[CategorySeries]
+    top_categories: list[str]
+
+class MonthlyTotalsOut(BaseModel):
+    income: Money
+    expense: Money
+    net: Money
+
 class ReminderIn(BaseModel):
     name: str
     due_date: date
-    amount: Decimal = Field(ge=0)
+    amount: Money = Field(ge=0)
     payee: str = ""
     notes: str = ""
 
@@ -33,21 +102,61 @@ class ReminderOut(ReminderIn):
     id: int
     class Config: from_attributes = True
 
+class RecurringRuleIn(BaseModel):
+    """A repeating transaction (kind, amount > 0) or reminder (name) on an RRULE-like schedule."""
+    target: str = Field(pattern="^(transaction|reminder)$")
+    rrule: str
+    dtstart: date
+    lead_days: int = Field(0, ge=0, le=365)
+    name: str = ""
+    kind: str | None = Field(None, pattern="^(income|expense)$")
+    amount: Money = Field(ge=0)
+    category: str = "general"
+    payee: str = ""
+    note: str = ""
+
+class RecurringRuleOut(RecurringRuleIn):
+    id: int
+    occurrences: int = 0
+    next_run: date | None = None
+    class Config: from_attributes = True
+
+class MaterializeResult(BaseModel):
+    rules: int
+    transactions: int
+    reminders: int
+    chunks: int
+
 class GoalIn(BaseModel):
     name: str
-    target_amount: Decimal = Field(gt=0)
+    target_amount: Money = Field(gt=0)
     target_date: date | None = None
     category: str = "savings"
     description: str = ""
 
 class GoalOut(GoalIn):
     id: int
-    current_amount: Decimal = 0.0
+    current_amount: Money = Decimal("0.00")
     is_completed: str = "false"
     progress_percentage: float = 0.0
     created_at: datetime
     class Config: from_attributes = True
 
+class ContributionIn(BaseModel):
+    goal_id: int
+    amount: Money = Field(gt=0)
+
+class ContributionBatch(BaseModel):
+    """Contributions applied together: all of them or none."""
+    contributions: list[ContributionIn] = Field(min_length=1, max_length=1000)
+
+class ContributionOut(BaseModel):
+    id: int
+    goal_id: int
+    amount: Money
+    created_at: datetime
+    class Config: from_attributes = True
+
 class UserCreate(BaseModel):
     email: str = Field(..., description="User's email address")
     password: str = Field(..., min_length=8, description="User's password")
@@ -65,3 +174,15 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     email: Optional[str] = None
+    user_id: Optional[int] = None
+    is_active: Optional[str] = None
+    token_version: Optional[int] = None
+    issued_at: Optional[int] = None
+
+class CurrentUser(BaseModel):
+    """The authenticated user as resolved from a token (cached, not ORM-bound)."""
+    id: int
+    email: str
+    is_active: str = "true"
+    token_version: int = 0
+    class Config: frozen = True
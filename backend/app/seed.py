@@ -1,14 +1,20 @@
 # ...existing code...
 import sys
+import argparse
 import pathlib
+import random
+from datetime import date, datetime, timedelta
 
 # Ensure backend folder is on sys.path so absolute imports like "app.db" work
 ROOT = pathlib.Path(__file__).resolve().parents[1]  # backend/
 sys.path.insert(0, str(ROOT))
 
-from app.db import Base, engine, SessionLocal
-from app.models import Transaction, User
-from app.routers.auth import get_password_hash
+from app.db import Base, engine, SessionLocal  # noqa: E402
+from sqlalchemy import insert, select  # noqa: E402
+
+from app.models import Budget, Goal, GoalContribution, Reminder, Transaction, User  # noqa: E402
+from app.routers.auth import get_password_hash  # noqa: E402
+from app.services import rollup_service  # noqa: E402
 
 def seed():
     print("Starting seed process...")
@@ -48,9 +54,113 @@ def seed():
         ])
     db.commit()
     print("Committed to database.")
+    rollup_service.rebuild_rollups(db)
+    print("Rebuilt monthly rollups.")
     db.close()
     print("Seeded successfully.")
 
+EXPENSE_CATEGORIES = ["groceries", "rent", "utilities", "transport", "dining", "health",
+                      "entertainment", "shopping", "travel", "insurance"]
+INCOME_CATEGORIES = ["salary", "freelance", "interest"]
+INSERT_BATCH_SIZE = 10_000
+
+def _insert_batched(db, table, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == INSERT_BATCH_SIZE:
+            db.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        db.execute(table.insert(), batch)
+
+def generate(db, users=10, transactions=1000, budgets=12, reminders=10, goals=3,
+             months=12, password="bench123", seed=0, email_domain="bench.example.com"):
+    """
+    Add a synthetic data set: users x (transactions, budgets, reminders, goals).
+
+    Users are named user<i>@<email_domain> and share one password (hashed once).
+    Transactions are spread over the last `months` months in time order, roughly
+    one in six is income. Rows go in through executemany, then the rollups are
+    rebuilt. Returns the list of (user_id, email) created.
+    """
+    rng = random.Random(seed)
+    hashed_pw = get_password_hash(password)
+    emails = [f"user{i}@{email_domain}" for i in range(users)]
+    db.execute(User.__table__.insert(), [{"email": e, "hashed_password": hashed_pw} for e in emails])
+    created = db.query(User.id, User.email).filter(User.email.in_(emails)).order_by(User.id).all()
+
+    now = datetime.utcnow().replace(microsecond=0)
+    start = now - timedelta(days=30 * months)
+    span = int((now - start).total_seconds())
+    first_month = start.year * 12 + start.month - 1
+    month_keys = [f"{m // 12:04d}-{m % 12 + 1:02d}" for m in range(first_month, first_month + months + 1)]
+
+    def transaction_rows(user_id):
+        for offset in sorted(rng.randrange(span) for _ in range(transactions)):
+            income = rng.random() < 1 / 6
+            yield {
+                "user_id": user_id,
+                "kind": "income" if income else "expense",
+                "amount": round(rng.uniform(500, 5000) if income else rng.uniform(1, 300), 2),
+                "category": rng.choice(INCOME_CATEGORIES if income else EXPENSE_CATEGORIES),
+                "note": "",
+                "created_at": start + timedelta(seconds=offset),
+            }
+
+    for user_id, _ in created:
+        _insert_batched(db, Transaction.__table__, transaction_rows(user_id))
+        pairs = [(m, c) for m in month_keys for c in EXPENSE_CATEGORIES]
+        _insert_batched(db, Budget.__table__, (
+            {"user_id": user_id, "month": m, "category": c, "cap_amount": rng.randint(2, 20) * 100}
+            for m, c in rng.sample(pairs, min(budgets, len(pairs)))
+        ))
+        _insert_batched(db, Reminder.__table__, (
+            {"user_id": user_id, "name": f"bill {i}", "amount": round(rng.uniform(10, 500), 2),
+             "due_date": date.today() + timedelta(days=rng.randint(-30, 90)), "payee": "", "notes": ""}
+            for i in range(reminders)
+        ))
+        _insert_batched(db, Goal.__table__, (
+            {"user_id": user_id, "name": f"goal {i}", "target_amount": rng.randint(10, 100) * 100,
+             "current_amount": rng.randint(0, 9) * 100, "category": "savings", "description": "",
+             "is_completed": "false", "created_at": now}
+            for i in range(goals)
+        ))
+    # Seeded balances are each goal's opening contribution
+    db.execute(insert(GoalContribution).from_select(
+        ["goal_id", "user_id", "amount", "created_at"],
+        select(Goal.id, Goal.user_id, Goal.current_amount, Goal.created_at).where(
+            Goal.user_id.in_([user_id for user_id, _ in created]), Goal.current_amount > 0
+        ),
+    ))
+    db.commit()
+    rollup_service.rebuild_rollups(db)
+    return created
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed demo users, or a synthetic data set with --users.")
+    parser.add_argument("--users", type=int, help="generate this many synthetic users")
+    parser.add_argument("--transactions", type=int, default=1000, help="per user")
+    parser.add_argument("--budgets", type=int, default=12, help="per user")
+    parser.add_argument("--reminders", type=int, default=10, help="per user")
+    parser.add_argument("--goals", type=int, default=3, help="per user")
+    parser.add_argument("--months", type=int, default=12, help="history length")
+    parser.add_argument("--password", default="bench123")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.users is None:
+        seed()
+        return
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        created = generate(db, args.users, args.transactions, args.budgets, args.reminders,
+                           args.goals, args.months, args.password, args.seed)
+    finally:
+        db.close()
+    print(f"Generated {len(created)} users x {args.transactions} transactions, {args.budgets} budgets, "
+          f"{args.reminders} reminders, {args.goals} goals.")
+
 if __name__ == "__main__":
-    seed()
+    main()
 # ...existing code...
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""
+Cache of per-user computed aggregates: monthly totals and budget utilization.
+
+Entries are keyed per user and month and by the user's resource versions
+(version_service) of what they are computed from: transactions for totals,
+transactions and budgets for budgets. Every write bumps those versions in its
+own DB transaction, in whatever process it runs (another worker, the
+recurring job), so a reader that reads the versions first never finds an
+entry computed before a committed write. Superseded entries are never read
+again and age out of the backend.
+"""
+import os
+
+from ..cache import ResponseCache, make_backend
+
+# "lru" (in-process), "redis://host:6379/0" (pip install redis) or "memory-redis://"
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL", "lru")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "4096"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+
+response_cache = ResponseCache(
+    make_backend(RESPONSE_CACHE_URL, RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL),
+    enabled=RESPONSE_CACHE_SIZE > 0 and RESPONSE_CACHE_TTL > 0,
+)
+
+# The resources whose versions key the entries
+TOTALS_RESOURCES = ("transactions",)
+BUDGETS_RESOURCES = ("transactions", "budgets")
+
+def _version_tag(versions: dict, resources) -> str:
+    return ".".join(str(versions.get(resource, 0)) for resource in resources)
+
+def totals_key(user_id: int, month: str, versions: dict) -> str:
+    return f"totals:{user_id}:{month}:{_version_tag(versions, TOTALS_RESOURCES)}"
+
+def budgets_key(user_id: int, month: str, versions: dict) -> str:
+    return f"budgets:{user_id}:{month or 'all'}:{_version_tag(versions, BUDGETS_RESOURCES)}"
+
+def render_metrics() -> str:
+    """The cache's counters in Prometheus text format, for GET /metrics."""
+    lines = []
+    for name, value in response_cache.stats().items():
+        if value is None:
+            continue
+        metric = f"pfms_response_cache_{name}_total"
+        lines += [f"# HELP {metric} Aggregate cache {name}.", f"# TYPE {metric} counter",
+                  f"{metric} {value}"]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,98 @@
+import os
+from collections import defaultdict
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import and_, delete, or_, select
+from sqlalchemy.orm import Session
+
+from ..models import Budget, BudgetAlert, MonthlyRollup
+from ..money import cents, from_cents
+from ..schemas import BudgetAlertOut
+from ..serialization import row_dicts
+
+# Percentages of a budget's cap that raise an alert when its spending reaches them
+ALERT_THRESHOLDS = tuple(sorted({int(t) for t in os.getenv("ALERT_THRESHOLDS", "80,100").split(",") if t.strip()}))
+
+AlertKey = Tuple[int, str, str]  # (user_id, YYYY-MM, category)
+
+def crossed_thresholds(spent: int, cap: int):
+    """ALERT_THRESHOLDS that spent has reached, both in cents; a zero cap counts as reached by any spending."""
+    if spent <= 0:
+        return set()
+    return {t for t in ALERT_THRESHOLDS if spent * 100 >= cap * t}
+
+def evaluate_alerts(db: Session, keys: Iterable[AlertKey]) -> int:
+    """
+    Bring the alerts of the budgets for the given (user, month, category)
+    keys in line with their current spending: record thresholds newly
+    reached, drop those that spending fell back under (after a delete, or a
+    budget with a higher cap). Spending comes from the expense rollups, which
+    every transaction write keeps current, so this reads one row per budget
+    and never the transactions. Returns the number of alerts recorded. The
+    caller commits.
+    """
+    keys = set(keys)
+    if not keys or not ALERT_THRESHOLDS:
+        return 0
+    categories = defaultdict(set)
+    for user_id, month, category in keys:
+        categories[user_id, month].add(category)
+    budgets = db.execute(
+        select(Budget.id, Budget.user_id, Budget.month, Budget.category,
+               cents(Budget.cap_amount).label("cap"), cents(MonthlyRollup.total).label("spent"))
+        .outerjoin(MonthlyRollup, and_(
+            MonthlyRollup.user_id == Budget.user_id,
+            MonthlyRollup.month == Budget.month,
+            MonthlyRollup.kind == 'expense',
+            MonthlyRollup.category == Budget.category,
+        ))
+        # An OR of (user, month) terms, not a row-value IN, which SQLite answers with a scan
+        .where(or_(*(
+            and_(Budget.user_id == user_id, Budget.month == month, Budget.category.in_(names))
+            for (user_id, month), names in categories.items()
+        )))
+    ).all()
+    if not budgets:
+        return 0
+    existing = defaultdict(set)
+    for budget_id, threshold in db.execute(
+        select(BudgetAlert.budget_id, BudgetAlert.threshold)
+        .where(BudgetAlert.budget_id.in_([budget.id for budget in budgets]))
+    ):
+        existing[budget_id].add(threshold)
+
+    inserts, stale = [], defaultdict(set)
+    for budget in budgets:
+        crossed = crossed_thresholds(budget.spent or 0, budget.cap)
+        for threshold in sorted(crossed - existing[budget.id]):
+            inserts.append({
+                "user_id": budget.user_id, "budget_id": budget.id, "category": budget.category,
+                "month": budget.month, "threshold": threshold, "spent": from_cents(budget.spent),
+                "cap_amount": from_cents(budget.cap),
+            })
+        if existing[budget.id] - crossed:
+            stale[budget.id] = existing[budget.id] - crossed
+    if stale:
+        db.execute(delete(BudgetAlert).where(or_(*(
+            and_(BudgetAlert.budget_id == budget_id, BudgetAlert.threshold.in_(thresholds))
+            for budget_id, thresholds in stale.items()
+        ))))
+    if inserts:
+        db.execute(BudgetAlert.__table__.insert(), inserts)
+    return len(inserts)
+
+def budget_alerts_delete(budget_id: int):
+    # Run with the delete of the budget itself
+    return delete(BudgetAlert).where(BudgetAlert.budget_id == budget_id)
+
+def alerts_query(user_id: int, month: Optional[str] = None):
+    # Served by the (user_id, month, created_at) index
+    stmt = select(*(getattr(BudgetAlert, name) for name in BudgetAlertOut.model_fields)).where(
+        BudgetAlert.user_id == user_id
+    )
+    if month:
+        stmt = stmt.where(BudgetAlert.month == month)
+    return stmt.order_by(BudgetAlert.created_at.desc(), BudgetAlert.id.desc())
+
+def list_alert_rows(db: Session, user_id: int, month: Optional[str] = None):
+    return row_dicts(db.execute(alerts_query(user_id, month)))
@@ -0,0 +1,160 @@
+"""
+Spending trends and category breakdowns over an arbitrary date range.
+
+The matching transactions are read in one query as four plain columns (month
+number, is-expense flag, amount in cents, category), packed into NumPy arrays
+and aggregated with bincount, so the cost per row is a few array slots rather
+than an ORM object.
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import List, Optional
+
+import numpy as np
+from sqlalchemy import Integer, String, case, cast, func, select
+from sqlalchemy.orm import Session
+
+from ..models import Transaction
+from ..money import cents, from_cents
+
+ANALYTICS_BATCH_SIZE = 50_000
+MAX_ANALYTICS_MONTHS = 120
+DEFAULT_MONTHS = 12
+
+def month_number(column):
+    """
+    SQL expression for year * 12 + (month - 1) of a datetime column, taken
+    from its ISO text the same way as rollup_service.month_key.
+    """
+    text = cast(column, String)
+    return (cast(func.substr(text, 1, 4), Integer) * 12
+            + cast(func.substr(text, 6, 2), Integer) - 1)
+
+def default_range(today: Optional[date] = None):
+    """The last DEFAULT_MONTHS calendar months, including the current one."""
+    today = today or datetime.utcnow().date()
+    first = today.year * 12 + today.month - 1 - (DEFAULT_MONTHS - 1)
+    return date(first // 12, first % 12 + 1, 1), today
+
+def analytics_query(user_id: int, from_date: date, to_date: date):
+    end = datetime.combine(to_date + timedelta(days=1), datetime.min.time())
+    return select(
+        month_number(Transaction.created_at),
+        case((Transaction.kind == "expense", 1), else_=0),
+        cents(Transaction.amount),
+        Transaction.category,
+    ).where(
+        Transaction.user_id == user_id,
+        Transaction.created_at >= datetime.combine(from_date, datetime.min.time()),
+        Transaction.created_at < end,
+    )
+
+def load_columns(db: Session, stmt, batch_size: int = ANALYTICS_BATCH_SIZE):
+    """
+    Run stmt and return (month, is_expense, cents, category_code, categories)
+    as NumPy arrays plus the category names the codes index into.
+    """
+    codes = {}
+    parts = {"month": [], "expense": [], "cents": [], "category": []}
+    # Core execution on the session's connection: plain tuples, no ORM row
+    # wrapping. Passing the statement routes it as a read, to a replica.
+    result = db.connection(bind_arguments={"clause": stmt}).execute(
+        stmt.execution_options(yield_per=batch_size)
+    )
+    for chunk in result.partitions():
+        months, expense, cents, categories = zip(*chunk)
+        count = len(chunk)
+        parts["month"].append(np.fromiter(months, dtype=np.int32, count=count))
+        parts["expense"].append(np.fromiter(expense, dtype=np.bool_, count=count))
+        parts["cents"].append(np.fromiter(cents, dtype=np.int64, count=count))
+        parts["category"].append(np.fromiter(
+            (codes.setdefault(c, len(codes)) for c in categories), dtype=np.int32, count=count
+        ))
+    empty = {"month": np.int32, "expense": np.bool_, "cents": np.int64, "category": np.int32}
+    arrays = [
+        np.concatenate(parts[name]) if parts[name] else np.zeros(0, dtype=dtype)
+        for name, dtype in empty.items()
+    ]
+    return (*arrays, list(codes))
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over up to window values (fewer at the start of the series)."""
+    sums = np.cumsum(values)
+    sums[window:] = sums[window:] - sums[:-window]
+    return sums / np.minimum(np.arange(1, len(values) + 1), window)
+
+def _money(values: np.ndarray) -> List[Decimal]:
+    # Cents to amounts; averages are rounded to the nearest cent first
+    return [from_cents(int(v)) for v in np.rint(values)]
+
+def _optional_money(values: np.ndarray) -> List[Optional[Decimal]]:
+    return [None if np.isnan(v) else from_cents(int(v)) for v in np.rint(values)]
+
+def _optional(values: np.ndarray) -> List[Optional[float]]:
+    return [None if np.isnan(v) else round(float(v), 2) for v in values]
+
+def get_analytics(db: Session, user_id: int, from_date: Optional[date] = None,
+                  to_date: Optional[date] = None, window: int = 3, top: int = 5) -> dict:
+    """
+    Per-month income, expense and net with trailing averages, month-over-month
+    expense changes, and per-category expense series ranked by total.
+    """
+    default_from, default_to = default_range()
+    from_date = from_date or (default_from if to_date is None else date(to_date.year, 1, 1))
+    to_date = to_date or default_to
+    if from_date > to_date:
+        raise ValueError("from_date must be on or before to")
+    if window < 1:
+        raise ValueError("Window must be at least 1 month")
+    if top < 0:
+        raise ValueError("Top must not be negative")
+    first = from_date.year * 12 + from_date.month - 1
+    n_months = to_date.year * 12 + to_date.month - first
+    if n_months > MAX_ANALYTICS_MONTHS:
+        raise ValueError(f"Range must cover at most {MAX_ANALYTICS_MONTHS} months")
+
+    month, is_expense, cents, category, names = load_columns(
+        db, analytics_query(user_id, from_date, to_date)
+    )
+    index = month - first
+    weights = cents.astype(np.float64)  # exact: cents stay far below 2**53
+    expense = np.bincount(index[is_expense], weights[is_expense], minlength=n_months)
+    income = np.bincount(index[~is_expense], weights[~is_expense], minlength=n_months)
+    net = income - expense
+
+    change = np.full(n_months, np.nan)
+    change[1:] = np.diff(expense)
+    change_pct = np.full(n_months, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change_pct[1:] = np.where(expense[:-1] > 0, change[1:] / expense[:-1] * 100, np.nan)
+
+    by_category = np.bincount(
+        category[is_expense] * n_months + index[is_expense], weights[is_expense],
+        minlength=len(names) * n_months,
+    ).reshape(len(names), n_months)
+    totals = by_category.sum(axis=1)
+    spent = expense.sum()
+    # Highest total first, ties broken by name for a stable order
+    order = sorted((i for i in range(len(names)) if totals[i] > 0),
+                   key=lambda i: (-totals[i], names[i]))
+
+    return {
+        "months": [f"{m // 12:04d}-{m % 12 + 1:02d}" for m in range(first, first + n_months)],
+        "income": _money(income),
+        "expense": _money(expense),
+        "net": _money(net),
+        "expense_rolling_avg": _money(rolling_mean(expense, window)),
+        "net_rolling_avg": _money(rolling_mean(net, window)),
+        "expense_change": _optional_money(change),
+        "expense_change_pct": _optional(change_pct),
+        "categories": [
+            {
+                "category": names[i],
+                "expense": _money(by_category[i]),
+                "total": from_cents(int(totals[i])),
+                "share": round(float(totals[i] / spent * 100), 2),
+            }
+            for i in order
+        ],
+        "top_categories": [names[i] for i in order[:top]],
+    }
@@ -0,0 +1,51 @@
+"""
+AsyncSession equivalents of budget_service, used when DB_ASYNC is on.
+"""
+from .. import alerts
+from ..serialization import row_dicts
+from . import aggregate_cache, alert_service, async_version_service
+from .budget_service import (
+    existing_budget_query, insert_budget_query, owned_budget_query, utilization_query, utilization_row,
+    validate_budget, validate_month,
+)
+
+async def create_budget(db, budget_data, user_id):
+    validate_budget(budget_data)
+    existing = (await db.execute(
+        existing_budget_query(user_id, budget_data.category, budget_data.month)
+    )).scalars().first()
+    if existing:
+        raise ValueError("Budget for this category and month already exists")
+
+    values = {"user_id": user_id, **budget_data.model_dump()}
+    budget_id = (await db.execute(insert_budget_query(), values)).scalar_one()
+    await async_version_service.bump(db, user_id, "budgets")
+    await db.commit()
+    await alerts.publish_async(db, [(user_id, budget_data.month, budget_data.category)])
+    return (await get_budget_utilization(db, user_id, budget_data.month, budget_id=budget_id))[0]
+
+async def get_budget_utilization(db, user_id, month=None, budget_id=None):
+    rows = (await db.execute(utilization_query(user_id, month, budget_id))).all()
+    return [utilization_row(*row) for row in rows]
+
+async def get_alerts(db, user_id, month=None):
+    validate_month(month)
+    return row_dicts(await db.execute(alert_service.alerts_query(user_id, month)))
+
+async def get_budgets(db, user_id, month=None):
+    validate_month(month)
+    versions = await async_version_service.current_versions(db, user_id, aggregate_cache.BUDGETS_RESOURCES)
+    return await aggregate_cache.response_cache.get_or_compute_async(
+        aggregate_cache.budgets_key(user_id, month, versions),
+        lambda: get_budget_utilization(db, user_id, month),
+    )
+
+async def delete_budget(db, budget_id, user_id):
+    budget = (await db.execute(owned_budget_query(budget_id, user_id))).scalars().first()
+    if not budget:
+        raise ValueError("Budget not found or does not belong to user")
+    await db.execute(alert_service.budget_alerts_delete(budget.id))
+    await db.delete(budget)
+    await async_version_service.bump(db, user_id, "budgets")
+    await db.commit()
+    return {"message": "Budget deleted successfully"}
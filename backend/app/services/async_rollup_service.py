@@ -0,0 +1,15 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from decimal import Decimal
+from .rollup_service import delta_statements
+
+async def apply_delta(db: AsyncSession, user_id: int, created_at: datetime, kind: str,
+                      category: str, amount: Decimal, count: int) -> None:
+    """
+    Async equivalent of rollup_service.apply_delta.
+    """
+    increment, create, cleanup = delta_statements(user_id, created_at, kind, category, amount, count)
+    if (await db.execute(increment)).rowcount == 0:
+        await db.execute(create)
+    elif count < 0:
+        await db.execute(cleanup)
@@ -0,0 +1,126 @@
+"""
+AsyncSession equivalents of transaction_service, used when DB_ASYNC is on.
+
+Queries and validation are shared with the sync service; only execution differs.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import alerts
+from ..schemas import SearchResult, TxIn, TxOut
+from ..serialization import row_dicts
+from . import aggregate_cache, async_rollup_service, async_version_service
+from .search_service import search_result, search_statements
+from .transaction_service import (
+    STREAM_BATCH_SIZE, filtered_query, insert_query, monthly_totals_query,
+    owned_transaction_query, page_query, paginate, paginate_rows, rows_query, totals_from_sums,
+    transaction_values,
+)
+from datetime import date, datetime
+from typing import AsyncIterator, List, Optional, Tuple
+
+async def create_transaction(db: AsyncSession, tx_data: TxIn, user_id: int) -> TxOut:
+    """
+    Create a new transaction with validation.
+    """
+    values = transaction_values(tx_data, user_id)
+    row = (await db.execute(insert_query(), values)).one()
+    await async_rollup_service.apply_delta(
+        db, user_id, values["created_at"], values["kind"], values["category"], values["amount"], 1
+    )
+    await async_version_service.bump(db, user_id, "transactions")
+    await db.commit()
+    await alerts.publish_async(db, alerts.expense_keys([values]))
+    return TxOut.model_validate(row._asdict())
+
+async def list_transactions(
+    db: AsyncSession,
+    user_id: int,
+    kind: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    category: Optional[str] = None,
+) -> Tuple[List[TxOut], Optional[str]]:
+    """
+    List transactions newest first, optionally filtered and keyset-paginated.
+    """
+    stmt = page_query(user_id, kind, limit, cursor, from_date, to_date, category)
+    return paginate((await db.execute(stmt)).scalars().all(), limit)
+
+async def list_transaction_rows(
+    db: AsyncSession,
+    user_id: int,
+    kind: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    category: Optional[str] = None,
+) -> Tuple[list, Optional[str]]:
+    """
+    list_transactions as plain column rows, for serialization.json_list.
+    """
+    stmt = rows_query(page_query(user_id, kind, limit, cursor, from_date, to_date, category))
+    return paginate_rows(row_dicts(await db.execute(stmt)), limit)
+
+def stream_transactions(
+    db: AsyncSession,
+    user_id: int,
+    kind: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    category: Optional[str] = None,
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> AsyncIterator[TxOut]:
+    """
+    Yield matching transactions from a server-side cursor. Filters are
+    validated eagerly, as in the sync service.
+    """
+    stmt = filtered_query(user_id, kind, category, from_date, to_date)
+
+    async def _rows() -> AsyncIterator[TxOut]:
+        result = await db.stream(stmt.execution_options(yield_per=batch_size))
+        async for tx in result.scalars():
+            yield TxOut.model_validate(tx)
+
+    return _rows()
+
+async def get_monthly_totals(db: AsyncSession, user_id: int) -> dict:
+    """
+    Get totals for current month: income, expense, net.
+    """
+    current_month = datetime.utcnow().strftime("%Y-%m")
+    versions = await async_version_service.current_versions(db, user_id, aggregate_cache.TOTALS_RESOURCES)
+
+    async def compute():
+        sums = dict((await db.execute(monthly_totals_query(user_id, current_month))).all())
+        return totals_from_sums(sums)
+
+    return await aggregate_cache.response_cache.get_or_compute_async(
+        aggregate_cache.totals_key(user_id, current_month, versions), compute
+    )
+
+async def delete_transaction(db: AsyncSession, transaction_id: int, user_id: int) -> dict:
+    """
+    Delete a transaction by ID, ensuring it belongs to the user.
+    """
+    transaction = (await db.execute(owned_transaction_query(transaction_id, user_id))).scalars().first()
+    if not transaction:
+        raise ValueError("Transaction not found or does not belong to user")
+    await async_rollup_service.apply_delta(
+        db, user_id, transaction.created_at, transaction.kind, transaction.category,
+        -transaction.amount, -1
+    )
+    await async_version_service.bump(db, user_id, "transactions")
+    keys = alerts.expense_keys([{"user_id": user_id, "kind": transaction.kind,
+                                 "created_at": transaction.created_at, "category": transaction.category}])
+    await db.delete(transaction)
+    await db.commit()
+    await alerts.publish_async(db, keys)
+    return {"message": "Transaction deleted successfully"}
+
+async def search_transactions(db: AsyncSession, user_id: int, q: str, kind: Optional[str] = None,
+                              category: Optional[str] = None, month: Optional[str] = None,
+                              limit: int = 20, offset: int = 0) -> SearchResult:
+    page, facets = search_statements(user_id, q, kind, category, month, limit, offset)
+    return search_result(row_dicts(await db.execute(page)), (await db.execute(facets)).all())
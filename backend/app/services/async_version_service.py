@@ -0,0 +1,24 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Iterable
+from .version_service import bump_statements, make_etag, versions_query
+
+async def bump(db: AsyncSession, user_id: int, resource: str) -> None:
+    """
+    Async equivalent of version_service.bump.
+    """
+    increment, create = bump_statements(user_id, resource)
+    if (await db.execute(increment)).rowcount == 0:
+        await db.execute(create)
+
+async def current_versions(db: AsyncSession, user_id: int, resources: Iterable[str]) -> dict:
+    """
+    Async equivalent of version_service.current_versions.
+    """
+    return dict((await db.execute(versions_query(user_id, resources))).all())
+
+async def current_etag(db: AsyncSession, user_id: int, resources: Iterable[str], variant: str = "") -> str:
+    """
+    Async equivalent of version_service.current_etag.
+    """
+    resources = tuple(resources)
+    return make_etag(user_id, await current_versions(db, user_id, resources), resources, variant)
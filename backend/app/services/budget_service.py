@@ -1,34 +1,61 @@
-from sqlalchemy import func
+from sqlalchemy import and_, func, select
 from sqlalchemy.exc import IntegrityError
-from ..models import Budget, Transaction
+from ..models import Budget, MonthlyRollup, Transaction
+from .. import alerts, group_commit
+from ..money import cents, from_cents
+from . import aggregate_cache, alert_service, version_service
 import re
 
-def create_budget(db, budget_data, user_id):
+def validate_budget(budget_data):
     # Validate month format
     if not re.match(r'^\d{4}-\d{2}$', budget_data.month):
         raise ValueError("Month must be in YYYY-MM format")
     if budget_data.cap_amount < 0:
         raise ValueError("Cap amount must be greater than or equal to 0")
 
-    # Check for unique (user_id, category, month)
-    existing = db.query(Budget).filter(
+def existing_budget_query(user_id, category, month):
+    # Enforces the unique (user_id, category, month) rule
+    return select(Budget).where(
         Budget.user_id == user_id,
-        Budget.category == budget_data.category,
-        Budget.month == budget_data.month
-    ).first()
-    if existing:
-        raise ValueError("Budget for this category and month already exists")
-
-    # Create budget
-    budget = Budget(user_id=user_id, **budget_data.model_dump())
-    db.add(budget)
-    db.commit()
-    db.refresh(budget)
-    return budget
+        Budget.category == category,
+        Budget.month == month
+    )
+
+def owned_budget_query(budget_id, user_id):
+    return select(Budget).where(
+        Budget.id == budget_id,
+        Budget.user_id == user_id
+    )
+
+def insert_budget_query():
+    # Returns the new budgets' ids, so no refresh() is needed after the commit
+    return Budget.__table__.insert().returning(Budget.__table__.c.id, sort_by_parameter_order=True)
+
+def insert_budgets(db, rows):
+    # Insert budgets unless the user already has one for the category and
+    # month, here or earlier in rows; returns their ids. The caller commits.
+    seen = set()
+    for row in rows:
+        key = (row["user_id"], row["category"], row["month"])
+        if key in seen or db.execute(existing_budget_query(*key)).first():
+            raise ValueError("Budget for this category and month already exists")
+        seen.add(key)
+    conn = db.connection()
+    budget_ids = conn.execute(insert_budget_query(), rows).scalars().all()
+    for user_id in {row["user_id"] for row in rows}:
+        version_service.bump(conn, user_id, "budgets")
+    return budget_ids
+
+def create_budget(db, budget_data, user_id):
+    validate_budget(budget_data)
+    # The existence check runs with the insert, in a group commit
+    budget_id = group_commit.run(db, insert_budgets, {"user_id": user_id, **budget_data.model_dump()})
+    # The month may already have spending past the new cap's thresholds
+    alerts.publish(db, [(user_id, budget_data.month, budget_data.category)])
+    return get_budget_utilization(db, user_id, budget_data.month, budget_id=budget_id)[0]
 
-def compute_utilization(db, category, month):
-    # Sum of expenses for category in month
-    # Month format: YYYY-MM
+def month_bounds(month):
+    # Month format: YYYY-MM -> (first day of month, first day of next month)
     year, month_num = month.split('-')
     start_date = f"{year}-{month_num}-01"
     if month_num == '12':
@@ -37,37 +64,86 @@ def compute_utilization(db, category, month):
     else:
         end_month = str(int(month_num) + 1).zfill(2)
         end_date = f"{year}-{end_month}-01"
+    return start_date, end_date
 
-    total_expense = db.query(func.sum(Transaction.amount)).filter(
+def compute_utilization(db, user_id, category, month):
+    # Sum of the user's expenses for category in month, added up as integer cents
+    start_date, end_date = month_bounds(month)
+    total_cents = db.query(func.sum(cents(Transaction.amount))).filter(
+        Transaction.user_id == user_id,
         Transaction.kind == 'expense',
         Transaction.category == category,
         Transaction.created_at >= start_date,
         Transaction.created_at < end_date
     ).scalar() or 0
 
-    return float(total_expense)
+    return from_cents(total_cents)
 
-def get_budgets(db, user_id, month=None):
-    query = db.query(Budget).filter(Budget.user_id == user_id)
+def utilization_row(budget, cap_cents, spent_cents):
+    # Differences and comparisons in exact cents; ratios are the only floats
+    spent_cents = spent_cents or 0
+    return {
+        "id": budget.id,
+        "category": budget.category,
+        "month": budget.month,
+        "cap_amount": budget.cap_amount,
+        "utilization": spent_cents / 100,
+        "spent": from_cents(spent_cents),
+        "remaining": from_cents(cap_cents - spent_cents),
+        "percentage": (spent_cents / cap_cents) * 100 if cap_cents > 0 else None,
+        "over_cap": spent_cents > cap_cents,
+    }
+
+def utilization_query(user_id, month=None, budget_id=None):
+    """
+    Budgets outer-joined to the user's expense rollups for the same
+    (month, category), so neither the statement count nor the rows read grow
+    with the number of transactions or budgets.
+    """
+    query = select(Budget, cents(Budget.cap_amount).label("cap_cents"), cents(MonthlyRollup.total).label("spent_cents")).outerjoin(
+        MonthlyRollup,
+        and_(
+            MonthlyRollup.user_id == Budget.user_id,
+            MonthlyRollup.month == Budget.month,
+            MonthlyRollup.kind == 'expense',
+            MonthlyRollup.category == Budget.category,
+        ),
+    ).where(Budget.user_id == user_id)
     if month:
-        if not re.match(r'^\d{4}-\d{2}$', month):
-            raise ValueError("Month must be in YYYY-MM format")
-        query = query.filter(Budget.month == month)
+        query = query.where(Budget.month == month)
+    if budget_id is not None:
+        query = query.where(Budget.id == budget_id)
+    return query.order_by(Budget.id)
+
+def get_budget_utilization(db, user_id, month=None, budget_id=None):
+    """
+    Spent-vs-cap for all of a user's budgets in a single query.
+    """
+    rows = db.execute(utilization_query(user_id, month, budget_id)).all()
+    return [utilization_row(*row) for row in rows]
+
+def validate_month(month):
+    if month and not re.match(r'^\d{4}-\d{2}$', month):
+        raise ValueError("Month must be in YYYY-MM format")
 
-    budgets = query.all()
-    # Add utilization to each budget
-    for budget in budgets:
-        budget.utilization = compute_utilization(db, budget.category, budget.month)
+def get_alerts(db, user_id, month=None):
+    validate_month(month)
+    return alert_service.list_alert_rows(db, user_id, month)
 
-    return budgets
+def get_budgets(db, user_id, month=None):
+    validate_month(month)
+    versions = version_service.current_versions(db, user_id, aggregate_cache.BUDGETS_RESOURCES)
+    return aggregate_cache.response_cache.get_or_compute(
+        aggregate_cache.budgets_key(user_id, month, versions),
+        lambda: get_budget_utilization(db, user_id, month),
+    )
 
 def delete_budget(db, budget_id, user_id):
-    budget = db.query(Budget).filter(
-        Budget.id == budget_id,
-        Budget.user_id == user_id
-    ).first()
+    budget = db.execute(owned_budget_query(budget_id, user_id)).scalars().first()
     if not budget:
         raise ValueError("Budget not found or does not belong to user")
+    db.execute(alert_service.budget_alerts_delete(budget.id))
     db.delete(budget)
+    version_service.bump(db, user_id, "budgets")
     db.commit()
     return {"message": "Budget deleted successfully"}
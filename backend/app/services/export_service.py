@@ -0,0 +1,175 @@
+"""
+Streaming exports of a user's transactions, reminders and goals.
+
+Rows are read from a server-side cursor in fixed-size batches and each batch
+is encoded and handed out as bytes before the next one is fetched, so the
+size of an export does not affect memory use.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import Goal, Reminder, Transaction
+from .transaction_service import filtered_query
+
+EXPORT_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# (column name, type) per exported resource; types drive Parquet schemas
+Columns = List[Tuple[str, str]]
+
+TRANSACTION_COLUMNS: Columns = [
+    ("id", "int"), ("kind", "str"), ("amount", "money"), ("category", "str"),
+    ("note", "str"), ("created_at", "datetime"),
+]
+REMINDER_COLUMNS: Columns = [
+    ("id", "int"), ("name", "str"), ("due_date", "date"), ("amount", "money"),
+    ("payee", "str"), ("notes", "str"),
+]
+GOAL_COLUMNS: Columns = [
+    ("id", "int"), ("name", "str"), ("target_amount", "money"), ("current_amount", "money"),
+    ("target_date", "date"), ("category", "str"), ("description", "str"),
+    ("is_completed", "str"), ("created_at", "datetime"),
+]
+
+def validate_format(fmt: str) -> str:
+    if fmt not in MEDIA_TYPES:
+        raise ValueError(f"Format must be one of: {', '.join(MEDIA_TYPES)}")
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("Parquet export requires pyarrow (pip install -e \".[export]\")")
+    return fmt
+
+def _columns_of(model, columns: Columns):
+    return [getattr(model, name) for name, _ in columns]
+
+def transaction_export_query(user_id: int, kind: Optional[str] = None,
+                             category: Optional[str] = None,
+                             from_date: Optional[date] = None, to_date: Optional[date] = None):
+    """Same filters and order as GET /transactions, selecting plain columns."""
+    stmt = filtered_query(user_id, kind, category, from_date, to_date)
+    return stmt.with_only_columns(*_columns_of(Transaction, TRANSACTION_COLUMNS))
+
+def reminder_export_query(user_id: int, from_date: Optional[date] = None,
+                          to_date: Optional[date] = None):
+    stmt = select(*_columns_of(Reminder, REMINDER_COLUMNS)).where(Reminder.user_id == user_id)
+    if from_date:
+        stmt = stmt.where(Reminder.due_date >= from_date)
+    if to_date:
+        stmt = stmt.where(Reminder.due_date <= to_date)
+    return stmt.order_by(Reminder.due_date, Reminder.id)
+
+def goal_export_query(user_id: int):
+    return select(*_columns_of(Goal, GOAL_COLUMNS)).where(
+        Goal.user_id == user_id
+    ).order_by(Goal.created_at.desc(), Goal.id.desc())
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def _encode_ndjson(batches, columns: Columns) -> Iterator[bytes]:
+    names = [name for name, _ in columns]
+    for batch in batches:
+        yield "".join(
+            json.dumps(dict(zip(names, row)), default=_json_default) + "\n" for row in batch
+        ).encode()
+
+def _encode_csv(batches, columns: Columns) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+    for batch in batches:
+        writer.writerows(
+            ["" if value is None else value.isoformat() if isinstance(value, (datetime, date))
+             else value for value in row]
+            for row in batch
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+class _ChunkSink:
+    """Write-only file object for pyarrow that hands out what was written so far."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+def _encode_parquet(batches, columns: Columns) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {
+        "int": pa.int64(), "str": pa.string(), "money": pa.decimal128(18, 2),
+        "datetime": pa.timestamp("us"), "date": pa.date32(),
+    }
+    schema = pa.schema([(name, types[kind]) for name, kind in columns])
+    sink = _ChunkSink()
+    # One row group per batch, flushed to the client as soon as it is written
+    with pq.ParquetWriter(sink, schema) as writer:
+        for batch in batches:
+            data = list(zip(*batch)) if batch else [[] for _ in columns]
+            writer.write_table(pa.table(
+                [pa.array(values, type=schema.field(i).type) for i, values in enumerate(data)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    yield sink.drain()
+
+ENCODERS = {"csv": _encode_csv, "ndjson": _encode_ndjson, "parquet": _encode_parquet}
+
+def _batches(db: Session, stmt, batch_size: int) -> Iterator[list]:
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        yield partition
+
+def stream_export(session_factory: Callable[[], Session], stmt, columns: Columns, fmt: str,
+                  batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Encode the rows of stmt as fmt, batch by batch. The export owns its
+    session (it outlives the request handler) and closes it when done.
+    """
+    db = session_factory()
+    try:
+        yield from ENCODERS[fmt](_batches(db, stmt, batch_size), columns)
+    finally:
+        db.close()
@@ -0,0 +1,118 @@
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import BigInteger, case, delete, literal, select, update
+from sqlalchemy.orm import Session
+
+from .. import group_commit
+from ..models import Goal, GoalContribution
+from ..money import cents, from_cents, to_cents
+from ..schemas import GoalIn, GoalOut
+from ..serialization import row_dicts
+from . import version_service
+
+def validate_amount(amount) -> Decimal:
+    """A contribution as an exact Decimal: positive, in whole cents."""
+    amount_cents = to_cents(amount)
+    if amount_cents <= 0:
+        raise ValueError("Contribution amount must be positive")
+    return from_cents(amount_cents)
+
+def insert_goals(db: Session, rows: List[dict]) -> List[dict]:
+    """
+    Insert goals, reading them back with RETURNING, as dicts with GoalOut's
+    fields. The caller commits.
+    """
+    conn = db.connection()
+    goals = _goal_dicts(conn.execute(
+        Goal.__table__.insert().returning(*_goal_columns(), sort_by_parameter_order=True), rows
+    ))
+    for user_id in {row["user_id"] for row in rows}:
+        version_service.bump(conn, user_id, "goals")
+    return goals
+
+def create_goal(db: Session, goal_data: GoalIn, user_id: int) -> dict:
+    return group_commit.run(db, insert_goals, {"user_id": user_id, **goal_data.model_dump()})
+
+def contribute(db: Session, user_id: int, contributions: Iterable[Tuple[int, Decimal]]) -> List[dict]:
+    """
+    Record contributions (goal_id, amount) in the ledger and add them to the
+    goals' balances, all in one DB transaction. Balances are incremented by a
+    single UPDATE per goal (current_amount = current_amount + :total), so
+    concurrent contributions never overwrite each other. Amounts must have
+    gone through validate_amount. Returns the updated goals, as dicts with
+    GoalOut's fields, in first-seen order.
+    """
+    totals = OrderedDict()
+    rows = []
+    for goal_id, amount in contributions:
+        totals[goal_id] = totals.get(goal_id, 0) + to_cents(amount)
+        rows.append({"goal_id": goal_id, "user_id": user_id, "amount": amount})
+    if not rows:
+        raise ValueError("No contributions given")
+    try:
+        for goal_id, total in totals.items():
+            # In cents, as stored
+            balance = cents(Goal.current_amount) + literal(total, BigInteger)
+            result = db.execute(
+                update(Goal)
+                .where(Goal.id == goal_id, Goal.user_id == user_id)
+                .values(
+                    current_amount=balance,
+                    is_completed=case((balance >= cents(Goal.target_amount), "true"),
+                                      else_=Goal.is_completed),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0:
+                raise ValueError(f"Goal {goal_id} not found")
+        db.execute(GoalContribution.__table__.insert(), rows)
+        version_service.bump(db, user_id, "goals")
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    goals = {goal["id"]: goal for goal in _goal_dicts(db.execute(
+        select(*_goal_columns()).where(Goal.id.in_(list(totals)))
+    ))}
+    return [goals[goal_id] for goal_id in totals]
+
+def progress_percentage(current_amount, target_amount) -> float:
+    return (float(current_amount) / float(target_amount)) * 100 if target_amount > 0 else 0
+
+def _goal_columns():
+    """The goals columns behind GoalOut; progress_percentage is computed."""
+    return [Goal.__table__.c[name] for name in GoalOut.model_fields if name != "progress_percentage"]
+
+def _goal_dicts(result) -> List[dict]:
+    goals = row_dicts(result)
+    for goal in goals:
+        goal["progress_percentage"] = progress_percentage(goal["current_amount"], goal["target_amount"])
+    return goals
+
+def list_goal_rows(db: Session, user_id: int) -> List[dict]:
+    """
+    A user's goals, newest first, as plain dicts with GoalOut's fields, for
+    serialization.json_list.
+    """
+    return _goal_dicts(db.execute(
+        select(*_goal_columns()).where(Goal.user_id == user_id).order_by(Goal.created_at.desc())
+    ))
+
+def list_contributions(db: Session, goal_id: int, user_id: int) -> List[GoalContribution]:
+    return db.execute(
+        select(GoalContribution)
+        .where(GoalContribution.goal_id == goal_id, GoalContribution.user_id == user_id)
+        .order_by(GoalContribution.created_at, GoalContribution.id)
+    ).scalars().all()
+
+def delete_goal(db: Session, goal_id: int, user_id: int) -> dict:
+    goal = db.query(Goal).filter(Goal.id == goal_id, Goal.user_id == user_id).first()
+    if not goal:
+        raise ValueError("Goal not found")
+    db.execute(delete(GoalContribution).where(GoalContribution.goal_id == goal_id))
+    db.delete(goal)
+    version_service.bump(db, user_id, "goals")
+    db.commit()
+    return {"message": "Goal deleted successfully"}
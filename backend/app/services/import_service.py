@@ -0,0 +1,271 @@
+"""
+Bulk transaction import from JSON arrays, CSV and OFX.
+
+Input is read from a binary file object and parsed as a stream, rows are
+validated in batches and inserted with executemany in chunks, all inside one
+DB transaction, so memory stays bounded by the chunk size rather than the
+size of the upload.
+"""
+import codecs
+import csv
+import json
+import re
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.orm import Session
+
+from .. import alerts
+from ..models import Transaction
+from ..money import to_cents
+from ..schemas import BulkImportResult, BulkRowError, TxImport
+from . import rollup_service, version_service
+
+FORMATS = ("json", "csv", "ofx")
+BATCH_SIZE = 1000
+READ_SIZE = 64 * 1024
+MAX_REPORTED_ERRORS = 1000
+MAX_JSON_ELEMENT = 64 * 1024
+
+_batch_adapter = TypeAdapter(list[TxImport])
+
+Row = Tuple[int, dict]
+
+def detect_format(requested: Optional[str], content_type: str = "", filename: str = "") -> str:
+    """
+    Pick the import format from an explicit value, the file extension or the
+    content type, in that order.
+    """
+    if requested:
+        if requested not in FORMATS:
+            raise ValueError(f"Format must be one of: {', '.join(FORMATS)}")
+        return requested
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if extension in FORMATS:
+        return extension
+    content_type = content_type.lower()
+    if "csv" in content_type:
+        return "csv"
+    if "ofx" in content_type:
+        return "ofx"
+    if "json" in content_type:
+        return "json"
+    raise ValueError("Could not detect import format; pass format=json|csv|ofx")
+
+def _text_chunks(fileobj: BinaryIO) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    while True:
+        chunk = fileobj.read(READ_SIZE)
+        if not chunk:
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+            return
+        yield decoder.decode(chunk)
+
+def parse_json(fileobj: BinaryIO) -> Iterator[Row]:
+    """
+    Yield the elements of a top-level JSON array one at a time, without
+    loading the whole document.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    started = False
+    row = 0
+    for chunk in _text_chunks(fileobj):
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        while True:
+            while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ",")):
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("JSON import must be an array of transactions")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Element is split across chunks (or malformed): read more
+                if len(buffer) - pos > MAX_JSON_ELEMENT:
+                    raise ValueError(f"Malformed JSON near element {row + 1}")
+                break
+            row += 1
+            pos = end
+            yield row, value if isinstance(value, dict) else {"_invalid": value}
+    raise ValueError("Malformed JSON array")
+
+def _signed_amount(row: dict) -> dict:
+    # Bank exports often carry a signed amount instead of a kind
+    amount = (row.get("amount") or "").strip()
+    if not row.get("kind") and amount:
+        row["kind"] = "expense" if amount.startswith("-") else "income"
+        row["amount"] = amount.lstrip("-+")
+    return row
+
+def _lines(chunks: Iterator[str]) -> Iterator[str]:
+    # Re-split text chunks into complete lines (newlines kept, as csv expects)
+    pending = ""
+    for chunk in chunks:
+        lines = (pending + chunk).splitlines(keepends=True)
+        pending = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        yield from lines
+    if pending:
+        yield pending
+
+def parse_csv(fileobj: BinaryIO) -> Iterator[Row]:
+    """
+    Yield CSV records with a header row of kind, amount, category, note and
+    created_at (or date). A signed amount may stand in for kind.
+    """
+    reader = csv.DictReader(_lines(_text_chunks(fileobj)))
+    for row, record in enumerate(reader, start=1):
+        record = {k.strip().lower(): (v or "").strip() for k, v in record.items() if k}
+        if "created_at" not in record and "date" in record:
+            record["created_at"] = record.pop("date")
+        yield row, _signed_amount({k: v for k, v in record.items() if v != ""})
+
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+def _ofx_date(value: str) -> str:
+    # YYYYMMDD[HHMMSS[.XXX]][[TZ]] -> ISO
+    digits = re.match(r"(\d{8})(\d{6})?", value)
+    if not digits:
+        return value
+    stamp = datetime.strptime(digits.group(1) + (digits.group(2) or "000000"), "%Y%m%d%H%M%S")
+    return stamp.isoformat()
+
+def parse_ofx(fileobj: BinaryIO) -> Iterator[Row]:
+    """
+    Yield <STMTTRN> records from an OFX (SGML or XML) statement. Negative
+    TRNAMT values are expenses, positive ones income.
+    """
+    row = 0
+    current = None
+    pending = ""
+
+    def consume(text):
+        nonlocal row, current
+        for match in _OFX_TAG.finditer(text):
+            closing, tag, value = match.group(1), match.group(2).upper(), match.group(3).strip()
+            if tag == "STMTTRN":
+                if closing and current is not None:
+                    row += 1
+                    yield row, _ofx_record(current)
+                    current = None
+                elif not closing:
+                    current = {}
+            elif current is not None and not closing and value:
+                current[tag] = value
+
+    for chunk in _text_chunks(fileobj):
+        text = pending + chunk
+        # The last tag may continue in the next chunk
+        cut = text.rfind("<")
+        text, pending = (text[:cut], text[cut:]) if cut >= 0 else (text, "")
+        yield from consume(text)
+    yield from consume(pending)
+
+def _ofx_record(fields: dict) -> dict:
+    record = {"amount": fields.get("TRNAMT", ""), "category": "general"}
+    note = " ".join(part for part in (fields.get("NAME"), fields.get("MEMO")) if part)
+    if note:
+        record["note"] = note
+    if "DTPOSTED" in fields:
+        record["created_at"] = _ofx_date(fields["DTPOSTED"])
+    return _signed_amount(record)
+
+PARSERS = {"json": parse_json, "csv": parse_csv, "ofx": parse_ofx}
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in error.errors()
+    )
+
+def _validate_batch(batch: list) -> Iterator[Tuple[int, Optional[TxImport], Optional[str]]]:
+    try:
+        for (row, _), tx in zip(batch, _batch_adapter.validate_python([r for _, r in batch])):
+            yield row, tx, None
+        return
+    except ValidationError:
+        pass
+    # Some row in the batch is invalid: validate one by one to report which
+    for row, record in batch:
+        try:
+            yield row, TxImport.model_validate(record), None
+        except ValidationError as e:
+            yield row, None, _validation_message(e)
+
+def _naive_utc(value: Optional[datetime], default: datetime) -> datetime:
+    if value is None:
+        return default
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def import_transactions(db: Session, user_id: int, fileobj: BinaryIO, fmt: str,
+                        batch_size: int = BATCH_SIZE) -> BulkImportResult:
+    """
+    Import every valid row and report the invalid ones. Valid rows are
+    inserted in chunks of batch_size and committed together with their
+    rollup deltas; a parse error aborts the whole import.
+    """
+    parser = PARSERS[fmt]
+    now = datetime.utcnow()
+    imported = failed = 0
+    errors = []
+    deltas = defaultdict(lambda: [0, 0])
+
+    def flush(batch):
+        nonlocal imported, failed
+        values = []
+        for row, tx, error in _validate_batch(batch):
+            if error is not None:
+                failed += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append(BulkRowError(row=row, error=error))
+                continue
+            created_at = _naive_utc(tx.created_at, now)
+            category = tx.category or "general"
+            values.append({
+                "user_id": user_id, "kind": tx.kind, "amount": tx.amount,
+                "category": category, "note": tx.note or "", "created_at": created_at,
+            })
+            delta = deltas[(user_id, created_at.strftime("%Y-%m"), tx.kind, category)]
+            delta[0] += to_cents(tx.amount)
+            delta[1] += 1
+        if values:
+            db.execute(Transaction.__table__.insert(), values)
+            imported += len(values)
+
+    try:
+        batch = []
+        for row, record in parser(fileobj):
+            batch.append((row, record))
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+        rollup_service.apply_deltas(db, deltas)
+        if imported:
+            version_service.bump(db, user_id, "transactions")
+        db.commit()
+    except csv.Error as e:
+        db.rollback()
+        raise ValueError(f"Malformed CSV: {e}")
+    except Exception:
+        db.rollback()
+        raise
+
+    alerts.publish(db, {(user_id, month, category) for user_id, month, kind, category in deltas
+                        if kind == "expense"})
+    return BulkImportResult(imported=imported, failed=failed, errors=errors)
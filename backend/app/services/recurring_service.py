@@ -0,0 +1,237 @@
+"""
+Recurring transactions and reminders.
+
+A rule repeats on an RRULE-like schedule (FREQ, INTERVAL, BYMONTHDAY, COUNT,
+UNTIL) from dtstart. The recurring job materializes the occurrences that have
+come due as ordinary Transaction and Reminder rows. Each rule keeps its own
+watermark: the number of occurrences already materialized and next_run, the
+day the next one is due. A run reads only rules whose next_run has passed
+(through the next_run index). It works in chunks of rules, and each chunk's rows
+are inserted with executemany and committed together with the rules'
+advanced watermarks. A rerun, or a second run racing the first, therefore
+never materializes an occurrence twice.
+"""
+import calendar
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import NamedTuple, Optional
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+
+from .. import alerts
+from ..models import RecurringRule, Reminder, Transaction
+from ..money import to_cents
+from ..schemas import MaterializeResult, RecurringRuleIn
+from . import rollup_service, version_service
+
+RECURRING_CHUNK_SIZE = 500
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+
+class Schedule(NamedTuple):
+    freq: str
+    interval: int = 1
+    by_month_day: Optional[int] = None  # 1..31, or -1 for the last day of the month
+    count: Optional[int] = None
+    until: Optional[date] = None
+
+def _positive_int(name: str, value: str) -> int:
+    if not value.isdigit() or int(value) < 1:
+        raise ValueError(f"{name} must be a positive integer")
+    return int(value)
+
+def parse_rrule(text: str) -> Schedule:
+    """
+    Parse an RRULE subset such as "FREQ=MONTHLY;BYMONTHDAY=-1;COUNT=12" or
+    "FREQ=WEEKLY;INTERVAL=2;UNTIL=20251231".
+    """
+    text = text.strip()
+    if text.upper().startswith("RRULE:"):
+        text = text[6:]
+    parts = {}
+    for part in filter(None, text.split(";")):
+        key, sep, value = part.partition("=")
+        key = key.strip().upper()
+        if not sep or key in parts:
+            raise ValueError(f"Invalid rrule part: {part}")
+        parts[key] = value.strip().upper()
+    unknown = set(parts) - {"FREQ", "INTERVAL", "BYMONTHDAY", "COUNT", "UNTIL"}
+    if unknown:
+        raise ValueError(f"Unsupported rrule parts: {', '.join(sorted(unknown))}")
+    if parts.get("FREQ") not in FREQUENCIES:
+        raise ValueError(f"FREQ must be one of: {', '.join(FREQUENCIES)}")
+    if "COUNT" in parts and "UNTIL" in parts:
+        raise ValueError("COUNT and UNTIL cannot be combined")
+
+    by_month_day = None
+    if "BYMONTHDAY" in parts:
+        if parts["FREQ"] not in ("MONTHLY", "YEARLY"):
+            raise ValueError("BYMONTHDAY needs FREQ=MONTHLY or FREQ=YEARLY")
+        value = parts["BYMONTHDAY"]
+        if value != "-1" and not (value.isdigit() and 1 <= int(value) <= 31):
+            raise ValueError("BYMONTHDAY must be 1..31 or -1")
+        by_month_day = int(value)
+    until = None
+    if "UNTIL" in parts:
+        try:
+            until = datetime.strptime(parts["UNTIL"].replace("-", "")[:8], "%Y%m%d").date()
+        except ValueError:
+            raise ValueError("UNTIL must be a date in YYYYMMDD format")
+    return Schedule(
+        freq=parts["FREQ"],
+        interval=_positive_int("INTERVAL", parts.get("INTERVAL", "1")),
+        by_month_day=by_month_day,
+        count=_positive_int("COUNT", parts["COUNT"]) if "COUNT" in parts else None,
+        until=until,
+    )
+
+def _nth(schedule: Schedule, dtstart: date, n: int) -> date:
+    if schedule.freq == "DAILY":
+        return dtstart + timedelta(days=n * schedule.interval)
+    if schedule.freq == "WEEKLY":
+        return dtstart + timedelta(weeks=n * schedule.interval)
+    months = n * schedule.interval * (12 if schedule.freq == "YEARLY" else 1)
+    year, month = divmod(dtstart.month - 1 + months, 12)
+    year, month = dtstart.year + year, month + 1
+    last = calendar.monthrange(year, month)[1]
+    day = schedule.by_month_day or dtstart.day
+    # Days past the end of a month (the 31st, or -1) fall on its last day
+    return date(year, month, last if day == -1 else min(day, last))
+
+def occurrence(schedule: Schedule, dtstart: date, n: int) -> Optional[date]:
+    """The n-th (0-based) occurrence, or None once COUNT or UNTIL has ended the schedule."""
+    if schedule.count is not None and n >= schedule.count:
+        return None
+    # A BYMONTHDAY before dtstart's day starts with the following period
+    skip = 1 if _nth(schedule, dtstart, 0) < dtstart else 0
+    day = _nth(schedule, dtstart, n + skip)
+    if schedule.until is not None and day > schedule.until:
+        return None
+    return day
+
+def _lead(rule) -> timedelta:
+    # Reminders are created lead_days early; transactions only on their own date,
+    # so no future-dated transaction reaches balances and rollups
+    return timedelta(days=rule.lead_days or 0) if rule.target == "reminder" else timedelta(0)
+
+def _next_run(schedule: Schedule, rule, n: int) -> Optional[date]:
+    day = occurrence(schedule, rule.dtstart, n)
+    return None if day is None else day - _lead(rule)
+
+def create_rule(db: Session, rule_data: RecurringRuleIn, user_id: int) -> RecurringRule:
+    schedule = parse_rrule(rule_data.rrule)
+    if rule_data.target == "transaction":
+        if rule_data.kind is None:
+            raise ValueError("Recurring transactions need a kind")
+        if rule_data.amount <= 0:
+            raise ValueError("Recurring transactions need an amount greater than 0")
+        if rule_data.lead_days:
+            raise ValueError("Recurring transactions cannot be created early (lead_days)")
+    elif not rule_data.name:
+        raise ValueError("Recurring reminders need a name")
+    rule = RecurringRule(user_id=user_id, **rule_data.model_dump())
+    rule.occurrences = 0
+    rule.next_run = _next_run(schedule, rule, 0)
+    db.add(rule)
+    db.commit()
+    db.refresh(rule)
+    return rule
+
+def list_rules(db: Session, user_id: int):
+    return db.query(RecurringRule).filter(RecurringRule.user_id == user_id).order_by(RecurringRule.id).all()
+
+def delete_rule(db: Session, rule_id: int, user_id: int) -> dict:
+    """Stop a rule. Rows it has already materialized are kept."""
+    rule = db.query(RecurringRule).filter(RecurringRule.id == rule_id, RecurringRule.user_id == user_id).first()
+    if not rule:
+        raise ValueError("Recurring rule not found")
+    db.delete(rule)
+    db.commit()
+    return {"message": "Recurring rule deleted successfully"}
+
+def due_rules_query(as_of: date, limit: int):
+    return select(RecurringRule).where(
+        RecurringRule.next_run <= as_of
+    ).order_by(RecurringRule.next_run, RecurringRule.id).limit(limit)
+
+_advance = RecurringRule.__table__.update().where(
+    RecurringRule.id == bindparam("rule_id"),
+    RecurringRule.occurrences == bindparam("seen"),
+).values(occurrences=bindparam("new_occurrences"), next_run=bindparam("new_next_run"))
+
+def _materialize_chunk(db: Session, rules, as_of: date, batch_size: int):
+    transactions, reminders, advances = [], [], []
+    for rule in rules:
+        schedule = parse_rrule(rule.rrule)
+        n = rule.occurrences
+        while True:
+            day = occurrence(schedule, rule.dtstart, n)
+            if day is None or day - _lead(rule) > as_of:
+                break
+            if rule.target == "transaction":
+                transactions.append({
+                    "user_id": rule.user_id, "kind": rule.kind, "amount": rule.amount,
+                    "category": rule.category or "general", "note": rule.note or "",
+                    "created_at": datetime.combine(day, datetime.min.time()),
+                })
+            else:
+                reminders.append({
+                    "user_id": rule.user_id, "name": rule.name, "due_date": day,
+                    "amount": rule.amount, "payee": rule.payee or "", "notes": rule.note or "",
+                })
+            n += 1
+        advances.append({"rule_id": rule.id, "seen": rule.occurrences, "new_occurrences": n,
+                         "new_next_run": _next_run(schedule, rule, n)})
+
+    # Writes go through the Core connection: ORM-enabled statements would scan
+    # the chunk's rules in the identity map each time
+    conn = db.connection()
+    # Claim the rules first: if another run advanced any of them since they
+    # were read, the chunk is abandoned and re-read
+    claimed = conn.execute(_advance, advances).rowcount
+    if conn.dialect.supports_sane_multi_rowcount and claimed != len(advances):
+        db.rollback()
+        return None
+
+    deltas = defaultdict(lambda: [0, 0])
+    for start in range(0, len(transactions), batch_size):
+        conn.execute(Transaction.__table__.insert(), transactions[start:start + batch_size])
+    for row in transactions:
+        delta = deltas[(row["user_id"], row["created_at"].strftime("%Y-%m"), row["kind"], row["category"])]
+        delta[0] += to_cents(row["amount"])
+        delta[1] += 1
+    rollup_service.apply_deltas(conn, deltas)
+
+    # The job runs in its own process: the server's reminder scheduler picks
+    # these up through the reminders versions bumped below
+    for start in range(0, len(reminders), batch_size):
+        conn.execute(Reminder.__table__.insert(), reminders[start:start + batch_size])
+
+    for user_id in {row["user_id"] for row in transactions}:
+        version_service.bump(conn, user_id, "transactions")
+    for user_id in {row["user_id"] for row in reminders}:
+        version_service.bump(conn, user_id, "reminders")
+    db.commit()
+
+    alerts.publish(db, {(user_id, month, category) for user_id, month, kind, category in deltas if kind == "expense"})
+    return len(transactions), len(reminders)
+
+def materialize_due(db: Session, as_of: Optional[date] = None,
+                    chunk_size: int = RECURRING_CHUNK_SIZE) -> MaterializeResult:
+    """
+    Create every transaction and reminder whose rule has come due by as_of
+    (default today), chunk_size rules per DB transaction.
+    """
+    as_of = as_of or datetime.utcnow().date()
+    result = MaterializeResult(rules=0, transactions=0, reminders=0, chunks=0)
+    while True:
+        rules = db.execute(due_rules_query(as_of, chunk_size)).scalars().all()
+        if not rules:
+            return result
+        counts = _materialize_chunk(db, rules, as_of, chunk_size)
+        if counts is None:
+            continue
+        result.rules += len(rules)
+        result.transactions += counts[0]
+        result.reminders += counts[1]
+        result.chunks += 1
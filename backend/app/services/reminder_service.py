@@ -1,10 +1,157 @@
-# Reminder service stubs
-# TODO: Implement business logic for reminders
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
 
-def create_reminder(db, reminder_data):
-    # Stub: Create reminder logic
-    pass
+from sqlalchemy import func, or_, select
+from sqlalchemy.exc import IntegrityError
 
-def list_reminders(db, from_date=None, to_date=None):
-    # Stub: Retrieve reminders within date range
-    pass
+from .. import group_commit
+from ..models import Reminder, ResourceVersion, SchedulerLease
+from ..scheduler import REMINDER_SCHEDULER_LEASE_SECONDS, REMINDER_SCHEDULER_LOOKBACK_SECONDS, scheduler
+from ..schemas import ReminderOut
+from ..serialization import row_dicts
+from . import version_service
+
+SCHEDULER_LOAD_BATCH_SIZE = 10_000
+# Users whose reminders one refresh query re-reads
+SCHEDULER_REFRESH_BATCH_SIZE = 500
+SCHEDULER_LEASE = "reminders"
+# This process, as a lease holder
+SCHEDULER_HOLDER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def insert_reminders(db, rows):
+    # Insert reminders and bump their users' versions, reading the rows back
+    # with RETURNING instead of a refresh. The caller commits.
+    conn = db.connection()
+    columns = (Reminder.__table__.c[name] for name in ReminderOut.model_fields)
+    created = conn.execute(Reminder.__table__.insert().returning(*columns, sort_by_parameter_order=True), rows).all()
+    for user_id in {row["user_id"] for row in rows}:
+        version_service.bump(conn, user_id, "reminders")
+    return [ReminderOut.model_validate(row._asdict()) for row in created]
+
+def create_reminder(db, reminder_data, user_id):
+    # Save the reminder in a group commit, then hand it to the scheduler once it is committed
+    reminder = group_commit.run(db, insert_reminders, {"user_id": user_id, **reminder_data.model_dump()})
+    scheduler.add(reminder.id, user_id, reminder.due_date)
+    return reminder
+
+def delete_reminder(db, reminder_id, user_id):
+    reminder = db.query(Reminder).filter(Reminder.id == reminder_id, Reminder.user_id == user_id).first()
+    if not reminder:
+        raise ValueError("Reminder not found")
+    db.delete(reminder)
+    version_service.bump(db, user_id, "reminders")
+    db.commit()
+    scheduler.remove(reminder_id)
+    return {"message": "Reminder deleted successfully"}
+
+def list_reminders(db, user_id, from_date=None, to_date=None):
+    # Reminders for a user within an optional due-date range, soonest first.
+    # Served by the (user_id, due_date) index.
+    q = db.query(Reminder).filter(Reminder.user_id == user_id)
+    if from_date:
+        q = q.filter(Reminder.due_date >= from_date)
+    if to_date:
+        q = q.filter(Reminder.due_date <= to_date)
+    return q.order_by(Reminder.due_date).all()
+
+def list_reminder_rows(db, user_id, from_date=None, to_date=None):
+    # list_reminders as plain column rows, for serialization.json_list
+    stmt = select(*(getattr(Reminder, name) for name in ReminderOut.model_fields)).where(Reminder.user_id == user_id)
+    if from_date:
+        stmt = stmt.where(Reminder.due_date >= from_date)
+    if to_date:
+        stmt = stmt.where(Reminder.due_date <= to_date)
+    return row_dicts(db.execute(stmt.order_by(Reminder.due_date)))
+
+def upcoming_reminders(db, user_id, days):
+    # Reminders due from today through today + days, soonest first: the
+    # (user_id, due_date) range query, so every worker gives the same answer
+    today = scheduler.clock()
+    return list_reminders(db, user_id, today, today + timedelta(days=days))
+
+def scheduler_rows_query():
+    # Every reminder that can still fire
+    since = scheduler.clock() - timedelta(days=1)
+    return select(Reminder.id, Reminder.user_id, Reminder.due_date).where(Reminder.due_date >= since)
+
+def reminder_versions_query(changed_after=None):
+    # Every write to a user's reminders bumps this, in any process. Served by
+    # the (resource, changed_at) index: a refresh reads only the rows changed
+    # since changed_after, however many users there are.
+    stmt = select(ResourceVersion.user_id, ResourceVersion.version).where(ResourceVersion.resource == "reminders")
+    if changed_after is not None:
+        stmt = stmt.where(ResourceVersion.changed_at > changed_after)
+    return stmt
+
+def _newest_change(db):
+    return db.scalar(select(func.max(ResourceVersion.changed_at)).where(ResourceVersion.resource == "reminders"))
+
+def load_scheduler(*dbs):
+    # Read every reminder that can still fire into the scheduler, streamed in
+    # batches, from each given database (one per shard). The versions are read
+    # first, so a write in between is picked up by the next refresh.
+    versions = {}
+    changed_since = datetime.utcnow()
+    for db in dbs:
+        changed_since = max(filter(None, (changed_since, _newest_change(db))))
+        versions.update(db.execute(reminder_versions_query()).all())
+    stmt = scheduler_rows_query().execution_options(yield_per=SCHEDULER_LOAD_BATCH_SIZE)
+    results = (db.connection().execute(stmt) for db in dbs)
+    scheduler.load(tuple(row) for result in results for row in result)
+    scheduler.versions = versions
+    scheduler.changed_since = changed_since
+    return len(scheduler)
+
+def refresh_scheduler(*dbs):
+    # Re-read the reminders of users whose reminders version moved since the
+    # scheduler last saw it: writes by other workers, the recurring job, or
+    # this process (whose add/remove already applied them). Only versions
+    # changed since the newest change seen (less the lookback) are read.
+    # Returns how many users were re-read.
+    refreshed = 0
+    changed_after = None
+    if scheduler.changed_since is not None:
+        changed_after = scheduler.changed_since - timedelta(seconds=REMINDER_SCHEDULER_LOOKBACK_SECONDS)
+    newest = scheduler.changed_since
+    for db in dbs:
+        newest = max(filter(None, (newest, _newest_change(db))))
+        versions = dict(db.execute(reminder_versions_query(changed_after)).all())
+        changed = [user_id for user_id, version in versions.items() if scheduler.versions.get(user_id) != version]
+        for start in range(0, len(changed), SCHEDULER_REFRESH_BATCH_SIZE):
+            users = changed[start:start + SCHEDULER_REFRESH_BATCH_SIZE]
+            rows = db.execute(scheduler_rows_query().where(Reminder.user_id.in_(users))).all()
+            scheduler.replace_users(users, [tuple(row) for row in rows])
+            scheduler.versions.update((user_id, versions[user_id]) for user_id in users)
+        refreshed += len(changed)
+    scheduler.changed_since = newest
+    return refreshed
+
+def hold_scheduler_lease(db, holder=SCHEDULER_HOLDER, now=None):
+    # Take or renew the lease that makes this process the one running the
+    # reminder scheduler, in the directory database; True while it holds it.
+    # Commits.
+    now = now or datetime.utcnow()
+    table = SchedulerLease.__table__
+    values = {"holder": holder, "expires_at": now + timedelta(seconds=REMINDER_SCHEDULER_LEASE_SECONDS)}
+    try:
+        renewed = db.execute(
+            table.update()
+            .where(table.c.name == SCHEDULER_LEASE, or_(table.c.holder == holder, table.c.expires_at < now))
+            .values(**values)
+        ).rowcount
+        if not renewed:
+            # Raises if another process holds the lease
+            db.execute(table.insert().values(name=SCHEDULER_LEASE, **values))
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
+
+def release_scheduler_lease(db, holder=SCHEDULER_HOLDER):
+    # Give the lease up at shutdown, so another worker takes over at its next refresh
+    table = SchedulerLease.__table__
+    db.execute(table.delete().where(table.c.name == SCHEDULER_LEASE, table.c.holder == holder))
+    db.commit()
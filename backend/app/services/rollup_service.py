@@ -0,0 +1,154 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import BigInteger, String, bindparam, cast, delete, func, insert, select, update
+from ..models import MonthlyRollup, Transaction
+from ..money import cents, from_cents
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+def month_key(column):
+    """
+    SQL expression for the YYYY-MM month of a datetime column.
+
+    created_at is stored as ISO text on SQLite (and casts to ISO text on
+    Postgres), so its first 7 characters are the month.
+    """
+    return func.substr(cast(column, String), 1, 7)
+
+def delta_statements(user_id: int, created_at: datetime, kind: str, category: str,
+                     amount: Decimal, count: int):
+    """
+    Statements that add amount/count to a transaction's rollup row:
+    (update existing row, insert when the update matched nothing, drop emptied row).
+    """
+    month = created_at.strftime("%Y-%m")
+    key = (
+        MonthlyRollup.user_id == user_id,
+        MonthlyRollup.month == month,
+        MonthlyRollup.kind == kind,
+        MonthlyRollup.category == category,
+    )
+    increment = (
+        update(MonthlyRollup)
+        .where(*key)
+        .values(total=MonthlyRollup.total + amount, tx_count=MonthlyRollup.tx_count + count)
+    )
+    create = insert(MonthlyRollup).values(
+        user_id=user_id, month=month, kind=kind, category=category,
+        total=amount, tx_count=count,
+    )
+    # Drop rows whose last transaction was removed so they match a rebuild
+    cleanup = delete(MonthlyRollup).where(*key, MonthlyRollup.tx_count <= 0)
+    return increment, create, cleanup
+
+def apply_delta(db: Session, user_id: int, created_at: datetime, kind: str, category: str,
+                amount: Decimal, count: int) -> None:
+    """
+    Add amount/count to the rollup row for a transaction, inside the caller's
+    DB transaction. The caller is responsible for committing.
+    """
+    increment, create, cleanup = delta_statements(user_id, created_at, kind, category, amount, count)
+    if db.execute(increment).rowcount == 0:
+        db.execute(create)
+    elif count < 0:
+        db.execute(cleanup)
+
+# Amounts bound as they are stored, in cents
+_bulk_increment = MonthlyRollup.__table__.update().where(
+    MonthlyRollup.user_id == bindparam("key_user_id"),
+    MonthlyRollup.month == bindparam("key_month"),
+    MonthlyRollup.kind == bindparam("key_kind"),
+    MonthlyRollup.category == bindparam("key_category"),
+).values(
+    total=cents(MonthlyRollup.total) + bindparam("amount", type_=BigInteger),
+    tx_count=MonthlyRollup.tx_count + bindparam("count", type_=MonthlyRollup.tx_count.type),
+)
+_bulk_create = MonthlyRollup.__table__.insert().values(total=bindparam("total_cents", type_=BigInteger))
+
+def apply_deltas(db: Session, deltas: Dict[Tuple[int, str, str, str], Tuple[int, int]]) -> None:
+    """
+    Add many (cents, count) deltas keyed by (user_id, YYYY-MM, kind, category)
+    for newly inserted transactions: one lookup of the existing rows, then an
+    executemany update and an executemany insert. The caller commits.
+    """
+    if not deltas:
+        return
+    found = db.execute(
+        select(MonthlyRollup.user_id, MonthlyRollup.month, MonthlyRollup.kind, MonthlyRollup.category)
+        .where(MonthlyRollup.user_id.in_({key[0] for key in deltas}),
+               MonthlyRollup.month.in_({key[1] for key in deltas}))
+    )
+    existing = {tuple(row) for row in found}
+    updates, inserts = [], []
+    for (user_id, month, kind, category), (amount, count) in deltas.items():
+        if (user_id, month, kind, category) in existing:
+            updates.append({"key_user_id": user_id, "key_month": month, "key_kind": kind,
+                            "key_category": category, "amount": amount, "count": count})
+        else:
+            inserts.append({"user_id": user_id, "month": month, "kind": kind,
+                            "category": category, "total_cents": amount, "tx_count": count})
+    if updates:
+        db.execute(_bulk_increment, updates)
+    if inserts:
+        db.execute(_bulk_create, inserts)
+
+def _raw_totals(user_id: Optional[int] = None):
+    tx_month = month_key(Transaction.created_at)
+    stmt = select(
+        Transaction.user_id,
+        tx_month.label("month"),
+        Transaction.kind,
+        Transaction.category,
+        cents(func.sum(Transaction.amount)).label("total"),
+        func.count().label("tx_count"),
+    )
+    if user_id is not None:
+        stmt = stmt.where(Transaction.user_id == user_id)
+    return stmt.group_by(Transaction.user_id, tx_month, Transaction.kind, Transaction.category)
+
+def rebuild_rollups(db: Session, user_id: Optional[int] = None) -> int:
+    """
+    Recompute rollups from raw transactions (for one user or everyone).
+    Returns the number of rollup rows written.
+    """
+    clear = delete(MonthlyRollup)
+    if user_id is not None:
+        clear = clear.where(MonthlyRollup.user_id == user_id)
+    db.execute(clear)
+    result = db.execute(insert(MonthlyRollup).from_select(
+        ["user_id", "month", "kind", "category", "total", "tx_count"], _raw_totals(user_id)
+    ))
+    db.commit()
+    return result.rowcount
+
+def verify_rollups(db: Session, user_id: Optional[int] = None) -> List[dict]:
+    """
+    Compare stored rollups with totals recomputed from raw transactions.
+    Returns one entry per drifted key; an empty list means no drift.
+    """
+    # Totals are compared as integer cents, exactly
+    expected = {
+        (row.user_id, row.month, row.kind, row.category): (row.total, row.tx_count)
+        for row in db.execute(_raw_totals(user_id))
+    }
+    stored_query = select(MonthlyRollup.user_id, MonthlyRollup.month, MonthlyRollup.kind,
+                          MonthlyRollup.category, cents(MonthlyRollup.total), MonthlyRollup.tx_count)
+    if user_id is not None:
+        stored_query = stored_query.where(MonthlyRollup.user_id == user_id)
+    stored = {
+        (user, month, kind, category): (total, count)
+        for user, month, kind, category, total, count in db.execute(stored_query)
+    }
+
+    drift = []
+    for key in sorted(expected.keys() | stored.keys()):
+        want = expected.get(key, (0, 0))
+        have = stored.get(key, (0, 0))
+        if want != have:
+            user, month, kind, category = key
+            drift.append({
+                "user_id": user, "month": month, "kind": kind, "category": category,
+                "expected_total": from_cents(want[0]), "stored_total": from_cents(have[0]),
+                "expected_count": want[1], "stored_count": have[1],
+            })
+    return drift
@@ -0,0 +1,107 @@
+"""
+Full-text search over a user's transactions.
+
+Queries go to the transactions_fts index (see models.TRANSACTIONS_FTS), which
+covers note and category. Every word of the query must match as a whole
+word; a trailing * makes the last word match as a prefix ("uber eat*").
+Facet counts by category, kind and month cover all matches, not just the
+returned page. Search needs SQLite, whose FTS5 holds the index.
+
+Results are ranked by where they matched: note matches before category-only
+matches, shorter notes (where the words weigh more) first, then newest. This
+keeps BM25's field weighting and length normalization but not its IDF, which
+FTS5 computes by walking every row containing each query word, all users'
+included. That walk made common words cost tens of milliseconds on a
+million-row ledger, and other users' notes should not decide the order of
+this user's results anyway.
+"""
+import re
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import column, func, literal_column, select, table
+from sqlalchemy.orm import Session
+
+from ..models import TRANSACTIONS_FTS, Transaction
+from ..schemas import SearchFacets, SearchResult, TxOut
+from ..serialization import row_dicts
+from .rollup_service import month_key
+
+SEARCH_MAX_TERMS = 16
+
+fts = table(TRANSACTIONS_FTS, column("rowid"))
+_match = literal_column(TRANSACTIONS_FTS).op("MATCH")
+
+def match_expression(user_id: int, q: str) -> str:
+    """
+    An FTS5 query for q within the note and category of the user's rows.
+    Words are quoted, so query syntax in q is searched for as text rather
+    than interpreted.
+    """
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        raise ValueError("Search query must contain at least one word")
+    if len(terms) > SEARCH_MAX_TERMS:
+        raise ValueError(f"Search query can have at most {SEARCH_MAX_TERMS} words")
+    words = " ".join(f'"{term}"' for term in terms)
+    if q.rstrip().endswith("*"):
+        words += "*"
+    return f"user_id : {int(user_id)} AND {{note category}} : ({words})"
+
+def matches_query(user_id: int, q: str, kind: Optional[str], category: Optional[str], month: Optional[str]):
+    """Transactions matching the search, as a select to add columns to."""
+    stmt = (
+        select()
+        .select_from(fts.join(Transaction, Transaction.id == fts.c.rowid))
+        .where(_match(match_expression(user_id, q)))
+    )
+    if kind:
+        stmt = stmt.where(Transaction.kind == kind)
+    if category:
+        stmt = stmt.where(Transaction.category == category)
+    if month:
+        stmt = stmt.where(month_key(Transaction.created_at) == month)
+    return stmt
+
+def search_statements(user_id: int, q: str, kind: Optional[str] = None, category: Optional[str] = None,
+                      month: Optional[str] = None, limit: int = 20, offset: int = 0):
+    """The (page, facets) statements of a search."""
+    if limit <= 0:
+        raise ValueError("Limit must be greater than 0")
+    if offset < 0:
+        raise ValueError("Offset must not be negative")
+    matches = matches_query(user_id, q, kind, category, month)
+    # highlight() marks the matched words of column 1 (note), so a marker in
+    # its output means the note matched; this avoids a second MATCH
+    marker = func.char(1)
+    in_note = func.instr(func.highlight(literal_column(TRANSACTIONS_FTS), 1, marker, ""), marker) > 0
+    page = (
+        matches.add_columns(*(getattr(Transaction, name) for name in TxOut.model_fields))
+        .order_by(in_note.desc(), func.length(Transaction.note), Transaction.created_at.desc(),
+                  Transaction.id.desc())
+        .limit(limit).offset(offset)
+    )
+    month_col = month_key(Transaction.created_at)
+    facets = (
+        matches.add_columns(Transaction.category, Transaction.kind, month_col, func.count())
+        .group_by(Transaction.category, Transaction.kind, month_col)
+    )
+    return page, facets
+
+def search_result(page_rows, facet_rows) -> SearchResult:
+    counts = {"category": Counter(), "kind": Counter(), "month": Counter()}
+    for category, kind, month, count in facet_rows:
+        counts["category"][category] += count
+        counts["kind"][kind] += count
+        counts["month"][month] += count
+    return SearchResult(
+        total=sum(counts["kind"].values()),
+        items=[TxOut.model_validate(row) for row in page_rows],
+        facets=SearchFacets(**{name: dict(counter.most_common()) for name, counter in counts.items()}),
+    )
+
+def search_transactions(db: Session, user_id: int, q: str, kind: Optional[str] = None,
+                        category: Optional[str] = None, month: Optional[str] = None,
+                        limit: int = 20, offset: int = 0) -> SearchResult:
+    page, facets = search_statements(user_id, q, kind, category, month, limit, offset)
+    return search_result(row_dicts(db.execute(page)), db.execute(facets).all())
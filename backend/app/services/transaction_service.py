@@ -1,13 +1,21 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from ..models import Transaction
+from sqlalchemy import func, or_, and_, select
+from ..models import MonthlyRollup, Transaction
+from .. import alerts, group_commit
+from ..money import cents, from_cents, to_cents
+from . import aggregate_cache, rollup_service, version_service
 from ..schemas import TxIn, TxOut
-from datetime import datetime
-from typing import List, Optional
+from ..serialization import row_dicts
+from datetime import datetime, date, timedelta
+from collections import defaultdict
+from typing import Iterator, List, Optional, Tuple
+import base64
 
-def create_transaction(db: Session, tx_data: TxIn, user_id: int) -> TxOut:
+STREAM_BATCH_SIZE = 500
+
+def transaction_values(tx_data: TxIn, user_id: int) -> dict:
     """
-    Create a new transaction with validation.
+    Validate business rules and return the column values of a new transaction.
     """
     # Business rule validation
     if tx_data.amount <= 0:
@@ -15,76 +23,258 @@ def create_transaction(db: Session, tx_data: TxIn, user_id: int) -> TxOut:
     if tx_data.kind not in ["income", "expense"]:
         raise ValueError("Kind must be 'income' or 'expense'")
 
-    # Create transaction
-    db_tx = Transaction(
+    return dict(
         user_id=user_id,
         kind=tx_data.kind,
         amount=tx_data.amount,
         category=tx_data.category or "general",
-        note=tx_data.note or ""
+        note=tx_data.note or "",
+        created_at=datetime.utcnow()
     )
-    db.add(db_tx)
-    db.commit()
-    db.refresh(db_tx)
-    return TxOut.model_validate(db_tx)
 
-def list_transactions(db: Session, user_id: int, kind: Optional[str] = None) -> List[TxOut]:
+def insert_query():
+    """
+    Insert of transactions that returns the new rows, in parameter order, so
+    no refresh() round trip is needed after the commit.
+    """
+    columns = (Transaction.__table__.c[name] for name in TxOut.model_fields)
+    return Transaction.__table__.insert().returning(*columns, sort_by_parameter_order=True)
+
+def insert_transactions(db: Session, rows: List[dict]) -> List[TxOut]:
+    """
+    Insert transactions (column values from transaction_values) with their
+    rollup deltas and version bumps: one executemany per table for the whole
+    list. The caller commits.
+    """
+    # Through the Core connection: the ORM adds nothing to these statements
+    conn = db.connection()
+    created = conn.execute(insert_query(), rows).all()
+    deltas = defaultdict(lambda: [0, 0])
+    for row in rows:
+        delta = deltas[(row["user_id"], row["created_at"].strftime("%Y-%m"), row["kind"], row["category"])]
+        delta[0] += to_cents(row["amount"])
+        delta[1] += 1
+    rollup_service.apply_deltas(conn, deltas)
+    for user_id in {row["user_id"] for row in rows}:
+        version_service.bump(conn, user_id, "transactions")
+    return [TxOut.model_validate(row._asdict()) for row in created]
+
+def create_transaction(db: Session, tx_data: TxIn, user_id: int) -> TxOut:
+    """
+    Create a new transaction with validation.
+    """
+    # Committed with its rollup delta, in a group commit with concurrent creates
+    created = group_commit.run(db, insert_transactions, transaction_values(tx_data, user_id))
+    alerts.publish(db, alerts.expense_keys([{"user_id": user_id, **created.model_dump()}]))
+    return created
+
+def encode_cursor(created_at: datetime, tx_id: int) -> str:
     """
-    List transactions, optionally filtered by kind.
+    Encode the (created_at, id) keyset position of a row as an opaque cursor.
     """
-    query = db.query(Transaction).filter(Transaction.user_id == user_id)
+    raw = f"{created_at.isoformat()}|{tx_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor back into (created_at, id).
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, tx_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(tx_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+def filtered_query(
+    user_id: int,
+    kind: Optional[str] = None,
+    category: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    cursor: Optional[str] = None,
+):
+    """
+    Build the filtered, newest-first select shared by listing and streaming.
+    """
+    stmt = select(Transaction).where(Transaction.user_id == user_id)
     if kind:
         if kind not in ["income", "expense"]:
             raise ValueError("Kind must be 'income' or 'expense'")
-        query = query.filter(Transaction.kind == kind)
-    transactions = query.order_by(Transaction.created_at.desc()).all()
-    return [TxOut.model_validate(tx) for tx in transactions]
+        stmt = stmt.where(Transaction.kind == kind)
+    if category:
+        stmt = stmt.where(Transaction.category == category)
+    if from_date:
+        stmt = stmt.where(Transaction.created_at >= datetime.combine(from_date, datetime.min.time()))
+    if to_date:
+        # to_date is inclusive, so compare against the start of the next day
+        end = datetime.combine(to_date + timedelta(days=1), datetime.min.time())
+        stmt = stmt.where(Transaction.created_at < end)
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(
+            Transaction.created_at < cursor_created_at,
+            and_(Transaction.created_at == cursor_created_at, Transaction.id < cursor_id),
+        ))
+    return stmt.order_by(Transaction.created_at.desc(), Transaction.id.desc())
+
+def list_transactions(
+    db: Session,
+    user_id: int,
+    kind: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    category: Optional[str] = None,
+) -> Tuple[List[TxOut], Optional[str]]:
+    """
+    List transactions newest first, optionally filtered and keyset-paginated.
+
+    Returns the page of transactions and the cursor for the next page, which is
+    None when there are no more rows (or when no limit was requested).
+    """
+    stmt = page_query(user_id, kind, limit, cursor, from_date, to_date, category)
+    return paginate(db.execute(stmt).scalars().all(), limit)
+
+def page_query(user_id: int, kind: Optional[str], limit: Optional[int], cursor: Optional[str],
+               from_date: Optional[date], to_date: Optional[date], category: Optional[str]):
+    """
+    filtered_query for one page: limited to limit + 1 rows, to know whether
+    another page exists.
+    """
+    if limit is not None and limit <= 0:
+        raise ValueError("Limit must be greater than 0")
+    stmt = filtered_query(user_id, kind, category, from_date, to_date, cursor)
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    return stmt
+
+def rows_query(stmt):
+    """A Transaction select narrowed to TxOut's columns, for plain-row results."""
+    return stmt.with_only_columns(*(getattr(Transaction, name) for name in TxOut.model_fields))
+
+def list_transaction_rows(
+    db: Session,
+    user_id: int,
+    kind: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    category: Optional[str] = None,
+) -> Tuple[list, Optional[str]]:
+    """
+    list_transactions as plain column rows (dicts with TxOut's fields), for
+    serialization.json_list.
+    """
+    stmt = rows_query(page_query(user_id, kind, limit, cursor, from_date, to_date, category))
+    return paginate_rows(row_dicts(db.execute(stmt)), limit)
+
+def paginate(transactions: List[Transaction], limit: Optional[int]) -> Tuple[List[TxOut], Optional[str]]:
+    """
+    Turn the rows of a filtered_query limited to limit + 1 into a page and the
+    cursor for the next page.
+    """
+    next_cursor = None
+    if limit is not None and len(transactions) > limit:
+        transactions = transactions[:limit]
+        last = transactions[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return [TxOut.model_validate(tx) for tx in transactions], next_cursor
+
+def paginate_rows(rows: list, limit: Optional[int]) -> Tuple[list, Optional[str]]:
+    """paginate for the row dicts of a rows_query."""
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    return rows, next_cursor
+
+def stream_transactions(
+    db: Session,
+    user_id: int,
+    kind: Optional[str] = None,
+    from_date: Optional[date] = None,
+    to_date: Optional[date] = None,
+    category: Optional[str] = None,
+    batch_size: int = STREAM_BATCH_SIZE,
+) -> Iterator[TxOut]:
+    """
+    Yield matching transactions one at a time from a server-side cursor.
+
+    Rows are fetched in batches of batch_size so memory stays flat regardless
+    of how many transactions the user has. Filters are validated eagerly, so a
+    ValueError is raised here rather than part-way through a response.
+    """
+    stmt = filtered_query(user_id, kind, category, from_date, to_date)
+
+    def _rows() -> Iterator[TxOut]:
+        result = db.execute(stmt.execution_options(yield_per=batch_size))
+        for tx in result.scalars():
+            yield TxOut.model_validate(tx)
+
+    return _rows()
+
+def monthly_totals_query(user_id: int, month: str):
+    """
+    Per-kind sums for one user and YYYY-MM month, read from the rollups.
+    """
+    return select(MonthlyRollup.kind, func.sum(cents(MonthlyRollup.total))).where(
+        MonthlyRollup.user_id == user_id,
+        MonthlyRollup.month == month
+    ).group_by(MonthlyRollup.kind)
+
+def totals_from_sums(sums: dict) -> dict:
+    # Sums are integer cents, so net is exact before the one conversion
+    income_cents = sums.get("income") or 0
+    expense_cents = sums.get("expense") or 0
+
+    return {
+        "income": from_cents(income_cents),
+        "expense": from_cents(expense_cents),
+        "net": from_cents(income_cents - expense_cents)
+    }
 
 def get_monthly_totals(db: Session, user_id: int) -> dict:
     """
     Get totals for current month: income, expense, net.
+
+    Reads the per-category monthly rollups rather than scanning transactions,
+    through the aggregate cache.
     """
     current_month = datetime.utcnow().strftime("%Y-%m")
-    start_date = datetime.strptime(current_month + "-01", "%Y-%m-%d")
-
-    # Calculate next month for end date
-    if start_date.month == 12:
-        end_date = start_date.replace(year=start_date.year + 1, month=1, day=1)
-    else:
-        end_date = start_date.replace(month=start_date.month + 1, day=1)
-
-    # Sum income
-    income_sum = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == user_id,
-        Transaction.kind == "income",
-        Transaction.created_at >= start_date,
-        Transaction.created_at < end_date
-    ).scalar() or 0
-
-    # Sum expense
-    expense_sum = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == user_id,
-        Transaction.kind == "expense",
-        Transaction.created_at >= start_date,
-        Transaction.created_at < end_date
-    ).scalar() or 0
+    versions = version_service.current_versions(db, user_id, aggregate_cache.TOTALS_RESOURCES)
 
-    return {
-        "income": float(income_sum),
-        "expense": float(expense_sum),
-        "net": float(income_sum - expense_sum)
-    }
+    def compute():
+        sums = dict(db.execute(monthly_totals_query(user_id, current_month)).all())
+        return totals_from_sums(sums)
+
+    return aggregate_cache.response_cache.get_or_compute(
+        aggregate_cache.totals_key(user_id, current_month, versions), compute
+    )
+
+def owned_transaction_query(transaction_id: int, user_id: int):
+    return select(Transaction).where(
+        Transaction.id == transaction_id,
+        Transaction.user_id == user_id
+    )
 
 def delete_transaction(db: Session, transaction_id: int, user_id: int) -> dict:
     """
     Delete a transaction by ID, ensuring it belongs to the user.
     """
-    transaction = db.query(Transaction).filter(
-        Transaction.id == transaction_id,
-        Transaction.user_id == user_id
-    ).first()
+    transaction = db.execute(owned_transaction_query(transaction_id, user_id)).scalars().first()
     if not transaction:
         raise ValueError("Transaction not found or does not belong to user")
+    rollup_service.apply_delta(
+        db, user_id, transaction.created_at, transaction.kind, transaction.category,
+        -transaction.amount, -1
+    )
+    version_service.bump(db, user_id, "transactions")
+    keys = alerts.expense_keys([{"user_id": user_id, "kind": transaction.kind,
+                                 "created_at": transaction.created_at, "category": transaction.category}])
     db.delete(transaction)
     db.commit()
+    alerts.publish(db, keys)
     return {"message": "Transaction deleted successfully"}
@@ -0,0 +1,71 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import insert, select, update
+from ..models import ResourceVersion
+from datetime import datetime
+from typing import Iterable, Optional
+import hashlib
+
+RESOURCES = ("transactions", "budgets", "reminders", "goals")
+
+def bump_statements(user_id: int, resource: str):
+    """
+    Statements that increment a user's resource version:
+    (update existing row, insert when the update matched nothing).
+    """
+    if resource not in RESOURCES:
+        raise ValueError(f"Unknown resource: {resource}")
+    key = (ResourceVersion.user_id == user_id, ResourceVersion.resource == resource)
+    now = datetime.utcnow()
+    increment = update(ResourceVersion).where(*key).values(
+        version=ResourceVersion.version + 1, changed_at=now
+    )
+    create = insert(ResourceVersion).values(user_id=user_id, resource=resource, version=1, changed_at=now)
+    return increment, create
+
+def bump(db: Session, user_id: int, resource: str) -> None:
+    """
+    Mark a user's resource as changed, inside the caller's DB transaction so the
+    new version becomes visible together with the write. The caller commits.
+    """
+    increment, create = bump_statements(user_id, resource)
+    if db.execute(increment).rowcount == 0:
+        db.execute(create)
+
+def versions_query(user_id: int, resources: Iterable[str]):
+    return select(ResourceVersion.resource, ResourceVersion.version).where(
+        ResourceVersion.user_id == user_id,
+        ResourceVersion.resource.in_(list(resources)),
+    )
+
+def make_etag(user_id: int, versions: dict, resources: Iterable[str], variant: str = "") -> str:
+    """
+    Strong ETag for a list response: the versions of every resource it is built
+    from, plus a digest of the query parameters that select the representation.
+    """
+    parts = "-".join(f"{r}.{versions.get(r, 0)}" for r in resources)
+    digest = hashlib.sha1(variant.encode()).hexdigest()[:12]
+    return f'"{user_id}-{parts}-{digest}"'
+
+def current_versions(db: Session, user_id: int, resources: Iterable[str]) -> dict:
+    """
+    A user's resource -> version, from one primary-key lookup on resource_versions
+    (resources never written are missing, i.e. version 0).
+    """
+    return dict(db.execute(versions_query(user_id, resources)).all())
+
+def current_etag(db: Session, user_id: int, resources: Iterable[str], variant: str = "") -> str:
+    """
+    ETag of a user's list response from one primary-key lookup on resource_versions.
+    """
+    resources = tuple(resources)
+    return make_etag(user_id, current_versions(db, user_id, resources), resources, variant)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header value covers etag (weak comparison, per RFC 9110).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
@@ -0,0 +1,102 @@
+"""GET /analytics aggregation latency and peak memory for a 1M-transaction user,
+against a loop over ORM objects on a smaller sample.
+
+Run from backend/:  python -m benchmarks.bench_analytics
+"""
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base, make_engine
+from app.models import Transaction, User
+from app.services import analytics_service
+
+ROWS = 1_000_000
+ORM_SAMPLE = 100_000
+RUNS = 5
+START = datetime(2023, 1, 1)
+FROM, TO = date(2023, 1, 1), date(2024, 12, 31)
+
+
+def seed(db, user_id, n):
+    # Rows arrive in time order, as they do through POST /transactions
+    rng = random.Random(0)
+    table = Transaction.__table__
+    minutes = sorted(rng.randint(0, 730 * 24 * 60) for _ in range(n))
+    batch = []
+    for minute in minutes:
+        batch.append({
+            "user_id": user_id,
+            "kind": "expense" if rng.random() < 0.8 else "income",
+            "amount": rng.randint(1, 50_000) / 100,
+            "category": f"cat{rng.randint(0, 29)}",
+            "note": "",
+            "created_at": START + timedelta(minutes=minute),
+        })
+        if len(batch) == 10_000:
+            db.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        db.execute(table.insert(), batch)
+    db.commit()
+
+
+def orm_loop(db, user_id):
+    """What the endpoint would cost as a Python loop over Transaction objects."""
+    months = defaultdict(lambda: {"income": 0, "expense": 0})
+    categories = defaultdict(float)
+    stmt = select(Transaction).where(Transaction.user_id == user_id)
+    for tx in db.execute(stmt).scalars():
+        months[tx.created_at.strftime("%Y-%m")][tx.kind] += tx.amount
+        if tx.kind == "expense":
+            categories[tx.category] += float(tx.amount)
+    return months, categories
+
+
+def measure(fn):
+    times = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{tmp}/analytics.sqlite3")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        users = [User(email=f"bench{i}@example.com", hashed_password="x") for i in range(2)]
+        db.add_all(users)
+        db.commit()
+        big, small = users[0].id, users[1].id
+        seed(db, big, ROWS)
+        seed(db, small, ORM_SAMPLE)
+
+        for label, user_id, rows in (("vectorized", big, ROWS), ("vectorized", small, ORM_SAMPLE)):
+            elapsed, peak = measure(
+                lambda: analytics_service.get_analytics(db, user_id, FROM, TO)
+            )
+            print(f"{label:>10} {rows:>9,} rows: median {elapsed * 1000:7.0f} ms, "
+                  f"peak traced memory {peak / 2**20:6.1f} MiB")
+        elapsed, peak = measure(lambda: (orm_loop(db, small), db.expunge_all()))
+        print(f"{'ORM loop':>10} {ORM_SAMPLE:>9,} rows: median {elapsed * 1000:7.0f} ms, "
+              f"peak traced memory {peak / 2**20:6.1f} MiB")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Sync engine vs. AsyncSession (aiosqlite) on the same concurrent workload.
+
+Each mode runs in its own subprocess (DB_ASYNC is read at import time) against
+a copy of the same seeded SQLite file; requests go through the ASGI app
+in-process, so sync handlers use the threadpool exactly as under Uvicorn.
+
+Run from backend/:  python -m benchmarks.bench_async   (needs httpx and the async extra)
+"""
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+CONCURRENCY = (1, 10, 50)
+REQUESTS = 600
+TRANSACTIONS = 5_000
+ROUTES = ("/transactions/?limit=50", "/budgets/?month=2024-06", "/transactions/totals")
+
+
+def seed(path):
+    os.environ["DB_URL"] = f"sqlite:///{path}"
+    import random
+    from datetime import datetime, timedelta
+
+    from app.db import SessionLocal, create_tables, engine
+    from app.models import Budget, Transaction, User
+    from app.routers import auth
+    from app.services import rollup_service
+
+    create_tables()
+    db = SessionLocal()
+    user = User(email="bench@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    rng = random.Random(0)
+    db.add_all(
+        Transaction(user_id=user.id, kind=rng.choice(("income", "expense")),
+                    amount=rng.randint(1, 300), category=f"cat{rng.randint(0, 9)}",
+                    created_at=datetime(2024, 1, 1) + timedelta(minutes=rng.randint(0, 525_600)))
+        for _ in range(TRANSACTIONS)
+    )
+    db.add_all(Budget(user_id=user.id, category=f"cat{i}", month="2024-06", cap_amount=500)
+               for i in range(10))
+    db.commit()
+    rollup_service.rebuild_rollups(db)
+    token = auth.create_access_token(auth.user_claims(user))
+    db.close()
+    # Closing the last connection checkpoints the WAL so the file can be copied
+    engine.dispose()
+    return token
+
+
+async def run_mode(token):
+    import httpx
+
+    from app.main import app
+
+    headers = {"Authorization": f"Bearer {token}"}
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for concurrency in CONCURRENCY:
+            queue = [ROUTES[i % len(ROUTES)] for i in range(REQUESTS)]
+
+            async def worker():
+                while queue:
+                    response = await client.get(queue.pop(), headers=headers)
+                    assert response.status_code == 200, response.text
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            results[concurrency] = REQUESTS / (time.perf_counter() - start)
+    return results
+
+
+def main():
+    if len(sys.argv) == 3:
+        # Child process: python -m benchmarks.bench_async <db path> <token>
+        os.environ["DB_URL"] = f"sqlite:///{sys.argv[1]}"
+        print(json.dumps(asyncio.run(run_mode(sys.argv[2]))))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seeded = os.path.join(tmp, "seed.sqlite3")
+        token = seed(seeded)
+        throughput = {}
+        for mode in ("sync", "async"):
+            path = os.path.join(tmp, f"{mode}.sqlite3")
+            shutil.copy(seeded, path)
+            env = {**os.environ, "DB_ASYNC": "true" if mode == "async" else "false"}
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_async", path, token],
+                env=env, stdout=subprocess.PIPE, text=True, check=True,
+            ).stdout
+            throughput[mode] = json.loads(out.strip().splitlines()[-1])
+
+        print(f"{'concurrency':>11} {'sync req/s':>11} {'async req/s':>12}")
+        for concurrency in CONCURRENCY:
+            key = str(concurrency)
+            print(f"{concurrency:>11} {throughput['sync'][key]:>11.0f} {throughput['async'][key]:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
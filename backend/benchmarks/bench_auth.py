@@ -0,0 +1,60 @@
+"""Per-request DB round trips and latency for authenticated requests.
+
+"before" uses a subject-only token with the user cache disabled, which is what
+every request paid prior to the cache; "after" uses a token carrying uid/active
+claims with the cache on.
+
+Run from backend/:  python -m benchmarks.bench_auth   (needs httpx for TestClient)
+"""
+import os
+import tempfile
+import time
+
+REQUESTS = 500
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_URL"] = f"sqlite:///{tmp}/bench.sqlite3"
+        from fastapi.testclient import TestClient
+        from sqlalchemy import event
+
+        from app.cache import TTLCache
+        from app.db import SessionLocal, create_tables, engine
+        from app.main import app
+        from app.models import User
+        from app.routers import auth
+
+        create_tables()
+        db = SessionLocal()
+        user = User(email="bench@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        claims = auth.user_claims(user)
+        db.close()
+
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        client = TestClient(app)
+
+        def run(label, token):
+            headers = {"Authorization": f"Bearer {token}"}
+            client.get("/reminders/", headers=headers)  # warm up
+            statements.clear()
+            start = time.perf_counter()
+            for _ in range(REQUESTS):
+                client.get("/reminders/", headers=headers)
+            elapsed = time.perf_counter() - start
+            print(f"{label:>7}: {len(statements) / REQUESTS:.2f} statements/request, "
+                  f"{elapsed / REQUESTS * 1000:.3f} ms/request")
+
+        cache = auth.user_cache
+        auth.user_cache = TTLCache(maxsize=0)
+        run("before", auth.create_access_token({"sub": claims["sub"]}))
+        auth.user_cache = cache
+        run("after", auth.create_access_token(claims))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
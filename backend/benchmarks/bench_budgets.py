@@ -0,0 +1,87 @@
+"""Budget utilization: per-budget N+1 sums vs. the single rollup join.
+
+Run from backend/:  python -m benchmarks.bench_budgets
+"""
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import Budget, Transaction, User
+from app.services import budget_service, rollup_service
+
+MONTH = "2024-06"
+TRANSACTIONS = 20_000
+BUDGET_COUNTS = (1, 10, 50, 200)
+REPEAT = 20
+
+
+def n_plus_one(db, user_id, month):
+    # The pre-engine approach: one SUM per budget
+    budgets = db.query(Budget).filter(Budget.user_id == user_id, Budget.month == month).all()
+    return [budget_service.compute_utilization(db, user_id, b.category, b.month) for b in budgets]
+
+
+def measure(engine, fn):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    elapsed = (time.perf_counter() - start) / REPEAT
+    event.remove(engine, "before_cursor_execute", record)
+    return len(statements) // REPEAT, elapsed * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.sqlite3")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        user = User(email="bench@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+        rng = random.Random(0)
+        categories = [f"cat{i}" for i in range(max(BUDGET_COUNTS))]
+        start = datetime(2024, 1, 1)
+        db.add_all(
+            Transaction(
+                user_id=user_id,
+                kind="expense",
+                amount=rng.randint(1, 500),
+                category=rng.choice(categories),
+                created_at=start + timedelta(minutes=rng.randint(0, 60 * 24 * 365)),
+            )
+            for _ in range(TRANSACTIONS)
+        )
+        db.commit()
+        rollup_service.rebuild_rollups(db)
+
+        print(f"{'budgets':>8} {'n+1 queries':>12} {'n+1 ms':>9} {'grouped queries':>16} {'grouped ms':>11}")
+        created = 0
+        for count in BUDGET_COUNTS:
+            db.add_all(
+                Budget(user_id=user_id, category=categories[i], month=MONTH, cap_amount=1000)
+                for i in range(created, count)
+            )
+            db.commit()
+            created = count
+            old_q, old_ms = measure(engine, lambda: n_plus_one(db, user_id, MONTH))
+            new_q, new_ms = measure(engine, lambda: budget_service.get_budgets(db, user_id, MONTH))
+            print(f"{count:>8} {old_q:>12} {old_ms:>9.2f} {new_q:>16} {new_ms:>11.2f}")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
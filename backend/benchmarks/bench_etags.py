@@ -0,0 +1,50 @@
+"""Polling cost of the list endpoints with and without If-None-Match.
+
+Run from backend/:  python -m benchmarks.bench_etags   (needs httpx for TestClient)
+"""
+import os
+import statistics
+import tempfile
+import time
+
+POLLS = 200
+ROUTES = ["/transactions/?limit=200", "/budgets/", "/reminders/", "/goals/"]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_URL"] = f"sqlite:///{tmp}/bench.sqlite3"
+        from fastapi.testclient import TestClient
+        from sqlalchemy import event
+
+        from app.db import SessionLocal, create_tables, engine
+        from app.main import app
+        from app.routers import auth
+        from app.seed import generate
+
+        create_tables()
+        db = SessionLocal()
+        (user_id, email), = generate(db, users=1, transactions=5000, budgets=30, reminders=50, goals=10)
+        db.close()
+        headers = {"Authorization": f"Bearer {auth.create_access_token({'sub': email, 'uid': user_id, 'active': 'true'})}"}
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(1))
+
+        with TestClient(app) as client:
+            for route in ROUTES:
+                etag = client.get(route, headers=headers).headers["etag"]
+                for label, extra in (("full", {}), ("304", {"If-None-Match": etag})):
+                    times = []
+                    statements.clear()
+                    for _ in range(POLLS):
+                        start = time.perf_counter()
+                        response = client.get(route, headers={**headers, **extra})
+                        times.append(time.perf_counter() - start)
+                    assert response.status_code == (304 if extra else 200)
+                    print(f"{route:<26} {label:>4}: median {statistics.median(times) * 1000:6.2f} ms, "
+                          f"{len(statements) / POLLS:.1f} statements/poll, {len(response.content)} bytes")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
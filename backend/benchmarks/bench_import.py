@@ -0,0 +1,101 @@
+"""Bulk import throughput and peak memory vs. one create_transaction per row.
+
+Run from backend/:  python -m benchmarks.bench_import
+"""
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from decimal import Decimal
+
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base, make_engine
+from app.models import User
+from app.schemas import TxIn
+from app.services import import_service, transaction_service
+
+ROWS = 100_000
+PER_ROW_SAMPLE = 2_000
+
+
+def make_rows(n):
+    rng = random.Random(0)
+    for i in range(n):
+        yield {
+            "kind": rng.choice(("income", "expense")),
+            "amount": f"{rng.randint(1, 50_000) / 100:.2f}",
+            "category": f"cat{rng.randint(0, 19)}",
+            "note": f"row {i}",
+            "created_at": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00",
+        }
+
+
+def csv_file(path, n):
+    with open(path, "w") as f:
+        f.write("kind,amount,category,note,created_at\n")
+        for r in make_rows(n):
+            f.write(f"{r['kind']},{r['amount']},{r['category']},{r['note']},{r['created_at']}\n")
+
+
+def json_file(path, n):
+    with open(path, "w") as f:
+        f.write("[")
+        for i, r in enumerate(make_rows(n)):
+            f.write(("," if i else "") + json.dumps(r))
+        f.write("]")
+
+
+def session(tmp, name):
+    engine = make_engine(f"sqlite:///{tmp}/{name}.sqlite3")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    user = User(email="bench@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return engine, db, user.id
+
+
+def run_import(tmp, fmt, path, trace):
+    engine, db, user_id = session(tmp, f"{fmt}_{'traced' if trace else 'timed'}")
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        result = import_service.import_transactions(db, user_id, f, fmt)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if trace else 0
+    tracemalloc.stop()
+    assert result.imported == ROWS, result
+    db.close()
+    engine.dispose()
+    return elapsed, peak
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt, writer in (("csv", csv_file), ("json", json_file)):
+            path = f"{tmp}/import.{fmt}"
+            writer(path, ROWS)
+            # Timed and memory-traced runs are separate: tracing slows the import down
+            elapsed, _ = run_import(tmp, fmt, path, trace=False)
+            _, peak = run_import(tmp, fmt, path, trace=True)
+            print(f"bulk {fmt:>4}: {ROWS} rows in {elapsed:.2f}s "
+                  f"({ROWS / elapsed:,.0f} rows/s), peak traced memory {peak / 2**20:.1f} MiB")
+
+        engine, db, user_id = session(tmp, "per_row")
+        rows = [TxIn(kind=r["kind"], amount=Decimal(r["amount"]), category=r["category"],
+                     note=r["note"]) for r in make_rows(PER_ROW_SAMPLE)]
+        start = time.perf_counter()
+        for tx in rows:
+            transaction_service.create_transaction(db, tx, user_id)
+        elapsed = time.perf_counter() - start
+        print(f"per-row create_transaction: {PER_ROW_SAMPLE / elapsed:,.0f} rows/s "
+              f"(~{ROWS / (PER_ROW_SAMPLE / elapsed):.0f}s for {ROWS} rows)")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
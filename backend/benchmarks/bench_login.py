@@ -0,0 +1,78 @@
+"""Latency of non-auth requests while a burst of logins is in flight.
+
+"inline" verifies passwords on the event loop (the previous behaviour);
+"pool" uses the bounded password-hash executor. Requests go through the ASGI
+app in-process, as under a single Uvicorn worker.
+
+Run from backend/:  python -m benchmarks.bench_login   (needs httpx)
+"""
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+LOGIN_CLIENTS = 8
+PROBES = 200
+
+
+async def measure(app, token):
+    import httpx
+
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies = []
+    done = asyncio.Event()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def login_loop():
+            while not done.is_set():
+                response = await client.post(
+                    "/auth/token", data={"username": "bench@example.com", "password": "benchpass"}
+                )
+                assert response.status_code == 200, response.text
+
+        async def probe():
+            for _ in range(PROBES):
+                start = time.perf_counter()
+                response = await client.get("/reminders/", headers=headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.text
+            done.set()
+
+        await asyncio.gather(probe(), *(login_loop() for _ in range(LOGIN_CLIENTS)))
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_URL"] = f"sqlite:///{tmp}/bench.sqlite3"
+        os.environ["LOGIN_RATE_LIMIT"] = "0"
+        from app.db import SessionLocal, create_tables
+        from app.main import app
+        from app.models import User
+        from app.routers import auth
+
+        create_tables()
+        db = SessionLocal()
+        user = User(email="bench@example.com", hashed_password=auth.get_password_hash("benchpass"))
+        db.add(user)
+        db.commit()
+        token = auth.create_access_token(auth.user_claims(user))
+        db.close()
+
+        pooled = auth.verify_and_update_password
+
+        async def inline(plain_password, hashed_password):
+            return auth.get_pwd_context().verify_and_update(plain_password, hashed_password)
+
+        print(f"{LOGIN_CLIENTS} concurrent login loops, {PROBES} probe requests to /reminders/")
+        for label, verify in (("inline", inline), ("pool", pooled)):
+            auth.verify_and_update_password = verify
+            p50, p99 = asyncio.run(measure(app, token))
+            print(f"{label:>7}: p50 {p50:7.2f} ms   p99 {p99:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
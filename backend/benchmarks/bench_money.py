@@ -0,0 +1,150 @@
+"""Money aggregation and serialization over a 200k-transaction user, with the
+exactness of the totals: SUM(amount) and rollup rebuild/verify, budget
+utilization per (category, month), GET /analytics, a 10k-row list page and a
+CSV export. Totals are checked against exact Decimal sums of the inserted
+amounts. Last, the same amounts in a NUMERIC table (REAL on SQLite) and a
+Cents table, timed alternately in one process so machine noise hits both.
+
+Run from backend/:  python -m benchmarks.bench_money
+"""
+import random
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import Column, Integer, MetaData, Numeric, String, Table, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app import schemas, serialization
+from app.db import Base, make_engine
+from app.models import MonthlyRollup, Transaction, User
+from app.money import Cents, cents
+from app.services import analytics_service, budget_service, export_service, rollup_service, transaction_service
+
+ROWS = 200_000
+PAGE = 10_000
+CATEGORIES = 20
+REPEAT = 5
+START = datetime(2023, 1, 1)
+
+
+def best_ms(fn):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def compare_layouts(db):
+    """SUM, per-(month, category) sums and reading + JSON-encoding all amounts,
+    NUMERIC vs. integer cents, best of REPEAT alternating runs."""
+    metadata = MetaData()
+    tables = {
+        layout: Table(f"bench_amounts_{layout}", metadata, Column("id", Integer, primary_key=True),
+                      Column("month", String), Column("category", String), Column("amount", column_type))
+        for layout, column_type in (("numeric", Numeric(12, 2)), ("cents", Cents))
+    }
+    metadata.create_all(db.connection())
+    month = func.strftime("%Y-%m", Transaction.created_at)
+    rows = [dict(row._mapping) for row in db.execute(
+        select(month.label("month"), Transaction.category, Transaction.amount))]
+    for table in tables.values():
+        db.execute(table.insert(), rows)
+
+    def workloads(table, raw):
+        amount = cents(table.c.amount) if raw else table.c.amount
+        grouped = select(table.c.month, table.c.category, func.sum(amount)).group_by(table.c.month, table.c.category)
+        return [
+            ("SUM(amount)", lambda: db.scalar(select(func.sum(table.c.amount)))),
+            ("sums per (month, category)", lambda: {(m, c): t for m, c, t in db.execute(grouped)}),
+            ("read all amounts", lambda: db.execute(select(table.c.amount)).scalars().all()),
+            ("read + JSON-encode all amounts",
+             lambda: serialization.dumps(db.execute(select(table.c.amount)).scalars().all())),
+        ]
+
+    runs = {layout: workloads(table, layout == "cents") for layout, table in tables.items()}
+    best = defaultdict(lambda: float("inf"))
+    for _ in range(REPEAT):
+        for i in range(len(runs["numeric"])):
+            for layout, fns in runs.items():
+                label, fn = fns[i]
+                start = time.perf_counter()
+                fn()
+                best[label, layout] = min(best[label, layout], time.perf_counter() - start)
+    print("  same amounts, alternating runs        numeric       cents")
+    for label, _ in runs["numeric"]:
+        old, new = best[label, "numeric"] * 1000, best[label, "cents"] * 1000
+        print(f"  {label:<34} {old:9.1f} ms {new:8.1f} ms  ({old / new:.2f}x)")
+
+
+def seed(db, user_id):
+    rng = random.Random(0)
+    rows, expected = [], defaultdict(Decimal)
+    for i in range(ROWS):
+        amount = Decimal(rng.randint(1, 99_999)) / 100
+        created_at = START + timedelta(minutes=5 * i)
+        category = f"cat{i % CATEGORIES}"
+        rows.append({"user_id": user_id, "kind": "expense", "amount": amount, "category": category,
+                     "note": "", "created_at": created_at})
+        expected[(created_at.strftime("%Y-%m"), category)] += amount
+    for start in range(0, ROWS, 50_000):
+        db.execute(Transaction.__table__.insert(), rows[start:start + 50_000])
+    db.commit()
+    return expected
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{tmp}/money.sqlite3")
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        db = Session()
+        user = User(email="money@bench.example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+        expected = seed(db, user_id)
+        rollup_service.rebuild_rollups(db)
+
+        total = db.scalar(select(func.sum(Transaction.amount)))
+        exact = sum(expected.values())
+        stored = {(r.month, r.category): r.total for r in db.execute(select(MonthlyRollup)).scalars()}
+        wrong = sum(1 for key, value in expected.items() if Decimal(stored[key]) != value)
+        utilization_off = sum(
+            1 for month, category in expected
+            if budget_service.compute_utilization(db, user_id, category, month) != float(expected[(month, category)])
+        )
+        raw, raw_type = db.connection().exec_driver_sql("SELECT sum(amount), typeof(sum(amount)) FROM transactions").one()
+        print(f"{ROWS:,} expenses; SUM(amount) = {total} (exact {exact}, {'equal' if Decimal(total) == exact else 'DIFFERENT'})")
+        print(f"  as SQLite computes it: {raw!r} ({raw_type})")
+        print(f"  rollup totals off from exact sums: {wrong} of {len(expected)}; "
+              f"compute_utilization off: {utilization_off}")
+
+        timings = [
+            ("SUM(amount), all rows", lambda: db.scalar(select(func.sum(Transaction.amount)))),
+            ("rebuild_rollups", lambda: rollup_service.rebuild_rollups(db)),
+            ("verify_rollups", lambda: rollup_service.verify_rollups(db)),
+            (f"compute_utilization x{len(expected)}", lambda: [
+                budget_service.compute_utilization(db, user_id, category, month) for month, category in expected
+            ]),
+            ("get_analytics, all months", lambda: analytics_service.get_analytics(
+                db, user_id, START.date(), (START + timedelta(minutes=5 * ROWS)).date())),
+            (f"list {PAGE:,} rows + json_list", lambda: serialization.json_list(
+                schemas.TxOut, transaction_service.list_transaction_rows(db, user_id, limit=PAGE)[0])),
+            ("CSV export, all rows", lambda: b"".join(export_service.stream_export(
+                Session, export_service.transaction_export_query(user_id),
+                export_service.TRANSACTION_COLUMNS, "csv"))),
+        ]
+        for label, fn in timings:
+            print(f"  {label:<34} {best_ms(fn):9.1f} ms")
+        compare_layouts(db)
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Reminder scheduler with 1M upcoming reminders: load time and memory, and cost
+per add/remove as the scheduler grows.
+
+Run from backend/:  python -m benchmarks.bench_scheduler
+"""
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from app.scheduler import ReminderScheduler
+
+REMINDERS = 1_000_000
+USERS = 10_000
+CHANGES = 20_000
+TODAY = date(2024, 1, 1)
+
+
+def rows(n, rng):
+    return [(i, rng.randrange(USERS), TODAY + timedelta(days=rng.randrange(365))) for i in range(n)]
+
+
+def per_change_us(sched, rng, start_id):
+    """Median microseconds per add and per remove of CHANGES reminders."""
+    ids = range(start_id, start_id + CHANGES)
+    adds, removes = [], []
+    for reminder_id in ids:
+        user_id, due = rng.randrange(USERS), TODAY + timedelta(days=rng.randrange(365))
+        t = time.perf_counter()
+        sched.add(reminder_id, user_id, due)
+        adds.append(time.perf_counter() - t)
+    for reminder_id in ids:
+        t = time.perf_counter()
+        sched.remove(reminder_id)
+        removes.append(time.perf_counter() - t)
+    return statistics.median(adds) * 1e6, statistics.median(removes) * 1e6
+
+
+def main():
+    rng = random.Random(0)
+    for n in (10_000, 100_000, REMINDERS):
+        data = rows(n, rng)
+        sched = ReminderScheduler(clock=lambda: TODAY)
+        tracemalloc.start()
+        sched.load(data)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        sched = ReminderScheduler(clock=lambda: TODAY)
+        t = time.perf_counter()
+        sched.load(data)
+        load_s = time.perf_counter() - t
+        add_us, remove_us = per_change_us(sched, rng, n)
+        print(f"{n:>9,} reminders: load {load_s:5.2f}s ({size / 2**20:6.1f} MiB), "
+              f"add {add_us:4.1f} us, remove {remove_us:4.1f} us")
+
+    # Firing a day's events pops only that day's heap entries
+    t = time.perf_counter()
+    events = sched.pop_events(TODAY + timedelta(days=1))
+    print(f"pop_events for 2 days: {len(events):,} events in {(time.perf_counter() - t) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
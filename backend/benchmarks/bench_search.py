@@ -0,0 +1,84 @@
+"""Transaction search over a million-row ledger: GET /transactions/search
+latency (ranked page plus facet counts) for common, rare, prefix and
+multi-word queries.
+
+Run from backend/:  python -m benchmarks.bench_search
+"""
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+from app.models import Transaction, User
+from app.services import search_service
+
+ROWS = 1_000_000
+USERS = 100
+QUERIES = 200
+BATCH = 10_000
+
+MERCHANTS = [f"{a}{b}" for a in ("blue", "green", "red", "north", "south", "city", "corner", "grand", "old", "new")
+             for b in ("bottle", "market", "grill", "books", "pharmacy", "garage", "bakery", "cinema", "hardware",
+                       "florist", "deli", "gym", "taxi", "hotel", "airline", "bistro", "tailor", "vet", "salon", "bar")]
+WORDS = ["coffee", "lunch", "dinner", "groceries", "fuel", "parking", "rent", "refund", "gift", "subscription",
+         "ticket", "snack", "taxi", "hotel", "flight", "pharmacy", "books", "repair", "insurance", "fee"]
+CATEGORIES = ["food", "transport", "housing", "health", "leisure", "shopping", "travel", "utilities"]
+QUERY_KINDS = {
+    "common word": lambda rng: rng.choice(WORDS),
+    "merchant": lambda rng: rng.choice(MERCHANTS),
+    "prefix": lambda rng: rng.choice(MERCHANTS)[:5] + "*",
+    "two words": lambda rng: f"{rng.choice(WORDS)} {rng.choice(MERCHANTS)}",
+}
+
+
+def seed(db, rng):
+    users = [User(email=f"user{i}@bench.example.com", hashed_password="x") for i in range(USERS)]
+    db.add_all(users)
+    db.commit()
+    user_ids = [user.id for user in users]
+    start = datetime(2022, 1, 1)
+    table = Transaction.__table__
+    for offset in range(0, ROWS, BATCH):
+        db.execute(table.insert(), [
+            {"user_id": rng.choice(user_ids), "kind": "expense", "amount": rng.randrange(100, 20000) / 100,
+             "category": rng.choice(CATEGORIES), "created_at": start + timedelta(minutes=rng.randrange(1_500_000)),
+             "note": f"{rng.choice(WORDS)} {rng.choice(MERCHANTS)} {rng.choice(WORDS)}"}
+            for _ in range(BATCH)
+        ])
+    db.commit()
+    return user_ids
+
+
+def main():
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/search.sqlite3")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        t = time.perf_counter()
+        user_ids = seed(db, rng)
+        print(f"{ROWS:,} transactions for {USERS} users, indexed on insert: {time.perf_counter() - t:.1f}s")
+
+        for name, make_query in QUERY_KINDS.items():
+            times, hits = [], []
+            for _ in range(QUERIES):
+                user_id, q = rng.choice(user_ids), make_query(rng)
+                t = time.perf_counter()
+                result = search_service.search_transactions(db, user_id, q)
+                times.append(time.perf_counter() - t)
+                hits.append(result.total)
+            times.sort()
+            print(f"  {name:12}  p50 {statistics.median(times) * 1000:5.2f} ms  "
+                  f"p95 {times[int(len(times) * 0.95)] * 1000:5.2f} ms  "
+                  f"(median {statistics.median(hits):.0f} matches)")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
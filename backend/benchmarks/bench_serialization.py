@@ -0,0 +1,80 @@
+"""List endpoint serialization per 10k rows: ORM objects and Pydantic models
+re-validated by FastAPI's response_model vs. plain column rows validated once
+and encoded by serialization.json_list.
+
+Run from backend/:  python -m benchmarks.bench_serialization
+"""
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import schemas, serialization
+from app.db import Base
+from app.models import Transaction, User
+from app.services import transaction_service
+
+ROWS = 10_000
+REPEAT = 10
+
+
+def best_ms(fn):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.sqlite3")
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        user = User(email="bench@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+        start = datetime(2024, 1, 1)
+        db.execute(Transaction.__table__.insert(), [
+            {"user_id": user_id, "kind": "expense", "amount": Decimal(i % 5000) / 100 + 1,
+             "category": f"cat{i % 20}", "note": "coffee", "created_at": start + timedelta(minutes=i)}
+            for i in range(ROWS)
+        ])
+        db.commit()
+
+        # What FastAPI does with response_model=list[TxOut]: validate, then dump_json
+        response_model = TypeAdapter(list[schemas.TxOut])
+
+        def before_fetch():
+            db.expunge_all()
+            return transaction_service.list_transactions(db, user_id)[0]
+
+        def after_fetch():
+            return transaction_service.list_transaction_rows(db, user_id)[0]
+
+        models, rows = before_fetch(), after_fetch()
+        encode = {
+            "before": lambda: response_model.dump_json(response_model.validate_python(models, from_attributes=True)),
+            "after": lambda: serialization.json_list(schemas.TxOut, rows).body,
+        }
+        assert encode["before"]() == encode["after"](), "the fast path must produce the same JSON"
+
+        print(f"GET /transactions/ with {ROWS:,} rows (best of {REPEAT}, orjson "
+              f"{'on' if serialization.orjson else 'off'}):")
+        for name, fetch in (("before", before_fetch), ("after", after_fetch)):
+            fetch_ms = best_ms(fetch)
+            encode_ms = best_ms(encode[name])
+            print(f"  {name:6}  fetch {fetch_ms:6.1f} ms  serialize {encode_ms:6.1f} ms  "
+                  f"total {fetch_ms + encode_ms:6.1f} ms")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Pool checkouts per authenticated request under concurrent load.
+
+Uses subject-only tokens with the user cache disabled so the auth dependency
+always queries the users table: with the shared request-scoped session that
+lookup and the handler's query use one checkout (previously two).
+
+Run from backend/:  python -m benchmarks.bench_sessions   (needs httpx for TestClient)
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REQUESTS = 400
+WORKERS = 16
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_URL"] = f"sqlite:///{tmp}/bench.sqlite3"
+        from fastapi.testclient import TestClient
+        from sqlalchemy import event
+
+        from app.cache import TTLCache
+        from app.db import SessionLocal, create_tables, engine
+        from app.main import app
+        from app.models import User
+        from app.routers import auth
+
+        create_tables()
+        db = SessionLocal()
+        db.add(User(email="bench@example.com", hashed_password="x"))
+        db.commit()
+        db.close()
+
+        auth.user_cache = TTLCache(maxsize=0)
+        headers = {"Authorization": f"Bearer {auth.create_access_token({'sub': 'bench@example.com'})}"}
+        checkouts = []
+        event.listen(engine, "checkout", lambda *args: checkouts.append(1))
+
+        with TestClient(app) as client:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(WORKERS) as pool:
+                statuses = list(pool.map(lambda _: client.get("/goals/", headers=headers).status_code,
+                                         range(REQUESTS)))
+            elapsed = time.perf_counter() - start
+
+        assert set(statuses) == {200}, statuses
+        print(f"{WORKERS} workers, {REQUESTS} requests: {len(checkouts) / REQUESTS:.2f} "
+              f"pool checkouts/request, {REQUESTS / elapsed:.0f} req/s, "
+              f"pool size {engine.pool.size()}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Cold start: import time of app.main, broken down by package, and the time
+to import, start and serve a first authenticated request, against a budget.
+
+Every run is a fresh interpreter. The breakdown comes from python -X
+importtime; each run then times `import app.main`, the lifespan (scheduler
+load) and a first GET /transactions/, which also imports PyJWT on demand.
+Exits non-zero when the median import plus first request is over budget.
+
+Run from backend/:  python -m benchmarks.bench_startup [--budget-ms 1500]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+RUNS = 7
+TOP = 15
+DEFAULT_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1500"))
+
+# Runs in the child interpreter: nothing is imported before the clock starts
+CHILD = """
+import time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+import asyncio, json, sys
+
+async def first_request(token):
+    sent = []
+    scope = {"type": "http", "method": "GET", "path": "/transactions/", "query_string": b"limit=50",
+             "headers": [(b"authorization", b"Bearer " + token.encode())]}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    async with app.main.app.router.lifespan_context(app.main.app):
+        started = time.perf_counter()
+        await app.main.app(scope, receive, send)
+        served = time.perf_counter()
+    assert sent[0]["status"] == 200, sent[0]
+    return started, served
+
+started, served = asyncio.run(first_request(sys.argv[1]))
+print(json.dumps({"import": imported - start, "lifespan": started - imported, "request": served - started}))
+"""
+
+
+def import_breakdown(env):
+    """Self import time in ms per package (app modules individually), from -X importtime."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                            cwd=BACKEND, env=env, capture_output=True, text=True, check=True)
+    totals = Counter()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        package = name if name.startswith("app.") else name.split(".")[0]
+        totals[package] += int(self_us) / 1000
+    return totals
+
+
+def prepare(tmp):
+    """A database with one user and a page of their transactions, and a token for the user."""
+    from app.db import Base, make_engine
+    from app.models import Transaction, User
+    from app.routers.auth import create_access_token, user_claims
+    from sqlalchemy.orm import Session
+
+    url = f"sqlite:///{tmp}/startup.sqlite3"
+    engine = make_engine(url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        user = User(email="cold@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        db.add_all(Transaction(user_id=user.id, kind="expense", amount=5, category="food") for _ in range(50))
+        db.commit()
+        token = create_access_token(user_claims(user))
+    engine.dispose()
+    return url, token
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="median import + first request must stay under this (default %(default)s)")
+    parser.add_argument("--runs", type=int, default=RUNS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url, token = prepare(tmp)
+        env = {**os.environ, "DB_URL": url}
+
+        breakdown = import_breakdown(env)
+        print(f"import app.main: {sum(breakdown.values()):.0f} ms of module code, top {TOP}:")
+        for package, ms in breakdown.most_common(TOP):
+            print(f"  {ms:7.1f} ms  {package}")
+
+        runs = []
+        for _ in range(args.runs):
+            result = subprocess.run([sys.executable, "-c", CHILD, token], cwd=BACKEND, env=env,
+                                    capture_output=True, text=True, check=True)
+            runs.append(json.loads(result.stdout))
+
+    medians = {phase: statistics.median(run[phase] for run in runs) * 1000 for phase in runs[0]}
+    total = medians["import"] + medians["request"]
+    print(f"\nmedian of {args.runs} cold starts: " + ", ".join(f"{phase} {ms:.0f} ms" for phase, ms in medians.items()))
+    print(f"import + first request: {total:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    if total > args.budget_ms:
+        print("over budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
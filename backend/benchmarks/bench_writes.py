@@ -0,0 +1,88 @@
+"""Write throughput of POST /transactions at 1, 10 and 100 concurrent writers:
+a commit per request (WRITE_BATCHING=false) vs. group commit, with SQLite
+synchronous=NORMAL (the default) and FULL (an fsync per commit).
+
+Each writer is a thread with its own session calling
+transaction_service.create_transaction, as the threadpool does for the sync
+routers.
+
+Run from backend/:  python -m benchmarks.bench_writes [--wait-ms 2]
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app import db as app_db, group_commit
+from app.db import Base, make_engine
+from app.models import Transaction, User
+from app.schemas import TxIn
+from app.services import transaction_service
+
+WRITES = 2000
+WRITERS = (1, 10, 100)
+
+
+def run(tmp, writers, batching, wait_ms):
+    group_commit.WRITE_BATCHING = batching
+    engine = make_engine(f"sqlite:///{tmp}/writes-{writers}-{batching}.sqlite3")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        user = User(email="writer@bench.example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    if batching:
+        group_commit._committers[engine] = group_commit.GroupCommitter(engine, max_wait=wait_ms / 1000)
+    tx = TxIn(kind="expense", amount=Decimal("4.50"), category="food", note="coffee")
+
+    def write(_):
+        started = time.perf_counter()
+        with Session() as db:
+            transaction_service.create_transaction(db, tx, user_id)
+        return time.perf_counter() - started
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        latencies = sorted(pool.map(write, range(WRITES)))
+    elapsed = time.perf_counter() - start
+    batches = None
+    if batching:
+        committer = group_commit._committers.pop(engine)
+        committer.stop()
+        batches = committer.batches
+    with Session() as db:
+        assert db.scalar(select(func.count(Transaction.id))) == WRITES
+    engine.dispose()
+    return WRITES / elapsed, statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.95)] * 1000, batches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--wait-ms", type=float, default=group_commit.WRITE_BATCH_WAIT_MS,
+                        help="group commit wait for more writes (default %(default)s)")
+    args = parser.parse_args()
+
+    print(f"{WRITES:,} transactions per run; group commit waits {args.wait_ms:g} ms, "
+          f"up to {group_commit.WRITE_BATCH_MAX} writes per batch")
+    for synchronous in ("NORMAL", "FULL"):
+        app_db.SQLITE_SYNCHRONOUS = synchronous
+        print(f"\nsynchronous={synchronous}")
+        for writers in WRITERS:
+            with tempfile.TemporaryDirectory() as tmp:
+                for batching in (False, True):
+                    rate, p50, p95, batches = run(tmp, writers, batching, args.wait_ms)
+                    label = "group commit" if batching else "per request "
+                    extra = f"  ({WRITES / batches:.1f} writes/commit)" if batches else ""
+                    print(f"  {writers:>3} writers  {label}  {rate:8,.0f} writes/s  "
+                          f"p50 {p50:6.2f} ms  p95 {p95:7.2f} ms{extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compare two benchmark result files and flag regressions.
+
+Understands load.py output and pytest-benchmark's --benchmark-json output.
+Exits with status 1 when any shared entry got slower by more than --threshold %.
+
+Run from backend/:
+    python -m benchmarks.compare benchmarks/results/load-abc123.json benchmarks/results/load-def456.json
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def load_metrics(path: Path) -> dict:
+    """{entry name: {metric: value}} where larger values are slower."""
+    data = json.loads(path.read_text())
+    if "benchmarks" in data:  # pytest-benchmark
+        return {
+            b["name"]: {"median_us": b["stats"]["median"] * 1e6, "max_us": b["stats"]["max"] * 1e6}
+            for b in data["benchmarks"]
+        }
+    return {
+        route: {"p50_ms": r["p50_ms"], "p95_ms": r["p95_ms"], "p99_ms": r["p99_ms"],
+                "ms_per_request": 1000 / r["throughput_rps"] if r["throughput_rps"] else None}
+        for route, r in data["routes"].items()
+    }
+
+
+def compare(old: dict, new: dict, threshold: float):
+    rows, regressions = [], []
+    for name in sorted(old.keys() & new.keys()):
+        for metric, before in old[name].items():
+            after = new[name].get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before * 100
+            rows.append((name, metric, before, after, change))
+            # Tail latencies are noisy; only medians and throughput gate
+            if change > threshold and metric in ("median_us", "p50_ms", "ms_per_request"):
+                regressions.append((name, metric, change))
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent slowdown that fails")
+    args = parser.parse_args(argv)
+
+    old, new = load_metrics(args.old), load_metrics(args.new)
+    rows, regressions = compare(old, new, args.threshold)
+    for name, metric, before, after, change in rows:
+        print(f"{name:<62} {metric:<15} {before:>12.2f} -> {after:>12.2f}  {change:+7.1f}%")
+    for name in sorted(old.keys() ^ new.keys()):
+        print(f"{name:<62} only in {'old' if name in old else 'new'}")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0f}%:")
+        for name, metric, change in regressions:
+            print(f"  {name} {metric} {change:+.1f}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
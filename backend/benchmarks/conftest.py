@@ -0,0 +1,46 @@
+"""Fixtures for the pytest-benchmark micro-benchmarks in this package.
+
+Run from backend/:  python -m pytest benchmarks --benchmark-json=benchmarks/results/micro.json
+(`tests/` is the default test path, so plain `pytest` does not collect these.)
+"""
+import os
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base, make_engine
+from app.seed import generate
+
+USERS = int(os.getenv("BENCH_USERS", "5"))
+TRANSACTIONS = int(os.getenv("BENCH_TRANSACTIONS", "20000"))
+
+
+@pytest.fixture(scope="session")
+def bench_data(tmp_path_factory):
+    """A file-backed database filled by app.seed.generate, and the users it created."""
+    path = tmp_path_factory.mktemp("bench") / "bench.sqlite3"
+    engine = make_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    users = generate(db, users=USERS, transactions=TRANSACTIONS, budgets=24, reminders=50, goals=5)
+    db.close()
+    yield engine, users
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def bench_engine(bench_data):
+    return bench_data[0]
+
+
+@pytest.fixture(scope="session")
+def bench_user_id(bench_data):
+    return bench_data[1][0][0]
+
+
+@pytest.fixture
+def bench_db(bench_engine):
+    db = sessionmaker(bind=bench_engine)()
+    yield db
+    db.rollback()
+    db.close()
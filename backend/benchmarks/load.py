@@ -0,0 +1,193 @@
+"""HTTP load test against a local Uvicorn: throughput and p50/p95/p99 per route.
+
+Seeds a fresh database with app.seed.generate, starts `uvicorn app.main:app` on
+it, logs every synthetic user in, then drives each route in turn with
+--concurrency asyncio workers for --duration seconds. Results are written as
+JSON (see compare.py for diffing two runs).
+
+Run from backend/:
+    python -m benchmarks.load --users 20 --transactions 5000 --duration 10
+    python -m benchmarks.load --routes "GET /analytics/" "POST /transactions/"
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+BACKEND = Path(__file__).resolve().parents[1]
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+MONTH = datetime.utcnow().strftime("%Y-%m")
+
+# name -> (method, path, JSON body or None)
+ROUTES = {
+    "GET /auth/me": ("GET", "/auth/me", None),
+    "GET /transactions/?limit=50": ("GET", "/transactions/?limit=50", None),
+    "GET /transactions/?kind=expense&category=groceries&limit=50":
+        ("GET", "/transactions/?kind=expense&category=groceries&limit=50", None),
+    "GET /transactions/totals": ("GET", "/transactions/totals", None),
+    "POST /transactions/": ("POST", "/transactions/", {"kind": "expense", "amount": "9.99", "category": "dining"}),
+    "GET /budgets/": ("GET", f"/budgets/?month={MONTH}", None),
+    "GET /reminders/": ("GET", "/reminders/", None),
+    "GET /goals/": ("GET", "/goals/", None),
+    "GET /analytics/": ("GET", "/analytics/", None),
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def seed(db_url, args):
+    env = {**os.environ, "DB_URL": db_url}
+    subprocess.run(
+        [sys.executable, "app/seed.py", "--users", str(args.users), "--transactions", str(args.transactions),
+         "--password", args.password],
+        cwd=BACKEND, env=env, check=True, stdout=subprocess.DEVNULL,
+    )
+
+
+def start_server(db_url, port, workers):
+    env = {**os.environ, "DB_URL": db_url, "LOGIN_RATE_LIMIT": "0"}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND, env=env,
+    )
+
+
+async def wait_ready(client, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/openapi.json")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def login(client, users, password):
+    headers = []
+    for i in range(users):
+        response = await client.post("/auth/token", data={"username": f"user{i}@bench.example.com",
+                                                          "password": password})
+        response.raise_for_status()
+        headers.append({"Authorization": f"Bearer {response.json()['access_token']}"})
+    return headers
+
+
+async def drive(client, route, headers, concurrency, duration):
+    method, path, body = ROUTES[route]
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(seed):
+        nonlocal errors
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body, headers=rng.choice(headers))
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    ms = lambda value: None if value is None else round(value * 1000, 2)  # noqa: E731
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+    }
+
+
+async def run(args, base_url):
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await wait_ready(client)
+        headers = await login(client, args.users, args.password)
+        results = {}
+        for route in args.routes:
+            results[route] = await drive(client, route, headers, args.concurrency, args.duration)
+            r = results[route]
+            print(f"{route:<62} {r['throughput_rps']:>8.1f} req/s  p50 {r['p50_ms']:>7} ms  "
+                  f"p95 {r['p95_ms']:>7} ms  p99 {r['p99_ms']:>7} ms  errors {r['errors']}")
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--transactions", type=int, default=2000, help="per user")
+    parser.add_argument("--password", default="bench123")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per route")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--routes", nargs="+", default=list(ROUTES), choices=list(ROUTES))
+    parser.add_argument("--out", type=Path, help="JSON output (default benchmarks/results/load-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    commit = git_commit()
+    out = args.out or RESULTS_DIR / f"load-{commit}.json"
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = f"sqlite:///{tmp}/load.sqlite3"
+        seed(db_url, args)
+        port = free_port()
+        server = start_server(db_url, port, args.workers)
+        try:
+            results = asyncio.run(run(args, f"http://127.0.0.1:{port}"))
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    report = {
+        "kind": "load",
+        "commit": commit,
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("routes", "out")},
+        "routes": results,
+    }
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"wrote {out}")
+
+
+if __name__ == "__main__":
+    main()
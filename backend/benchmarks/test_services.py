@@ -0,0 +1,108 @@
+"""Micro-benchmarks for the service functions behind each router.
+
+Benchmarks that create rows either delete them again or roll back, except
+create_transaction, whose few hundred extra rows are noise next to the seeded set.
+"""
+import io
+from datetime import date, datetime
+from decimal import Decimal
+
+import jwt
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Goal
+from app.routers import auth
+from app.schemas import BudgetIn, TxIn
+from app.services import (
+    analytics_service, budget_service, export_service, import_service, reminder_service,
+    transaction_service,
+)
+
+pytest.importorskip("pytest_benchmark")
+
+MONTH = datetime.utcnow().strftime("%Y-%m")
+
+
+def test_list_transactions_first_page(benchmark, bench_db, bench_user_id):
+    page, cursor = benchmark(transaction_service.list_transactions, bench_db, bench_user_id, limit=50)
+    assert len(page) == 50 and cursor
+
+
+def test_list_transactions_filtered(benchmark, bench_db, bench_user_id):
+    benchmark(transaction_service.list_transactions, bench_db, bench_user_id, kind="expense",
+              category="groceries", limit=50)
+
+
+def test_monthly_totals(benchmark, bench_db, bench_user_id):
+    benchmark(transaction_service.get_monthly_totals, bench_db, bench_user_id)
+
+
+def test_create_transaction(benchmark, bench_db, bench_user_id):
+    tx = TxIn(kind="expense", amount=Decimal("12.34"), category="dining")
+    benchmark(transaction_service.create_transaction, bench_db, tx, bench_user_id)
+
+
+def test_bulk_import_1000_rows(benchmark, bench_db, bench_user_id):
+    body = "kind,amount,category,date\n" + "expense,9.99,dining,2024-05-01\n" * 1000
+
+    def run():
+        result = import_service.import_transactions(
+            bench_db, bench_user_id, io.BytesIO(body.encode()), "csv"
+        )
+        bench_db.rollback()
+        return result
+
+    assert benchmark(run).imported == 1000
+
+
+def test_export_csv(benchmark, bench_engine, bench_user_id):
+    factory = sessionmaker(bind=bench_engine)
+    stmt = export_service.transaction_export_query(bench_user_id)
+    benchmark(lambda: sum(len(chunk) for chunk in export_service.stream_export(
+        factory, stmt, export_service.TRANSACTION_COLUMNS, "csv")))
+
+
+def test_analytics_last_year(benchmark, bench_db, bench_user_id):
+    benchmark(analytics_service.get_analytics, bench_db, bench_user_id)
+
+
+def test_budget_utilization(benchmark, bench_db, bench_user_id):
+    benchmark(budget_service.get_budgets, bench_db, bench_user_id)
+
+
+def test_budget_utilization_month(benchmark, bench_db, bench_user_id):
+    benchmark(budget_service.get_budgets, bench_db, bench_user_id, MONTH)
+
+
+def test_create_budget(benchmark, bench_db, bench_user_id):
+    def run():
+        result = budget_service.create_budget(
+            bench_db, BudgetIn(category="benchmark", month=MONTH, cap_amount=Decimal("100")),
+            bench_user_id,
+        )
+        budget_service.delete_budget(bench_db, result["id"], bench_user_id)
+
+    benchmark(run)
+
+
+def test_list_reminders(benchmark, bench_db, bench_user_id):
+    benchmark(reminder_service.list_reminders, bench_db, bench_user_id,
+              date.today(), date.today().replace(year=date.today().year + 1))
+
+
+def test_list_goals(benchmark, bench_db, bench_user_id):
+    benchmark(lambda: bench_db.query(Goal).filter(Goal.user_id == bench_user_id).all())
+
+
+def test_token_roundtrip(benchmark):
+    def run():
+        token = auth.create_access_token({"sub": "user0@bench.example.com", "uid": 1, "active": True})
+        return jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
+
+    benchmark(run)
+
+
+def test_password_verify(benchmark):
+    hashed = auth.get_password_hash("bench123")
+    assert benchmark(auth.get_pwd_context().verify, "bench123", hashed)
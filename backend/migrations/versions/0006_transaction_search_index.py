@@ -0,0 +1,55 @@
+"""transaction search index
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 20:47:03.857849
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# app.models' DDL at this revision, copied so later model changes do not
+# rewrite this migration. IF NOT EXISTS covers databases that create_all
+# already built with the index.
+FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(user_id, note, category, "
+    "content='transactions', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN "
+    "INSERT INTO transactions_fts (rowid, user_id, note, category) "
+    "VALUES (new.id, new.user_id, new.note, new.category); END",
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN "
+    "INSERT INTO transactions_fts (transactions_fts, rowid, user_id, note, category) "
+    "VALUES ('delete', old.id, old.user_id, old.note, old.category); END",
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE ON transactions BEGIN "
+    "INSERT INTO transactions_fts (transactions_fts, rowid, user_id, note, category) "
+    "VALUES ('delete', old.id, old.user_id, old.note, old.category); "
+    "INSERT INTO transactions_fts (rowid, user_id, note, category) "
+    "VALUES (new.id, new.user_id, new.note, new.category); END",
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # FTS5 is SQLite only; other databases have no search index
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for statement in FTS_DDL:
+        op.execute(statement)
+    # Index the existing transactions
+    op.execute("INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for trigger in ("insert", "delete", "update"):
+        op.execute(f"DROP TRIGGER IF EXISTS transactions_fts_{trigger}")
+    op.execute("DROP TABLE IF EXISTS transactions_fts")
@@ -0,0 +1,100 @@
+"""money as integer cents
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 21:52:40.114209
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, [(column, NUMERIC precision, nullable)]) of every money column
+MONEY_COLUMNS = (
+    ("transactions", [("amount", 12, False)]),
+    ("monthly_rollups", [("total", 14, False)]),
+    ("budgets", [("cap_amount", 12, False)]),
+    ("budget_alerts", [("spent", 14, False), ("cap_amount", 12, False)]),
+    ("reminders", [("amount", 12, False)]),
+    ("recurring_rules", [("amount", 12, False)]),
+    ("goals", [("target_amount", 12, False), ("current_amount", 12, True)]),
+    ("goal_contributions", [("amount", 12, False)]),
+)
+
+# The search index triggers of 0006. On SQLite the batch operations below
+# rebuild transactions as a new table, which drops its triggers, so they are
+# dropped first (the amount UPDATE would otherwise re-index every row) and
+# created again afterwards. Notes, categories and ids do not change, so the
+# index itself stays valid.
+FTS_TRIGGERS = (
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN "
+    "INSERT INTO transactions_fts (rowid, user_id, note, category) "
+    "VALUES (new.id, new.user_id, new.note, new.category); END",
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN "
+    "INSERT INTO transactions_fts (transactions_fts, rowid, user_id, note, category) "
+    "VALUES ('delete', old.id, old.user_id, old.note, old.category); END",
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE ON transactions BEGIN "
+    "INSERT INTO transactions_fts (transactions_fts, rowid, user_id, note, category) "
+    "VALUES ('delete', old.id, old.user_id, old.note, old.category); "
+    "INSERT INTO transactions_fts (rowid, user_id, note, category) "
+    "VALUES (new.id, new.user_id, new.note, new.category); END",
+)
+
+
+def _is_sqlite() -> bool:
+    return op.get_bind().dialect.name == "sqlite"
+
+
+def _drop_fts_triggers():
+    for trigger in ("insert", "delete", "update"):
+        op.execute(f"DROP TRIGGER IF EXISTS transactions_fts_{trigger}")
+
+
+def _create_fts_triggers():
+    for statement in FTS_TRIGGERS:
+        op.execute(statement)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    sqlite = _is_sqlite()
+    if sqlite:
+        _drop_fts_triggers()
+    for table, columns in MONEY_COLUMNS:
+        if sqlite:
+            # SQLite kept NUMERIC values as REAL; convert them in place, as the
+            # table copy below only casts
+            assignments = ", ".join(f"{name} = CAST(ROUND({name} * 100) AS INTEGER)" for name, _, _ in columns)
+            op.execute(f"UPDATE {table} SET {assignments}")
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, precision, nullable in columns:
+                batch_op.alter_column(name, existing_type=sa.Numeric(precision=precision, scale=2),
+                                      type_=sa.BigInteger(), existing_nullable=nullable,
+                                      postgresql_using=f"ROUND({name} * 100)::bigint")
+    if sqlite:
+        _create_fts_triggers()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    sqlite = _is_sqlite()
+    if sqlite:
+        _drop_fts_triggers()
+    for table, columns in MONEY_COLUMNS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, precision, nullable in columns:
+                batch_op.alter_column(name, existing_type=sa.BigInteger(),
+                                      type_=sa.Numeric(precision=precision, scale=2), existing_nullable=nullable,
+                                      postgresql_using=f"{name} / 100.0")
+        if sqlite:
+            assignments = ", ".join(f"{name} = {name} / 100.0" for name, _, _ in columns)
+            op.execute(f"UPDATE {table} SET {assignments}")
+    if sqlite:
+        _create_fts_triggers()
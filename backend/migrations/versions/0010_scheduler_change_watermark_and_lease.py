@@ -0,0 +1,40 @@
+"""scheduler change watermark and lease
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 14:02:41.507316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, Sequence[str], None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('resource_versions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('changed_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_resource_versions_resource_changed', ['resource', 'changed_at'], unique=False)
+
+    op.create_table('scheduler_leases',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('holder', sa.String(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('scheduler_leases')
+    with op.batch_alter_table('resource_versions', schema=None) as batch_op:
+        batch_op.drop_index('ix_resource_versions_resource_changed')
+        batch_op.drop_column('changed_at')
@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.cache import MemoryBackend, ResponseCache
+from app.db import Base
+from app import models
+from app.services import aggregate_cache
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def count_statements(engine):
+    """count_statements(fn) -> (fn(), number of SQL statements it ran on engine)."""
+    def count(fn):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            result = fn()
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        return result, len(statements)
+    return count
+
+
+@pytest.fixture
+def user(db):
+    obj = models.User(email="test@example.com", hashed_password="x")
+    db.add(obj)
+    db.commit()
+    return obj
+
+
+@pytest.fixture(autouse=True)
+def response_cache(monkeypatch):
+    """A fresh aggregate cache per test: user ids repeat across test databases."""
+    cache = ResponseCache(MemoryBackend())
+    monkeypatch.setattr(aggregate_cache, "response_cache", cache)
+    return cache
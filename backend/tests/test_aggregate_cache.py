@@ -0,0 +1,103 @@
+from datetime import datetime
+from decimal import Decimal
+
+from app.cache import MemoryBackend, MemoryRedis, RedisBackend, ResponseCache
+from app.schemas import BudgetIn, MonthlyTotalsOut, RecurringRuleIn, TxIn
+from app.services import aggregate_cache, budget_service, recurring_service, transaction_service
+
+MONTH = datetime.utcnow().strftime("%Y-%m")
+
+
+def _spend(db, user_id, amount):
+    return transaction_service.create_transaction(
+        db, TxIn(kind="expense", amount=Decimal(amount), category="food"), user_id
+    )
+
+
+def test_totals_cached_until_a_transaction_write(db, user, response_cache, count_statements):
+    user_id = user.id
+    _spend(db, user_id, "10")
+    # A hit costs only the primary-key lookup of the versions in its key
+    totals, count = count_statements(lambda: transaction_service.get_monthly_totals(db, user_id))
+    assert totals["expense"] == 10.0 and count == 2
+    totals, count = count_statements(lambda: transaction_service.get_monthly_totals(db, user_id))
+    assert totals["expense"] == 10.0 and count == 1
+
+    tx = _spend(db, user_id, "5")
+    assert transaction_service.get_monthly_totals(db, user_id)["expense"] == 15.0
+    transaction_service.delete_transaction(db, tx.id, user_id)
+    assert transaction_service.get_monthly_totals(db, user_id)["expense"] == 10.0
+    assert response_cache.stats()["hits"] == 1
+
+
+def test_budgets_invalidated_by_budget_and_transaction_writes(db, user, count_statements):
+    user_id = user.id
+    budget = budget_service.create_budget(
+        db, BudgetIn(category="food", month=MONTH, cap_amount=Decimal("100")), user_id
+    )
+    for month in (MONTH, None):
+        assert budget_service.get_budgets(db, user_id, month)[0]["spent"] == 0
+        assert count_statements(lambda: budget_service.get_budgets(db, user_id, month))[1] == 1
+
+    _spend(db, user_id, "40")
+    assert budget_service.get_budgets(db, user_id, MONTH)[0]["spent"] == 40
+    assert budget_service.get_budgets(db, user_id)[0]["spent"] == 40
+
+    budget_service.delete_budget(db, budget["id"], user_id)
+    assert budget_service.get_budgets(db, user_id, MONTH) == []
+    assert budget_service.get_budgets(db, user_id) == []
+
+
+def test_writes_of_another_process_are_seen(db, user):
+    # The recurring job runs in its own process: it can only bump versions
+    user_id = user.id
+    _spend(db, user_id, "10")
+    assert transaction_service.get_monthly_totals(db, user_id)["income"] == 0
+    first_day = datetime.utcnow().date().replace(day=1)
+    recurring_service.create_rule(db, RecurringRuleIn(
+        target="transaction", rrule="FREQ=MONTHLY;COUNT=1", dtstart=first_day,
+        kind="income", amount=Decimal("2500"), category="salary"), user_id)
+    recurring_service.materialize_due(db)
+    assert transaction_service.get_monthly_totals(db, user_id)["income"] == 2500.0
+
+
+def test_redis_backend_round_trips_json(monkeypatch):
+    client = MemoryRedis()
+    cache = ResponseCache(RedisBackend(client, ttl=60))
+    row = {"cap_amount": Decimal("100.00"), "spent": Decimal("1.50"), "utilization": 1.5}
+    assert cache.get_or_compute("budgets:1:all", lambda: [row]) == [row]
+    cached = {"cap_amount": "100.00", "spent": "1.50", "utilization": 1.5}
+    assert cache.get_or_compute("budgets:1:all", lambda: 1 / 0) == [cached]
+    assert client.get("pfms:budgets:1:all") is not None
+    cache.invalidate("budgets:1:all")
+    assert client.get("pfms:budgets:1:all") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "invalidations": 1, "errors": 0}
+    # Cached totals come back as strings, which the response model reads as Money again
+    totals = transaction_service.totals_from_sums({"income": 250, "expense": 1000})
+    cache.get_or_compute("totals:1", lambda: totals)
+    assert MonthlyTotalsOut.model_validate(cache.get_or_compute("totals:1", lambda: 1 / 0)) == \
+        MonthlyTotalsOut(income=Decimal("2.50"), expense=Decimal("10.00"), net=Decimal("-7.50"))
+
+
+def test_lru_evictions_and_failing_backend():
+    cache = ResponseCache(MemoryBackend(maxsize=2))
+    for key in "abc":
+        cache.get_or_compute(key, lambda: key)
+    assert cache.stats()["evictions"] == 1
+
+    class Down:
+        def get(self, key):
+            raise ConnectionError
+        set = delete = get
+
+    broken = ResponseCache(Down())
+    assert broken.get_or_compute("k", lambda: 42) == 42
+    broken.invalidate("k")
+    assert broken.stats()["errors"] == 3
+
+
+def test_metrics_text(response_cache):
+    response_cache.get_or_compute("k", lambda: 1)
+    text = aggregate_cache.render_metrics()
+    assert "pfms_response_cache_misses_total 1" in text
+    assert "# TYPE pfms_response_cache_hits_total counter" in text
@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app import alerts, group_commit
+from app.db import Base, make_engine
+from app.models import BudgetAlert, User
+from app.schemas import BudgetIn, TxIn
+from app.services import alert_service, budget_service, transaction_service
+
+MONTH = datetime.utcnow().strftime("%Y-%m")
+
+
+def _spend(db, user_id, amount, category="food", kind="expense"):
+    return transaction_service.create_transaction(
+        db, TxIn(kind=kind, amount=Decimal(amount), category=category), user_id)
+
+
+def _thresholds(db, user_id):
+    return sorted(row["threshold"] for row in budget_service.get_alerts(db, user_id, MONTH))
+
+
+def test_thresholds_are_recorded_as_spending_reaches_them(db, user):
+    budget_service.create_budget(db, BudgetIn(category="food", month=MONTH, cap_amount=Decimal("100")), user.id)
+    _spend(db, user.id, "50")
+    _spend(db, user.id, "500", category="rent")
+    _spend(db, user.id, "500", kind="income")
+    assert _thresholds(db, user.id) == []
+
+    _spend(db, user.id, "30")
+    assert _thresholds(db, user.id) == [80]
+    last = _spend(db, user.id, "25")
+    rows = budget_service.get_alerts(db, user.id)
+    assert [(row["threshold"], row["spent"]) for row in rows] == [(100, Decimal("105")), (80, Decimal("80"))]
+
+    # Back under the cap: the 100% alert goes, and fires again if it is reached again
+    transaction_service.delete_transaction(db, last.id, user.id)
+    assert _thresholds(db, user.id) == [80]
+    _spend(db, user.id, "20")
+    assert _thresholds(db, user.id) == [80, 100]
+
+
+def test_budget_writes_evaluate_and_drop_their_alerts(db, user):
+    _spend(db, user.id, "90")
+    budget = budget_service.create_budget(db, BudgetIn(category="food", month=MONTH, cap_amount=Decimal("100")), user.id)
+    assert _thresholds(db, user.id) == [80]
+    assert alert_service.crossed_thresholds(1, 0) == {80, 100}
+
+    budget_service.delete_budget(db, budget["id"], user.id)
+    assert db.scalar(select(func.count(BudgetAlert.id))) == 0
+    with pytest.raises(ValueError):
+        budget_service.get_alerts(db, user.id, "2024-1")
+
+
+def test_pipeline_evaluates_concurrent_writes_off_the_request(tmp_path, monkeypatch):
+    monkeypatch.setattr(group_commit, "_committers", {})
+    monkeypatch.setattr(alerts, "pipeline", alerts.AlertPipeline(workers=2))
+    engine = make_engine(f"sqlite:///{tmp_path}/alerts.sqlite3")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        users = [User(email=f"u{i}@example.com", hashed_password="x") for i in range(3)]
+        db.add_all(users)
+        db.commit()
+        user_ids = [user.id for user in users]
+        for user_id in user_ids:
+            budget_service.create_budget(db, BudgetIn(category="food", month=MONTH, cap_amount=Decimal("100")), user_id)
+
+    def spend(i):
+        with Session() as db:
+            _spend(db, user_ids[i % 3], "2")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(spend, range(150)))
+    alerts.pipeline.stop()
+    group_commit.stop_all()
+
+    with Session() as db:
+        for user_id in user_ids:
+            assert _thresholds(db, user_id) == [80, 100]
+    assert alerts.pipeline.events == 153 and alerts.pipeline.failures == 0
+    assert alerts.pipeline.alerts == 6
+    engine.dispose()
@@ -0,0 +1,65 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.models import Transaction
+from app.services import analytics_service
+
+
+def _add(db, user, when, kind, amount, category="food"):
+    db.add(Transaction(user_id=user.id, kind=kind, amount=Decimal(amount),
+                       category=category, note="", created_at=when))
+
+
+def test_monthly_series_and_categories(db, user):
+    _add(db, user, datetime(2024, 1, 5), "income", "1000.00", "salary")
+    _add(db, user, datetime(2024, 1, 9), "expense", "100.10")
+    _add(db, user, datetime(2024, 1, 31, 23, 59), "expense", "0.20", "rent")
+    _add(db, user, datetime(2024, 3, 1), "expense", "300.00", "rent")
+    _add(db, user, datetime(2024, 4, 1), "expense", "999.00")  # outside the range
+    db.commit()
+
+    result = analytics_service.get_analytics(db, user.id, date(2024, 1, 1), date(2024, 3, 31),
+                                             window=2, top=1)
+    assert result["months"] == ["2024-01", "2024-02", "2024-03"]
+    assert result["income"] == [Decimal("1000.00"), 0, 0]
+    assert result["expense"] == [Decimal("100.30"), 0, Decimal("300.00")]
+    assert result["net"] == [Decimal("899.70"), 0, Decimal("-300.00")]
+    assert result["expense_rolling_avg"] == [Decimal("100.30"), Decimal("50.15"), Decimal("150.00")]
+    assert result["expense_change"] == [None, Decimal("-100.30"), Decimal("300.00")]
+    assert result["expense_change_pct"] == [None, -100.0, None]
+    assert [c["category"] for c in result["categories"]] == ["rent", "food"]
+    assert result["categories"][0]["expense"] == [Decimal("0.20"), 0, Decimal("300.00")]
+    assert result["categories"][0]["total"] == Decimal("300.20")
+    assert result["categories"][1]["share"] == 25.01
+    assert result["top_categories"] == ["rent"]
+
+
+def test_empty_range_is_all_zero(db, user):
+    result = analytics_service.get_analytics(db, user.id, date(2024, 11, 15), date(2025, 2, 1))
+    assert result["months"] == ["2024-11", "2024-12", "2025-01", "2025-02"]
+    assert result["expense"] == [Decimal("0.00")] * 4
+    assert result["categories"] == [] and result["top_categories"] == []
+
+
+def test_averages_round_to_whole_cents(db, user):
+    _add(db, user, datetime(2024, 1, 5), "expense", "0.01")
+    db.commit()
+
+    result = analytics_service.get_analytics(db, user.id, date(2024, 1, 1), date(2024, 3, 31), window=3)
+    assert result["expense_rolling_avg"] == [Decimal("0.01"), Decimal("0.00"), Decimal("0.00")]
+    assert all(value.as_tuple().exponent == -2 for value in result["expense_rolling_avg"])
+
+
+def test_rolling_mean_uses_partial_windows():
+    values = np.array([3.0, 6.0, 9.0, 12.0])
+    assert analytics_service.rolling_mean(values, 3).tolist() == [3.0, 4.5, 6.0, 9.0]
+
+
+def test_invalid_ranges_rejected(db, user):
+    with pytest.raises(ValueError):
+        analytics_service.get_analytics(db, user.id, date(2024, 2, 1), date(2024, 1, 1))
+    with pytest.raises(ValueError):
+        analytics_service.get_analytics(db, user.id, date(2000, 1, 1), date(2024, 1, 1))
@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.db import Base  # noqa: E402
+from app.models import Budget, Transaction, User  # noqa: E402
+from app.schemas import BudgetIn, TxIn  # noqa: E402
+from app.services import (  # noqa: E402
+    async_budget_service, async_transaction_service, budget_service, rollup_service,
+    search_service, transaction_service,
+)
+
+
+async def _scenario():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with Session() as db:
+        user = User(email="async@example.com", hashed_password="x")
+        db.add(user)
+        await db.commit()
+        start = datetime(2024, 1, 1)
+        db.add_all(
+            Transaction(user_id=user.id, kind="expense", amount=5, category="food",
+                        created_at=start + timedelta(hours=i))
+            for i in range(12)
+        )
+        db.add(Budget(user_id=user.id, category="food", month="2024-01", cap_amount=50))
+        await db.commit()
+        await db.run_sync(lambda s: rollup_service.rebuild_rollups(s))
+
+        created = await async_transaction_service.create_transaction(
+            db, TxIn(kind="income", amount=Decimal("100"), category="salary"), user.id
+        )
+        pages, cursor = [], None
+        while True:
+            page, cursor = await async_transaction_service.list_transactions(
+                db, user.id, limit=5, cursor=cursor
+            )
+            pages.append(page)
+            if cursor is None:
+                break
+        streamed = [tx async for tx in async_transaction_service.stream_transactions(db, user.id)]
+        totals = await async_transaction_service.get_monthly_totals(db, user.id)
+        budgets = await async_budget_service.get_budgets(db, user.id, "2024-01")
+        searched = await async_transaction_service.search_transactions(db, user.id, "sal*")
+        sync_view = await db.run_sync(lambda s: (
+            transaction_service.list_transactions(s, user.id)[0],
+            budget_service.get_budgets(s, user.id, "2024-01"),
+            search_service.search_transactions(s, user.id, "sal*"),
+        ))
+        await async_transaction_service.delete_transaction(db, created.id, user.id)
+        after_delete = await async_transaction_service.get_monthly_totals(db, user.id)
+        new_budget = await async_budget_service.create_budget(
+            db, BudgetIn(category="rent", month="2024-01", cap_amount=Decimal("10")), user.id
+        )
+        drift = await db.run_sync(lambda s: rollup_service.verify_rollups(s))
+    await engine.dispose()
+    return locals()
+
+
+def test_async_services_match_sync():
+    r = asyncio.run(_scenario())
+    sync_list, sync_budgets, sync_search = r["sync_view"]
+    assert [tx.id for page in r["pages"] for tx in page] == [tx.id for tx in sync_list]
+    assert [tx.id for tx in r["streamed"]] == [tx.id for tx in sync_list]
+    assert r["budgets"] == sync_budgets
+    assert r["searched"] == sync_search and [tx.id for tx in sync_search.items] == [r["created"].id]
+    assert r["budgets"][0]["spent"] == 60 and r["budgets"][0]["over_cap"] is True
+    assert r["totals"]["income"] == 100
+    assert r["after_delete"]["income"] == 0
+    assert r["new_budget"]["cap_amount"] == Decimal("10.00")
+    assert r["drift"] == []
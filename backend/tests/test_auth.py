@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Request
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import event
+
+from app.cache import ResponseCache, make_backend
+from app.routers import auth
+
+
+@pytest.fixture(autouse=True)
+def fresh_auth_state():
+    auth.user_cache.clear()
+    auth.user_versions.backend.clear()
+    yield
+    auth.user_cache.clear()
+    auth.user_versions.backend.clear()
+
+
+def _resolve(engine, db, token):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        user = asyncio.run(auth.get_current_user(token, db))
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return user, len(statements)
+
+
+def test_claims_resolve_without_db(engine, db, user):
+    token = auth.issue_access_token(user)
+    resolved, queries = _resolve(engine, db, token)
+    assert (resolved.id, resolved.email, queries) == (user.id, user.email, 0)
+
+
+def test_claims_need_a_known_current_version(engine, db, user):
+    token = auth.create_access_token(auth.user_claims(user))
+    assert _resolve(engine, db, token)[1] == 1
+    auth.user_cache.clear()
+    assert _resolve(engine, db, token)[1] == 0
+
+
+def test_legacy_token_hits_db_once(engine, db, user):
+    token = auth.create_access_token({"sub": user.email})
+    assert _resolve(engine, db, token)[1] == 1
+    assert _resolve(engine, db, token)[1] == 0
+
+
+def test_deactivation_invalidates_cached_and_claimed_user(engine, db, user):
+    token = auth.issue_access_token(user)
+    _resolve(engine, db, token)
+
+    user.is_active = "false"
+    db.commit()
+
+    with pytest.raises(HTTPException) as exc:
+        _resolve(engine, db, token)
+    assert exc.value.status_code == 401
+
+
+def test_change_in_another_worker_reaches_shared_versions(engine, db, user, monkeypatch):
+    # Every "worker" shares the versions through one Redis-style backend
+    monkeypatch.setattr(auth, "user_versions", ResponseCache(make_backend("memory-redis://")))
+    token = auth.issue_access_token(user)
+    stale = _resolve(engine, db, token)[0]
+
+    user.hashed_password = "changed"
+    db.commit()
+    assert user.token_version == 1
+
+    # This worker still holds the old user, as if another worker made the change
+    auth.user_cache.set(user.email, stale)
+    assert _resolve(engine, db, token)[1] == 1
+    assert _resolve(engine, db, token)[1] == 0
+    # The old token's claims no longer hold; a new token's do
+    auth.user_cache.clear()
+    assert _resolve(engine, db, token)[1] == 1
+    auth.user_cache.clear()
+    assert _resolve(engine, db, auth.issue_access_token(user))[1] == 0
+
+    user.is_active = "false"
+    db.commit()
+    auth.user_cache.set(user.email, stale)
+    with pytest.raises(HTTPException):
+        _resolve(engine, db, token)
+
+
+def test_unknown_user_rejected(engine, db):
+    token = auth.create_access_token({"sub": "ghost@example.com"})
+    with pytest.raises(HTTPException):
+        _resolve(engine, db, token)
+
+
+def test_login_rehashes_outdated_hash(db, user):
+    user.hashed_password = auth.get_pwd_context().hash("correct horse", rounds=1000)
+    db.commit()
+
+    assert asyncio.run(auth.authenticate_user(db, user.email, "wrong")) is False
+    assert asyncio.run(auth.authenticate_user(db, user.email, "correct horse")).id == user.id
+    db.refresh(user)
+    assert f"${auth.PASSWORD_HASH_ROUNDS}$" in user.hashed_password
+    assert not auth.get_pwd_context().needs_update(user.hashed_password)
+
+
+def test_login_rate_limiter():
+    limiter = auth.SlidingWindowLimiter(limit=2, window=60)
+    assert limiter.hit("a@example.com") == 0
+    assert limiter.hit("a@example.com") == 0
+    assert 59 < limiter.hit("a@example.com") <= 60
+    assert limiter.hit("b@example.com") == 0
+
+
+def _login(db, email, password, ip="10.0.0.1"):
+    request = Request({"type": "http", "client": (ip, 4000), "headers": []})
+    form = OAuth2PasswordRequestForm(username=email, password=password)
+    try:
+        asyncio.run(auth.login_for_access_token(request, form, db))
+    except HTTPException as exc:
+        return exc.status_code
+    return 200
+
+
+def test_login_limit_counts_failures_per_email_and_attempts_per_ip(db, user, monkeypatch):
+    monkeypatch.setattr(auth, "login_limiter", auth.SlidingWindowLimiter(limit=2, window=60))
+    monkeypatch.setattr(auth, "login_ip_limiter", auth.SlidingWindowLimiter(limit=8, window=60))
+    user.hashed_password = auth.get_password_hash("correct horse")
+    db.commit()
+
+    # Successful logins do not count, and one resets the failures
+    assert [_login(db, user.email, "correct horse") for _ in range(3)] == [200] * 3
+    assert [_login(db, user.email, p) for p in ("wrong", "correct horse", "wrong")] == [401, 200, 401]
+    assert [_login(db, user.email.upper(), p) for p in ("wrong", "correct horse")] == [401, 429]
+    # The email stays locked from any IP, and the first IP is out of attempts
+    assert _login(db, user.email, "correct horse", ip="10.0.0.2") == 429
+    assert _login(db, "other@example.com", "wrong", ip="10.0.0.2") == 401
+    assert _login(db, "other@example.com", "wrong") == 429
@@ -0,0 +1,74 @@
+from datetime import datetime
+from decimal import Decimal
+
+from app.models import Budget, Transaction, User
+from app.schemas import BudgetIn
+from app.services import budget_service, rollup_service
+
+
+def test_utilization_is_user_scoped(db, user):
+    other = User(email="other@example.com", hashed_password="x")
+    db.add(other)
+    db.commit()
+    db.add_all([
+        Budget(user_id=user.id, category="food", month="2024-03", cap_amount=100),
+        Transaction(user_id=user.id, kind="expense", amount=40, category="food",
+                    created_at=datetime(2024, 3, 5)),
+        Transaction(user_id=user.id, kind="expense", amount=99, category="food",
+                    created_at=datetime(2024, 4, 1)),
+        Transaction(user_id=user.id, kind="income", amount=99, category="food",
+                    created_at=datetime(2024, 3, 6)),
+        Transaction(user_id=other.id, kind="expense", amount=500, category="food",
+                    created_at=datetime(2024, 3, 5)),
+    ])
+    db.commit()
+    rollup_service.rebuild_rollups(db)
+
+    [row] = budget_service.get_budgets(db, user.id, "2024-03")
+    assert row["spent"] == 40
+    assert row["remaining"] == 60
+    assert row["percentage"] == 40
+    assert row["over_cap"] is False
+
+
+def test_over_cap_and_zero_cap(db, user):
+    db.add_all([
+        Budget(user_id=user.id, category="fun", month="2024-12", cap_amount=10),
+        Budget(user_id=user.id, category="misc", month="2024-12", cap_amount=0),
+        Transaction(user_id=user.id, kind="expense", amount=25, category="fun",
+                    created_at=datetime(2024, 12, 31, 23, 59)),
+    ])
+    db.commit()
+    rollup_service.rebuild_rollups(db)
+    rows = {row["category"]: row for row in budget_service.get_budgets(db, user.id)}
+    assert rows["fun"]["over_cap"] is True
+    assert rows["fun"]["remaining"] == -15
+    assert rows["misc"]["percentage"] is None
+    assert rows["misc"]["spent"] == 0
+
+
+def test_create_budget_includes_existing_spend(db, user):
+    db.add(Transaction(user_id=user.id, kind="expense", amount=30, category="food",
+                       created_at=datetime(2024, 5, 2)))
+    db.commit()
+    rollup_service.rebuild_rollups(db)
+    row = budget_service.create_budget(
+        db, BudgetIn(category="food", month="2024-05", cap_amount=Decimal("50")), user.id
+    )
+    assert row["spent"] == 30
+
+
+def test_query_count_constant_in_budget_count(db, user, count_statements):
+    counts = []
+    user_id = user.id
+    for n in (1, 20):
+        db.add_all(
+            Budget(user_id=user_id, category=f"cat{n}-{i}", month="2024-01", cap_amount=10)
+            for i in range(n)
+        )
+        db.commit()
+        _, count = count_statements(
+            lambda: budget_service.get_budget_utilization(db, user_id, "2024-01")
+        )
+        counts.append(count)
+    assert counts[0] == counts[1] == 1
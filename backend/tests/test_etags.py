@@ -0,0 +1,56 @@
+from decimal import Decimal
+
+from sqlalchemy import event
+
+from app.schemas import BudgetIn, TxIn
+from app.services import budget_service, transaction_service, version_service
+
+
+def _etag(db, user, *resources):
+    return version_service.current_etag(db, user.id, resources, "limit=50")
+
+
+def test_writes_change_only_their_resources(db, user):
+    tx_etag, budget_etag = _etag(db, user, "transactions"), _etag(db, user, "budgets")
+    assert tx_etag == _etag(db, user, "transactions")
+
+    created = transaction_service.create_transaction(
+        db, TxIn(kind="expense", amount=Decimal("5"), category="food"), user.id
+    )
+    assert _etag(db, user, "transactions") != tx_etag
+    assert _etag(db, user, "budgets") == budget_etag
+
+    tx_etag = _etag(db, user, "transactions")
+    transaction_service.delete_transaction(db, created.id, user.id)
+    assert _etag(db, user, "transactions") != tx_etag
+
+    budget = budget_service.create_budget(
+        db, BudgetIn(category="food", month="2024-01", cap_amount=Decimal("10")), user.id
+    )
+    assert _etag(db, user, "budgets") != budget_etag
+    budget_etag = _etag(db, user, "budgets")
+    budget_service.delete_budget(db, budget["id"], user.id)
+    assert _etag(db, user, "budgets") != budget_etag
+
+
+def test_etag_varies_by_query_and_user(db, user):
+    a = version_service.current_etag(db, user.id, ["goals"], "limit=10")
+    assert a != version_service.current_etag(db, user.id, ["goals"], "limit=20")
+    assert a != version_service.current_etag(db, user.id + 1, ["goals"], "limit=10")
+
+
+def test_etag_is_a_single_lookup(engine, db, user):
+    user_id = user.id
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    version_service.current_etag(db, user_id, ["budgets", "transactions"])
+    assert len(statements) == 1 and "resource_versions" in statements[0]
+
+
+def test_if_none_match_parsing():
+    etag = '"1-goals.3-abc"'
+    assert version_service.etag_matches(etag, etag)
+    assert version_service.etag_matches(f'"x", W/{etag}', etag)
+    assert version_service.etag_matches("*", etag)
+    assert not version_service.etag_matches('"1-goals.2-abc"', etag)
+    assert not version_service.etag_matches(None, etag)
@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Goal, Transaction
+from app.services import export_service
+
+
+@pytest.fixture
+def ledger(db, user):
+    start = datetime(2024, 1, 1)
+    db.add_all(
+        Transaction(user_id=user.id, kind="expense" if i % 2 else "income",
+                    amount=Decimal("1.50") * (i + 1), category="food", note=f"n{i}",
+                    created_at=start + timedelta(hours=i))
+        for i in range(25)
+    )
+    db.commit()
+    return user.id
+
+
+def _export(engine, stmt, columns, fmt, batch_size=4):
+    factory = sessionmaker(bind=engine)
+    return b"".join(export_service.stream_export(factory, stmt, columns, fmt, batch_size=batch_size))
+
+
+def test_csv_export_matches_list_filters(engine, ledger):
+    stmt = export_service.transaction_export_query(ledger, kind="expense")
+    rows = list(csv.reader(io.StringIO(_export(engine, stmt, export_service.TRANSACTION_COLUMNS, "csv").decode())))
+    assert rows[0] == [name for name, _ in export_service.TRANSACTION_COLUMNS]
+    assert len(rows) == 1 + 12
+    assert rows[1][1:4] == ["expense", "36.00", "food"]
+    assert rows[1][5] == "2024-01-01T23:00:00"
+
+
+def test_ndjson_export_is_one_object_per_line(engine, ledger):
+    stmt = export_service.transaction_export_query(ledger, from_date=datetime(2024, 1, 1).date())
+    lines = _export(engine, stmt, export_service.TRANSACTION_COLUMNS, "ndjson").splitlines()
+    assert len(lines) == 25
+    assert json.loads(lines[-1])["amount"] == "1.50"
+
+
+def test_empty_export_still_has_header(engine, user):
+    body = _export(engine, export_service.goal_export_query(user.id), export_service.GOAL_COLUMNS, "csv")
+    assert body.decode().strip() == ",".join(name for name, _ in export_service.GOAL_COLUMNS)
+
+
+def test_parquet_export_round_trips(engine, db, ledger):
+    pq = pytest.importorskip("pyarrow.parquet")
+    db.add(Goal(user_id=ledger, name="car", target_amount=Decimal("100"), current_amount=Decimal("5")))
+    # Beyond decimal128(12, 2): amounts are BIGINT cents
+    db.add(Goal(user_id=ledger, name="fund", target_amount=Decimal("90000000000.00")))
+    db.commit()
+    stmt = export_service.transaction_export_query(ledger)
+    parquet = pq.ParquetFile(io.BytesIO(_export(engine, stmt, export_service.TRANSACTION_COLUMNS, "parquet")))
+    assert parquet.metadata.num_row_groups == 7
+    table = parquet.read()
+    assert table.num_rows == 25
+    assert sum(table.column("amount").to_pylist()) == sum(Decimal("1.50") * (i + 1) for i in range(25))
+    goals = pq.read_table(io.BytesIO(
+        _export(engine, export_service.goal_export_query(ledger), export_service.GOAL_COLUMNS, "parquet")
+    ))
+    assert sorted(goals.column("name").to_pylist()) == ["car", "fund"]
+    assert max(goals.column("target_amount").to_pylist()) == Decimal("90000000000.00")
+
+
+def test_unknown_format_rejected():
+    with pytest.raises(ValueError):
+        export_service.validate_format("xlsx")
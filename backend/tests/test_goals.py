@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base, make_engine
+from app import schemas
+from app.models import Goal, GoalContribution, User
+from app.services import goal_service
+
+
+def _goal(db, user_id, target="100.00", name="trip"):
+    goal = Goal(user_id=user_id, name=name, target_amount=Decimal(target), current_amount=Decimal("0"))
+    db.add(goal)
+    db.commit()
+    return goal.id
+
+
+def test_validate_amount():
+    assert goal_service.validate_amount("0.10") == Decimal("0.10")
+    assert goal_service.validate_amount(0.1) == Decimal("0.1")
+    for bad in ("0", "-1", "0.001", "NaN"):
+        with pytest.raises(ValueError):
+            goal_service.validate_amount(bad)
+
+
+def test_batch_contributions_are_exact_and_complete_goals(db, user):
+    user_id = user.id
+    trip, car = _goal(db, user_id, "0.30"), _goal(db, user_id, "1000.00", "car")
+    goals = goal_service.contribute(db, user_id, [
+        (trip, Decimal("0.10")), (car, Decimal("5.55")), (trip, Decimal("0.20")),
+    ])
+    assert [(g["id"], g["current_amount"], g["is_completed"]) for g in goals] == [
+        (trip, Decimal("0.30"), "true"), (car, Decimal("5.55"), "false"),
+    ]
+    assert [schemas.GoalOut.model_validate(g).progress_percentage for g in goals] == [
+        100.0, goal_service.progress_percentage(Decimal("5.55"), Decimal("1000.00")),
+    ]
+    assert [c.amount for c in goal_service.list_contributions(db, trip, user_id)] == [
+        Decimal("0.10"), Decimal("0.20"),
+    ]
+
+
+def test_a_batch_with_an_unknown_goal_changes_nothing(db, user):
+    user_id = user.id
+    trip = _goal(db, user_id)
+    other = db.merge(User(email="other@example.com", hashed_password="x"))
+    db.commit()
+    foreign = _goal(db, other.id)
+    with pytest.raises(ValueError):
+        goal_service.contribute(db, user_id, [(trip, Decimal("5")), (foreign, Decimal("5"))])
+    assert db.get(Goal, trip).current_amount == 0
+    assert db.query(GoalContribution).count() == 0
+
+    goal_service.contribute(db, user_id, [(trip, Decimal("5"))])
+    goal_service.delete_goal(db, trip, user_id)
+    assert db.query(GoalContribution).count() == 0
+
+
+def test_parallel_contributions_lose_no_updates(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path}/goals.sqlite3")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        user = User(email="saver@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+        goal_id = _goal(db, user_id, "1000000.00")
+
+    amounts = [Decimal("0.01") * (i % 97 + 1) + Decimal("0.10") for i in range(400)]
+
+    def contribute(amount):
+        with Session() as db:
+            goal_service.contribute(db, user_id, [(goal_id, amount)])
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(contribute, amounts))
+
+    with Session() as db:
+        assert db.get(Goal, goal_id).current_amount == sum(amounts)
+        assert db.query(func.count(GoalContribution.id)).scalar() == len(amounts)
+    engine.dispose()
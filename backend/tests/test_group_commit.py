@@ -0,0 +1,147 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session as OrmSession, sessionmaker
+
+from app import group_commit
+from app.db import Base, make_engine
+from app.models import Budget, MonthlyRollup, Reminder, ResourceVersion, Transaction, User
+from app.schemas import BudgetIn, GoalIn, ReminderIn, TxIn
+from app.services import budget_service, goal_service, reminder_service, transaction_service
+
+
+@pytest.fixture
+def file_db(tmp_path, monkeypatch):
+    """A file database, where writes go through the group committer."""
+    monkeypatch.setattr(group_commit, "WRITE_BATCHING", True)
+    monkeypatch.setattr(group_commit, "_committers", {})
+    engine = make_engine(f"sqlite:///{tmp_path}/writes.sqlite3")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        user = User(email="writer@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    yield engine, Session, user_id
+    group_commit.stop_all()
+    engine.dispose()
+
+
+def test_concurrent_creates_share_commits(file_db):
+    engine, Session, user_id = file_db
+
+    def create(i):
+        with Session() as db:
+            return transaction_service.create_transaction(
+                db, TxIn(kind="expense", amount=Decimal("1.25"), category=f"cat{i % 3}", note=f"n{i}"), user_id)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        created = list(pool.map(create, range(200)))
+
+    assert len({tx.id for tx in created}) == 200
+    assert created[7].note == "n7" and created[7].amount == Decimal("1.25")
+    committer = group_commit.committer(engine)
+    assert committer.writes == 200 and committer.batches < 200
+    with Session() as db:
+        assert db.scalar(select(func.count(Transaction.id))) == 200
+        assert db.scalar(select(func.sum(MonthlyRollup.tx_count))) == 200
+        # One version bump per batch, not per write
+        version = db.scalar(select(ResourceVersion.version).where(ResourceVersion.resource == "transactions"))
+        assert version == committer.batches
+
+
+def test_every_create_endpoint_returns_its_row(file_db):
+    engine, Session, user_id = file_db
+    with Session() as db:
+        reminder = reminder_service.create_reminder(
+            db, ReminderIn(name="Rent", due_date=date(2030, 1, 1), amount=Decimal("900")), user_id)
+        goal = goal_service.create_goal(db, GoalIn(name="Trip", target_amount=Decimal("400")), user_id)
+        budget = budget_service.create_budget(
+            db, BudgetIn(category="food", month="2030-01", cap_amount=Decimal("100")), user_id)
+        with pytest.raises(ValueError):
+            budget_service.create_budget(
+                db, BudgetIn(category="food", month="2030-01", cap_amount=Decimal("50")), user_id)
+
+        assert db.get(Reminder, reminder.id).name == "Rent"
+        assert goal["id"] and goal["current_amount"] == 0 and goal["is_completed"] == "false"
+        assert goal["progress_percentage"] == 0 and goal["created_at"]
+        assert budget["id"] == db.scalar(select(Budget.id)) and budget["cap_amount"] == Decimal("100.00")
+
+
+def test_a_failing_write_does_not_fail_its_batch(file_db):
+    engine, Session, user_id = file_db
+    # Waits until stop() for a full batch, so all four writes share one
+    committer = group_commit.GroupCommitter(engine, max_batch=10, max_wait=5)
+    values = {"user_id": user_id, "category": "rent", "month": "2030-02", "cap_amount": Decimal("10")}
+
+    def fail(db, rows):
+        raise RuntimeError("boom")
+
+    futures = [committer.submit(budget_service.insert_budgets, {**values, "category": f"c{i}"}) for i in range(2)]
+    futures += [committer.submit(fail, None), committer.submit(budget_service.insert_budgets, values)]
+    committer.stop()
+
+    assert all(isinstance(f.result(), int) for f in futures[:2] + futures[3:])
+    with pytest.raises(RuntimeError):
+        futures[2].result()
+    assert committer.batches == 1 and committer.replays == 1
+    with Session() as db:
+        assert db.scalar(select(func.count(Budget.id))) == 3
+
+
+def test_writer_survives_a_failing_rollback_and_restarts(file_db, monkeypatch):
+    engine, Session, user_id = file_db
+    committer = group_commit.GroupCommitter(engine)
+    values = {"user_id": user_id, "category": "rent", "month": "2030-03", "cap_amount": Decimal("10")}
+
+    class BrokenRollback(OrmSession):
+        def rollback(self):
+            super().rollback()
+            raise ConnectionError("connection lost")
+
+    def fail(db, rows):
+        raise RuntimeError("boom")
+
+    sessions = committer._sessions
+    committer._sessions = sessionmaker(bind=engine, class_=BrokenRollback, expire_on_commit=False)
+    with pytest.raises(ConnectionError):
+        committer.submit(fail, None).result(timeout=5)
+    committer._sessions = sessions
+    # The writer thread lived on
+    assert isinstance(committer.submit(budget_service.insert_budgets, values).result(timeout=5), int)
+
+    # Errors that are not Exceptions fail the batch, then end the writer thread
+    uncaught = []
+    monkeypatch.setattr(threading, "excepthook", uncaught.append)
+
+    def exit_thread(db, rows):
+        raise SystemExit
+
+    with pytest.raises(SystemExit):
+        committer.submit(exit_thread, None).result(timeout=5)
+    committer._thread.join(timeout=5)
+    assert [args.exc_type for args in uncaught] == [SystemExit]
+    # A dead writer is replaced by the next submit
+    next_month = {**values, "month": "2030-04"}
+    assert isinstance(committer.submit(budget_service.insert_budgets, next_month).result(timeout=5), int)
+    committer.stop()
+
+
+def test_run_gives_up_waiting_after_the_commit_timeout(file_db, monkeypatch):
+    engine, Session, user_id = file_db
+    monkeypatch.setattr(group_commit, "WRITE_COMMIT_TIMEOUT_SECONDS", 0.05)
+    # The writer holds its first batch open for 5s, so the write cannot commit in time
+    committer = group_commit.GroupCommitter(engine, max_batch=10, max_wait=5)
+    group_commit._committers[engine] = committer
+    with Session() as db:
+        with pytest.raises(TimeoutError):
+            budget_service.create_budget(
+                db, BudgetIn(category="food", month="2030-05", cap_amount=Decimal("10")), user_id)
+    committer.stop()
+    with Session() as db:
+        assert db.scalar(select(func.count(Budget.id))) == 0
@@ -0,0 +1,73 @@
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.models import Transaction
+from app.services import import_service, rollup_service
+
+
+@pytest.fixture(autouse=True)
+def tiny_reads(monkeypatch):
+    # Force records to straddle read boundaries
+    monkeypatch.setattr(import_service, "READ_SIZE", 7)
+
+
+def _import(db, user, text, fmt, batch_size=3):
+    return import_service.import_transactions(
+        db, user.id, io.BytesIO(text.encode()), fmt, batch_size=batch_size
+    )
+
+
+def test_json_import_reports_bad_rows(db, user):
+    rows = [{"kind": "expense", "amount": str(i + 1), "category": "food",
+             "created_at": "2024-03-0%dT10:00:00" % (i % 9 + 1)} for i in range(10)]
+    rows[4] = {"kind": "expense", "amount": "-1"}
+    rows[7] = ["not", "an", "object"]
+    result = _import(db, user, json.dumps(rows), "json")
+    assert (result.imported, result.failed) == (8, 2)
+    assert [e.row for e in result.errors] == [5, 8]
+    assert db.query(Transaction).count() == 8
+    assert rollup_service.verify_rollups(db) == []
+
+
+def test_csv_signed_amounts_and_dates(db, user):
+    text = (
+        "Date,Amount,Category,Note\n"
+        "2024-01-05,-12.50,food,\"lunch, with team\"\n"
+        "2024-01-06T09:30:00+02:00,2500,salary,pay\n"
+    )
+    result = _import(db, user, text, "csv")
+    assert result.imported == 2
+    food, salary = db.query(Transaction).order_by(Transaction.created_at).all()
+    assert (food.kind, food.amount, food.note) == ("expense", Decimal("12.50"), "lunch, with team")
+    assert (salary.kind, salary.created_at) == ("income", datetime(2024, 1, 6, 7, 30))
+
+
+def test_ofx_statement(db, user):
+    text = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240210083000.000[-5:EST]<TRNAMT>-42.10<NAME>Grocer<MEMO>weekly
+</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240201<TRNAMT>1500.00<NAME>Employer</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>"""
+    result = _import(db, user, text, "ofx")
+    assert (result.imported, result.failed) == (2, 0)
+    grocer = db.query(Transaction).filter(Transaction.kind == "expense").one()
+    assert (grocer.amount, grocer.note) == (Decimal("42.10"), "Grocer weekly")
+    assert grocer.created_at == datetime(2024, 2, 10, 8, 30)
+
+
+def test_malformed_input_rolls_back(db, user):
+    with pytest.raises(ValueError):
+        _import(db, user, '[{"kind": "income", "amount": "1"}, {"kind": ', "json")
+    assert db.query(Transaction).count() == 0
+
+
+def test_detect_format():
+    assert import_service.detect_format(None, "text/csv") == "csv"
+    assert import_service.detect_format(None, "application/octet-stream", "stmt.OFX") == "ofx"
+    with pytest.raises(ValueError):
+        import_service.detect_format("xml")
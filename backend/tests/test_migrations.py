@@ -0,0 +1,61 @@
+import pathlib
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+
+from app import models
+from app.db import Base
+
+BACKEND = pathlib.Path(__file__).resolve().parents[1]
+
+
+def test_migrations_match_models(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrated.sqlite3'}"
+    config = Config(str(BACKEND / "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "head")
+
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        context = MigrationContext.configure(conn, opts={"include_name": models.include_name})
+        diff = compare_metadata(context, Base.metadata)
+    engine.dispose()
+    assert diff == []
+
+    command.downgrade(config, "base")
+
+
+def test_money_becomes_integer_cents(tmp_path):
+    url = f"sqlite:///{tmp_path / 'money.sqlite3'}"
+    config = Config(str(BACKEND / "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "0007")
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO users (id, email, hashed_password) VALUES (1, 'a@example.com', 'x')")
+        conn.exec_driver_sql("INSERT INTO transactions (user_id, kind, amount, category, note) "
+                             "VALUES (1, 'expense', 12.34, 'food', 'airport coffee'), (1, 'income', 0.1, 'pay', '')")
+        conn.exec_driver_sql("INSERT INTO goals (user_id, name, target_amount, current_amount, is_completed) "
+                             "VALUES (1, 'trip', 100.5, NULL, 'false')")
+
+    command.upgrade(config, "head")
+    with engine.begin() as conn:
+        assert conn.exec_driver_sql("SELECT amount, typeof(amount) FROM transactions ORDER BY id").all() == [
+            (1234, "integer"), (10, "integer"),
+        ]
+        assert conn.exec_driver_sql("SELECT target_amount, current_amount FROM goals").all() == [(10050, None)]
+        # The rebuilt transactions table keeps its checks and search triggers
+        with pytest.raises(IntegrityError):
+            with conn.begin_nested():
+                conn.exec_driver_sql("INSERT INTO transactions (user_id, kind, amount) VALUES (1, 'expense', 0)")
+        conn.exec_driver_sql("INSERT INTO transactions (user_id, kind, amount, category, note) "
+                             "VALUES (1, 'expense', 500, 'travel', 'taxi')")
+        matches = "SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH ?"
+        assert conn.exec_driver_sql(matches, ("coffee",)).all() == [(1,)]
+        assert conn.exec_driver_sql(matches, ("taxi",)).all() == [(3,)]
+    engine.dispose()
@@ -0,0 +1,81 @@
+import asyncio
+from collections import Counter
+
+from sqlalchemy import text
+
+from app import profiling
+
+
+def _call(app, path="/budgets/"):
+    scope = {"type": "http", "method": "GET", "path": path, "headers": []}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent
+
+
+def test_middleware_reports_sql_and_spans(engine):
+    profiling.instrument_sql()
+
+    @profiling.timed("auth")
+    def authenticate():
+        return "user"
+
+    class Route:
+        path = "/budgets/"
+
+    async def app(scope, receive, send):
+        scope["route"] = Route()
+        authenticate()
+        with profiling.span("handler"), engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"[]"})
+
+    metrics = profiling.Metrics()
+    sent = _call(profiling.ProfilingMiddleware(app, slow_ms=0, metrics=metrics))
+    timing = dict(sent[0]["headers"])[b"server-timing"].decode()
+    assert timing.startswith('db;dur=') and 'desc="2 queries"' in timing
+    assert "auth;dur=" in timing and "handler;dur=" in timing and "total;dur=" in timing
+
+    rendered = metrics.render()
+    assert 'pfms_requests_total{method="GET",route="/budgets/",status="200"} 1' in rendered
+    assert 'pfms_sql_statements_total{method="GET",route="/budgets/"} 2' in rendered
+    assert 'pfms_request_duration_seconds_count{method="GET",route="/budgets/"} 1' in rendered
+
+    # Outside a request nothing is collected
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 3"))
+    assert 'pfms_sql_statements_total{method="GET",route="/budgets/"} 2' in metrics.render()
+
+
+def test_slow_request_dumps_flamegraph(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+
+    def busy_wait():
+        deadline = profiling.time.perf_counter() + 0.05
+        while profiling.time.perf_counter() < deadline:
+            pass
+
+    async def app(scope, receive, send):
+        busy_wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    _call(profiling.ProfilingMiddleware(app, slow_ms=10, metrics=profiling.Metrics()), "/analytics/")
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert [name.rsplit(".", 1)[1] for name in files] == ["folded", "svg"]
+    assert "GET-analytics" in files[0]
+    assert "busy_wait" in (tmp_path / files[0]).read_text()
+
+
+def test_render_flamegraph_escapes_frames():
+    svg = profiling.render_flamegraph(Counter({"main (a.py:1);<lambda> (b.py:2)": 3}), "t")
+    assert svg.startswith("<svg") and "&lt;lambda&gt;" in svg and "3 samples" in svg
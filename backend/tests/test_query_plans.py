@@ -0,0 +1,131 @@
+"""Every hot service query must be answered from an index, never a full scan.
+
+Each service function is run against SQLite while its statements are captured,
+then every captured SELECT/UPDATE/DELETE is re-run under EXPLAIN QUERY PLAN.
+"""
+import re
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.db import Base
+from app.models import Budget, BudgetAlert, Goal, GoalContribution, RecurringRule, Reminder, Transaction
+from app.schemas import TxIn
+from app.services import (
+    alert_service, budget_service, goal_service, recurring_service, reminder_service, rollup_service,
+    search_service, transaction_service, version_service,
+)
+
+TABLES = set(Base.metadata.tables)
+FULL_SCAN = re.compile(r"^SCAN (\w+)")
+
+
+@pytest.fixture
+def seeded(db, user):
+    start = datetime(2024, 1, 1)
+    db.add_all(
+        Transaction(user_id=user.id, kind=("income", "expense")[i % 2], amount=10,
+                    category=f"cat{i % 5}", note=("coffee", "rent")[i % 2],
+                    created_at=start + timedelta(days=i))
+        for i in range(60)
+    )
+    budgets = [Budget(user_id=user.id, category=f"cat{i}", month="2024-02", cap_amount=100)
+               for i in range(5)]
+    db.add_all(budgets)
+    db.flush()
+    # A 100% alert the budget's spending is under, for evaluate_alerts to drop
+    db.add_all(
+        BudgetAlert(user_id=user.id, budget_id=budget.id, category=budget.category, month="2024-02",
+                    threshold=100, spent=100, cap_amount=100)
+        for budget in budgets
+    )
+    db.add_all(
+        Reminder(user_id=user.id, name=f"bill{i}", due_date=date(2024, 1, 1) + timedelta(days=i),
+                 amount=5)
+        for i in range(10)
+    )
+    db.add(Goal(id=1, user_id=user.id, name="trip", target_amount=100))
+    db.add_all(
+        GoalContribution(goal_id=1, user_id=user.id, amount=5, created_at=start + timedelta(days=i))
+        for i in range(10)
+    )
+    db.add_all(
+        RecurringRule(user_id=user.id, target="transaction", rrule="FREQ=MONTHLY", kind="expense",
+                      amount=5, dtstart=date(2024, 1, 1), next_run=date(2024, 1, 1) + timedelta(days=i))
+        for i in range(20)
+    )
+    db.commit()
+    rollup_service.rebuild_rollups(db)
+    return user.id
+
+
+def _plans(engine, fn):
+    captured = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert captured, "service ran no queries"
+
+    with engine.connect() as conn:
+        for statement, parameters in captured:
+            rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+            yield statement, [row[-1] for row in rows]
+
+
+def _service_calls(user_id):
+    return {
+        "list_transactions": lambda db: transaction_service.list_transactions(db, user_id),
+        "list_transactions_page": lambda db: transaction_service.list_transactions(
+            db, user_id, limit=10,
+            cursor=transaction_service.encode_cursor(datetime(2024, 2, 1), 30)),
+        "list_transactions_kind": lambda db: transaction_service.list_transactions(
+            db, user_id, kind="expense", from_date=date(2024, 1, 5), to_date=date(2024, 2, 5)),
+        "list_transactions_category": lambda db: transaction_service.list_transactions(
+            db, user_id, category="cat1"),
+        "stream_transactions": lambda db: list(transaction_service.stream_transactions(db, user_id)),
+        "get_monthly_totals": lambda db: transaction_service.get_monthly_totals(db, user_id),
+        "create_transaction": lambda db: transaction_service.create_transaction(
+            db, TxIn(kind="expense", amount=Decimal("3"), category="cat1"), user_id),
+        "delete_transaction": lambda db: transaction_service.delete_transaction(db, 1, user_id),
+        "get_budgets_month": lambda db: budget_service.get_budgets(db, user_id, "2024-02"),
+        "get_budgets_all": lambda db: budget_service.get_budgets(db, user_id),
+        "compute_utilization": lambda db: budget_service.compute_utilization(
+            db, user_id, "cat1", "2024-02"),
+        "list_reminders": lambda db: reminder_service.list_reminders(
+            db, user_id, date(2024, 1, 3), date(2024, 1, 8)),
+        "reminder_versions_changed": lambda db: db.execute(
+            reminder_service.reminder_versions_query(datetime(2024, 1, 1))).all(),
+        "current_etag": lambda db: version_service.current_etag(
+            db, user_id, ["budgets", "transactions"]),
+        "list_rules": lambda db: recurring_service.list_rules(db, user_id),
+        "materialize_due": lambda db: recurring_service.materialize_due(
+            db, as_of=date(2024, 1, 5), chunk_size=2),
+        "search_transactions": lambda db: search_service.search_transactions(db, user_id, "coffee"),
+        "search_transactions_filtered": lambda db: search_service.search_transactions(
+            db, user_id, "cof*", kind="expense", category="cat1", month="2024-01"),
+        "evaluate_alerts": lambda db: alert_service.evaluate_alerts(
+            db, [(user_id, "2024-02", "cat1"), (user_id, "2024-02", "cat2")]),
+        "get_alerts_month": lambda db: budget_service.get_alerts(db, user_id, "2024-02"),
+        "get_alerts_all": lambda db: budget_service.get_alerts(db, user_id),
+        "list_goal_rows": lambda db: goal_service.list_goal_rows(db, user_id),
+        "contribute": lambda db: goal_service.contribute(db, user_id, [(1, Decimal("5"))]),
+        "list_contributions": lambda db: goal_service.list_contributions(db, 1, user_id),
+        "delete_goal": lambda db: goal_service.delete_goal(db, 1, user_id),
+    }
+
+
+@pytest.mark.parametrize("name", list(_service_calls(0)))
+def test_service_query_uses_index(name, engine, db, seeded):
+    call = _service_calls(seeded)[name]
+    for statement, plan in _plans(engine, lambda: call(db)):
+        scans = [line for line in plan if (m := FULL_SCAN.match(line)) and m.group(1) in TABLES]
+        assert not scans, f"{name} full-scans {scans}:\n{statement}\n" + "\n".join(plan)
@@ -0,0 +1,183 @@
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app import alerts, models, recurring
+from app.db import Base, make_engine
+from app.scheduler import ReminderScheduler
+from app.schemas import RecurringRuleIn
+from app.services import budget_service, recurring_service, reminder_service, rollup_service
+from app.services.recurring_service import occurrence, parse_rrule
+
+
+def _dates(rrule, dtstart, n=5):
+    schedule = parse_rrule(rrule)
+    return [occurrence(schedule, dtstart, i) for i in range(n)]
+
+
+def test_schedules():
+    assert _dates("FREQ=MONTHLY", date(2024, 1, 31), 4) == [
+        date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30),
+    ]
+    assert _dates("RRULE:FREQ=MONTHLY;BYMONTHDAY=-1;COUNT=2", date(2023, 2, 1), 3) == [
+        date(2023, 2, 28), date(2023, 3, 31), None,
+    ]
+    # A month day before dtstart's starts the next month
+    assert _dates("FREQ=MONTHLY;BYMONTHDAY=1;INTERVAL=2", date(2024, 1, 15), 2) == [
+        date(2024, 3, 1), date(2024, 5, 1),
+    ]
+    assert _dates("FREQ=WEEKLY;INTERVAL=2;UNTIL=20240120", date(2024, 1, 1), 3) == [
+        date(2024, 1, 1), date(2024, 1, 15), None,
+    ]
+    assert _dates("FREQ=YEARLY", date(2024, 2, 29), 2) == [date(2024, 2, 29), date(2025, 2, 28)]
+
+
+@pytest.mark.parametrize("rrule", [
+    "FREQ=HOURLY", "FREQ=DAILY;BYDAY=MO", "FREQ=DAILY;BYMONTHDAY=1", "FREQ=MONTHLY;INTERVAL=0",
+    "FREQ=MONTHLY;COUNT=2;UNTIL=20250101", "FREQ=MONTHLY;BYMONTHDAY=32", "INTERVAL=2",
+])
+def test_invalid_rrules(rrule):
+    with pytest.raises(ValueError):
+        parse_rrule(rrule)
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    sched = ReminderScheduler(clock=lambda: date(2024, 3, 1))
+    monkeypatch.setattr(reminder_service, "scheduler", sched)
+    return sched
+
+
+def _salary(**overrides):
+    data = dict(target="transaction", rrule="FREQ=MONTHLY;BYMONTHDAY=25", dtstart=date(2024, 1, 1),
+                kind="income", amount=Decimal("3000"), category="salary")
+    return RecurringRuleIn(**{**data, **overrides})
+
+
+def _rent(**overrides):
+    data = dict(target="reminder", rrule="FREQ=MONTHLY;BYMONTHDAY=1", dtstart=date(2024, 1, 1),
+                lead_days=5, name="Rent", amount=Decimal("1200"), payee="Landlord")
+    return RecurringRuleIn(**{**data, **overrides})
+
+
+def test_rule_validation(db, user):
+    with pytest.raises(ValueError):
+        recurring_service.create_rule(db, _salary(kind=None), user.id)
+    with pytest.raises(ValueError):
+        recurring_service.create_rule(db, _rent(name=""), user.id)
+    with pytest.raises(ValueError):
+        recurring_service.create_rule(db, _salary(rrule="FREQ=SOMETIMES"), user.id)
+    with pytest.raises(ValueError):
+        recurring_service.create_rule(db, _salary(lead_days=3), user.id)
+
+
+def test_lead_days_only_bring_reminders_forward(db, user, scheduler):
+    # A transaction rule stored with a lead time, as before it was rejected
+    db.add(models.RecurringRule(user_id=user.id, target="transaction", rrule="FREQ=MONTHLY;BYMONTHDAY=25",
+                                dtstart=date(2024, 1, 1), lead_days=5, kind="income", amount=Decimal("3000"),
+                                category="salary", occurrences=0, next_run=date(2024, 1, 20)))
+    recurring_service.create_rule(db, _rent(dtstart=date(2024, 2, 1)), user.id)
+    result = recurring_service.materialize_due(db, as_of=date(2024, 2, 22))
+    assert (result.transactions, result.reminders) == (1, 1)
+    assert db.query(models.Transaction.created_at).scalar() == datetime(2024, 1, 25)
+    assert db.query(models.Reminder.due_date).scalar() == date(2024, 2, 1)
+
+
+def test_materialize_is_idempotent_and_keeps_rollups(db, user, scheduler):
+    user_id = user.id
+    salary = recurring_service.create_rule(db, _salary(), user_id)
+    recurring_service.create_rule(db, _rent(), user_id)
+    assert salary.next_run == date(2024, 1, 25)
+
+    result = recurring_service.materialize_due(db, as_of=date(2024, 2, 27))
+    assert (result.rules, result.transactions, result.reminders) == (2, 2, 3)
+    # Rent due March 1 is created five days early
+    assert sorted(r.due_date for r in db.query(models.Reminder)) == [
+        date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1),
+    ]
+    # The job's process cannot reach the server's scheduler; its refresh picks the reminder up
+    assert reminder_service.refresh_scheduler(db) == 1
+    assert list(scheduler._reminders) == [db.query(models.Reminder.id).filter_by(due_date=date(2024, 3, 1)).scalar()]
+    assert rollup_service.verify_rollups(db, user_id) == []
+    db.refresh(salary)
+    assert (salary.occurrences, salary.next_run) == (2, date(2024, 3, 25))
+
+    again = recurring_service.materialize_due(db, as_of=date(2024, 2, 27))
+    assert (again.rules, again.transactions, again.reminders) == (0, 0, 0)
+    assert db.query(models.Transaction).count() == 2
+
+    recurring_service.materialize_due(db, as_of=date(2024, 3, 31))
+    assert db.query(models.Transaction).count() == 3
+    assert db.query(models.Reminder).count() == 4
+
+
+def test_runs_only_read_due_rules_in_chunks(db, engine, user, scheduler):
+    user_id = user.id
+    for day in range(1, 6):
+        recurring_service.create_rule(db, _salary(rrule=f"FREQ=MONTHLY;BYMONTHDAY={day};COUNT=1"), user_id)
+    recurring_service.create_rule(db, _salary(dtstart=date(2030, 1, 1)), user_id)
+
+    result = recurring_service.materialize_due(db, as_of=date(2024, 1, 31), chunk_size=2)
+    assert (result.rules, result.chunks, result.transactions) == (5, 3, 5)
+    # Finished schedules have no next run; the future rule is untouched
+    assert db.query(models.RecurringRule).filter(models.RecurringRule.next_run.is_(None)).count() == 5
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+    recurring_service.materialize_due(db, as_of=date(2024, 6, 30))
+    assert len(statements) == 1 and "next_run <=" in statements[0]
+
+
+def test_a_concurrent_run_does_not_duplicate(db, user, scheduler, monkeypatch):
+    user_id = user.id
+    recurring_service.create_rule(db, _salary(), user_id)
+    real_chunk = recurring_service._materialize_chunk
+    raced = []
+
+    def racing_chunk(db, rules, as_of, batch_size):
+        if not raced:
+            # Another run materializes the same rules after this one read them
+            raced.append(real_chunk(db, rules, as_of, batch_size))
+            db.expire_all()
+        return real_chunk(db, rules, as_of, batch_size)
+
+    monkeypatch.setattr(recurring_service, "_materialize_chunk", racing_chunk)
+    recurring_service.materialize_due(db, as_of=date(2024, 3, 31))
+    assert db.query(models.Transaction).count() == 3
+
+
+def test_cli_evaluates_alerts_before_exiting(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(alerts, "ALERTS_ENABLED", True)
+    monkeypatch.setattr(alerts, "pipeline", alerts.AlertPipeline(workers=2))
+    engine = make_engine(f"sqlite:///{tmp_path}/recurring.sqlite3")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        user = models.User(email="cron@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+        db.add(models.Budget(user_id=user_id, category="rent", month="2024-01", cap_amount=1000))
+        db.commit()
+        recurring_service.create_rule(db, _salary(
+            rrule="FREQ=MONTHLY;BYMONTHDAY=1", kind="expense", amount=Decimal("900"), category="rent",
+        ), user_id)
+    monkeypatch.setattr(recurring, "shard_sessions", lambda: _sessions(Session))
+
+    assert recurring.main(["--as-of", "2024-01-05"]) == 0
+    assert "1 transactions" in capsys.readouterr().out
+    # The pipeline's workers were running, and finished before main returned
+    assert alerts.pipeline.events == 1 and alerts.pipeline.evaluations == 1
+    with Session() as db:
+        assert [row["threshold"] for row in budget_service.get_alerts(db, user_id, "2024-01")] == [80]
+    engine.dispose()
+
+
+@contextmanager
+def _sessions(Session):
+    with Session() as db:
+        yield [db]
@@ -0,0 +1,61 @@
+from datetime import datetime
+from decimal import Decimal
+
+from app.models import MonthlyRollup, Transaction
+from app.schemas import TxIn
+from app.services import rollup_service, transaction_service
+
+
+def test_create_and_delete_keep_rollups_in_sync(db, user):
+    created = [
+        transaction_service.create_transaction(
+            db, TxIn(kind=kind, amount=Decimal(amount), category=category), user.id
+        )
+        for kind, amount, category in [
+            ("income", "1000.50", "salary"),
+            ("expense", "20.25", "food"),
+            ("expense", "4.75", "food"),
+        ]
+    ]
+    totals = transaction_service.get_monthly_totals(db, user.id)
+    assert totals == {"income": 1000.5, "expense": 25.0, "net": 975.5}
+    assert rollup_service.verify_rollups(db) == []
+
+    transaction_service.delete_transaction(db, created[1].id, user.id)
+    transaction_service.delete_transaction(db, created[2].id, user.id)
+    assert transaction_service.get_monthly_totals(db, user.id)["expense"] == 0
+    assert db.query(MonthlyRollup).filter(MonthlyRollup.kind == "expense").count() == 0
+    assert rollup_service.verify_rollups(db) == []
+
+
+def test_verify_reports_drift_and_rebuild_fixes_it(db, user):
+    db.add(Transaction(user_id=user.id, kind="expense", amount=12, category="fuel",
+                       created_at=datetime(2024, 2, 3)))
+    db.commit()
+    [drift] = rollup_service.verify_rollups(db)
+    assert (drift["month"], drift["category"]) == ("2024-02", "fuel")
+    assert drift["expected_total"] == Decimal("12.00")
+    assert drift["stored_count"] == 0
+
+    assert rollup_service.rebuild_rollups(db) == 1
+    assert rollup_service.verify_rollups(db) == []
+
+
+def test_apply_deltas_updates_existing_and_inserts_new_rows(db, user):
+    user_id = user.id
+    rows = [("expense", "10", "food", datetime(2024, 1, 5)), ("expense", "4", "food", datetime(2024, 2, 1)),
+            ("income", "50", "salary", datetime(2024, 2, 2))]
+    db.add(Transaction(user_id=user_id, kind="expense", amount=3, category="food", created_at=datetime(2024, 1, 2)))
+    db.commit()
+    rollup_service.rebuild_rollups(db)
+
+    for kind, amount, category, created_at in rows:
+        db.add(Transaction(user_id=user_id, kind=kind, amount=Decimal(amount), category=category, created_at=created_at))
+    rollup_service.apply_deltas(db, {
+        (user_id, "2024-01", "expense", "food"): (1000, 1),
+        (user_id, "2024-02", "expense", "food"): (400, 1),
+        (user_id, "2024-02", "income", "salary"): (5000, 1),
+    })
+    db.commit()
+    assert rollup_service.verify_rollups(db) == []
+    assert db.query(MonthlyRollup).filter_by(month="2024-01").one().tx_count == 2
@@ -0,0 +1,141 @@
+from collections import Counter
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import db as app_db, group_commit, models, schemas
+from app.db import Base, DatabaseRouter, RoutingSession, Shard, make_engine, parse_shards, route_to_user
+from app.routers import auth
+from app.services import analytics_service, transaction_service
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def routed(tmp_path, monkeypatch):
+    """Three shards in local SQLite files; the first has a read replica."""
+    def engine(name):
+        engine = make_engine(f"sqlite:///{tmp_path}/{name}.sqlite3")
+        Base.metadata.create_all(engine)
+        return engine
+
+    clock = Clock()
+    router = DatabaseRouter([Shard(engine("shard0"), [engine("shard0-replica")]),
+                             Shard(engine("shard1")), Shard(engine("shard2"))], sticky_seconds=5, clock=clock)
+    monkeypatch.setattr(app_db, "db_router", router)
+    monkeypatch.setattr(group_commit, "_committers", {})
+    yield router, sessionmaker(class_=RoutingSession, router=router, autoflush=False), clock
+    group_commit.stop_all()
+    for item in router.engines():
+        item.dispose()
+
+
+def _count(engine, column, *where):
+    with Session(bind=engine) as db:
+        return db.scalar(select(func.count(column)).where(*where))
+
+
+def test_parse_shards():
+    assert parse_shards("", "sqlite:///a.db") == [["sqlite:///a.db"]]
+    assert parse_shards("sqlite:///p0, sqlite:///r0 ; sqlite:///p1;", "x") == [
+        ["sqlite:///p0", "sqlite:///r0"], ["sqlite:///p1"],
+    ]
+
+
+@pytest.mark.parametrize("batching", [False, True])
+def test_users_are_partitioned_across_shards(routed, monkeypatch, batching):
+    router, Sessions, _ = routed
+    monkeypatch.setattr(group_commit, "WRITE_BATCHING", batching)
+    user_ids = range(1, 31)
+    for user_id in user_ids:
+        with Sessions() as db:
+            route_to_user(db, user_id)
+            transaction_service.create_transaction(
+                db, schemas.TxIn(kind="expense", amount=Decimal("2.50"), category="food"), user_id)
+
+    homes = {user_id: router.shard_index(user_id) for user_id in user_ids}
+    placed = Counter(homes.values())
+    assert len(placed) == 3
+    for index, shard in enumerate(router.shards):
+        assert _count(shard.primary, models.Transaction.id) == placed[index]
+        assert _count(shard.primary, models.MonthlyRollup.user_id) == placed[index]
+    with Sessions() as db:
+        route_to_user(db, 7)
+        rows, _ = transaction_service.list_transaction_rows(db, 7)
+        assert [row["amount"] for row in rows] == [Decimal("2.50")]
+
+
+def test_reads_go_to_the_replica_except_right_after_a_write(routed, monkeypatch):
+    router, Sessions, clock = routed
+    monkeypatch.setattr(group_commit, "WRITE_BATCHING", False)
+    user_id = next(i for i in range(1, 100) if router.shard_index(i) == 0)
+    with Sessions() as db:
+        route_to_user(db, user_id)
+        transaction_service.create_transaction(
+            db, schemas.TxIn(kind="income", amount=Decimal("10"), category="salary"), user_id)
+        # Read-your-writes: the primary answers while the user is sticky
+        assert len(transaction_service.list_transaction_rows(db, user_id)[0]) == 1
+
+    clock.now += 5
+    with Sessions() as db:
+        route_to_user(db, user_id)
+        # The replica stand-in is never replicated to, so its answer shows where the read went
+        assert transaction_service.list_transaction_rows(db, user_id)[0] == []
+        assert db.get_bind(clause=select(models.Transaction.id)) is router.shards[0].replicas[0]
+        # Core reads on the session's connection go to the replica too, and leave the user unsticky
+        analytics = analytics_service.get_analytics(db, user_id)
+        assert sum(analytics["income"]) == 0
+        assert not router.reads_from_primary(user_id)
+        assert db.get_bind() is router.shards[0].primary
+    assert _count(router.shards[0].primary, models.Transaction.id) == 1
+
+
+def test_register_copies_the_user_to_their_shard(routed, monkeypatch):
+    router, Sessions, _ = routed
+    monkeypatch.setattr(auth, "db_router", router)
+    registered = []
+    while len({router.shard_index(user.id) for user in registered}) < 2:
+        with Sessions() as db:
+            registered.append(auth.register(schemas.UserCreate(email=f"u{len(registered)}@example.com",
+                                                               password="secret-pass"), db))
+
+    directory = router.directory.primary
+    assert _count(directory, models.User.id) == len(registered)
+    for user in registered:
+        home = router.shard(user.id).primary
+        assert _count(home, models.User.id, models.User.id == user.id) == 1
+        if home is not directory:
+            with Session(bind=home) as db:
+                assert db.get(models.User, user.id).email == user.email
+
+
+def test_user_updates_reach_the_shard_copy(routed, monkeypatch):
+    router, Sessions, _ = routed
+    monkeypatch.setattr(auth, "db_router", router)
+    user_id = None
+    while router.shard(user_id) is router.directory:
+        with Sessions() as db:
+            user_id = auth.register(schemas.UserCreate(email=f"u{user_id or 0}@example.com",
+                                                       password="secret-pass"), db).id
+
+    with Sessions() as db:
+        user = db.get(models.User, user_id)
+        user.hashed_password = "rehashed"
+        user.is_active = "false"
+        db.commit()
+
+    columns = [getattr(models.User, name) for name in auth.SYNCED_USER_COLUMNS]
+    copies = []
+    for shard in (router.directory, router.shard(user_id)):
+        with Session(bind=shard.primary) as db:
+            copies.append(db.execute(select(*columns).where(models.User.id == user_id)).one())
+    assert copies[0] == copies[1]
+    assert copies[1].hashed_password == "rehashed" and copies[1].token_version == 1
@@ -0,0 +1,196 @@
+import threading
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.models import Reminder, ResourceVersion
+from app.scheduler import DUE, OVERDUE, ReminderEvent, ReminderScheduler
+from app.schemas import ReminderIn
+from app.services import reminder_service, version_service
+
+TODAY = date(2024, 3, 10)
+
+
+def _day(offset):
+    return TODAY + timedelta(days=offset)
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    sched = ReminderScheduler(clock=lambda: TODAY)
+    monkeypatch.setattr(reminder_service, "scheduler", sched)
+    return sched
+
+
+def _reminder(offset, name="Rent"):
+    return ReminderIn(name=name, due_date=_day(offset), amount=Decimal("100"), payee="", notes="")
+
+
+def test_events_fire_in_due_order_then_overdue(scheduler):
+    scheduler.load([(1, 7, _day(2)), (2, 7, _day(0)), (3, 8, _day(-1)), (4, 8, _day(-30))])
+    assert len(scheduler) == 3  # the reminder due a month ago can no longer fire
+
+    assert scheduler.pop_events(TODAY) == [
+        ReminderEvent(DUE, 3, 8, _day(-1)),
+        ReminderEvent(OVERDUE, 3, 8, _day(-1)),
+        ReminderEvent(DUE, 2, 7, _day(0)),
+    ]
+    assert scheduler.pop_events(TODAY) == []
+    assert scheduler.pop_events(_day(2)) == [
+        ReminderEvent(OVERDUE, 2, 7, _day(0)),
+        ReminderEvent(DUE, 1, 7, _day(2)),
+    ]
+    assert scheduler.pop_events(_day(3)) == [ReminderEvent(OVERDUE, 1, 7, _day(2))]
+    assert len(scheduler) == 0
+
+
+def test_changes_apply_to_events(scheduler):
+    scheduler.load([])
+    for reminder_id, offset in [(1, 5), (2, 1), (3, 3)]:
+        scheduler.add(reminder_id, 7, _day(offset))
+    scheduler.add(4, 8, _day(1))
+
+    scheduler.remove(2)
+    scheduler.add(3, 7, _day(9))  # moved: the old heap entry must not fire
+    assert len(scheduler) == 3
+    assert [(e.kind, e.reminder_id) for e in scheduler.pop_events(_day(5))] == [
+        (DUE, 4), (OVERDUE, 4), (DUE, 1),
+    ]
+
+
+def test_stale_heap_entries_are_compacted(scheduler):
+    scheduler.load([])
+    for i in range(1000):
+        scheduler.add(i, i % 10, _day(i % 50))
+    for i in range(990):
+        scheduler.remove(i)
+    assert len(scheduler) == 10
+    assert len(scheduler._heap) <= 2 * len(scheduler) + 64
+
+
+def test_service_keeps_scheduler_current(db, user, scheduler):
+    user_id = user.id
+    reminder_service.load_scheduler(db)
+    soon = reminder_service.create_reminder(db, _reminder(2, "Phone"), user_id)
+    first = reminder_service.create_reminder(db, _reminder(0, "Rent"), user_id)
+    reminder_service.create_reminder(db, _reminder(20, "Insurance"), user_id)
+
+    assert [r.name for r in reminder_service.upcoming_reminders(db, user_id, 7)] == ["Rent", "Phone"]
+    reminder_service.delete_reminder(db, first.id, user_id)
+    assert [r.id for r in reminder_service.upcoming_reminders(db, user_id, 7)] == [soon.id]
+    assert [e.reminder_id for e in scheduler.pop_events(_day(2))] == [soon.id]
+    with pytest.raises(ValueError):
+        reminder_service.delete_reminder(db, first.id, user_id)
+
+
+def test_load_reads_existing_reminders(db, user, scheduler):
+    user_id = user.id
+    for offset in (-3, -1, 1, 4, 8):
+        reminder_service.create_reminder(db, _reminder(offset), user_id)
+    assert reminder_service.load_scheduler(db) == 4
+
+
+def test_upcoming_comes_from_the_database_in_every_worker(db, user, scheduler):
+    # Another worker's reminder, which this worker's scheduler never saw
+    reminder_service.load_scheduler(db)
+    db.add_all(Reminder(user_id=user.id, name=f"bill{offset}", due_date=_day(offset), amount=1)
+               for offset in (-1, 0, 5, 6))
+    db.commit()
+    assert len(scheduler) == 0
+    upcoming = reminder_service.upcoming_reminders(db, user.id, 5)
+    assert [r.due_date for r in upcoming] == [_day(0), _day(5)]
+
+
+def test_refresh_applies_other_processes_writes_without_repeating_events(db, user, scheduler):
+    user_id = user.id
+    kept = reminder_service.create_reminder(db, _reminder(0, "Rent"), user_id)
+    reminder_service.load_scheduler(db)
+    assert reminder_service.refresh_scheduler(db) == 0
+    assert [e.kind for e in scheduler.pop_events(_day(1))] == [DUE, OVERDUE]
+
+    # Written by another process: no add()/remove() reached this one
+    db.add(Reminder(user_id=user_id, name="Phone", due_date=_day(3), amount=1))
+    db.flush()
+    db.query(Reminder).filter(Reminder.id == kept.id).delete()
+    version_service.bump(db, user_id, "reminders")
+    db.commit()
+    assert reminder_service.refresh_scheduler(db) == 1
+    assert reminder_service.refresh_scheduler(db) == 0
+    assert [(e.kind, e.due_date) for e in scheduler.pop_events(_day(3))] == [(DUE, _day(3))]
+
+    # Re-reading a user does not announce again what already fired
+    version_service.bump(db, user_id, "reminders")
+    db.commit()
+    assert reminder_service.refresh_scheduler(db) == 1
+    assert scheduler.pop_events(_day(3)) == []
+    assert [e.kind for e in scheduler.pop_events(_day(4))] == [OVERDUE]
+    scheduler.replace_users([user_id], [(kept.id, user_id, _day(0))])
+    assert scheduler.pop_events(_day(4)) == []
+
+
+def test_refresh_reads_only_recent_changes(db, user, scheduler):
+    user_id = user.id
+    reminder_service.load_scheduler(db)
+    db.add(Reminder(user_id=user_id, name="Phone", due_date=_day(3), amount=1))
+    version_service.bump(db, user_id, "reminders")
+    db.commit()
+    # A change from long before the scheduler's watermark is not looked at again
+    db.query(ResourceVersion).update({"changed_at": datetime(2000, 1, 1)})
+    db.commit()
+    assert reminder_service.refresh_scheduler(db) == 0
+    assert len(scheduler) == 0
+
+    version_service.bump(db, user_id, "reminders")
+    db.commit()
+    assert reminder_service.refresh_scheduler(db) == 1
+    assert len(scheduler) == 1
+
+
+def test_one_process_holds_the_scheduler_lease(db):
+    now = datetime(2024, 3, 10, 12)
+    assert reminder_service.hold_scheduler_lease(db, "a", now)
+    assert not reminder_service.hold_scheduler_lease(db, "b", now)
+    assert reminder_service.hold_scheduler_lease(db, "a", now + timedelta(seconds=60))
+    # Renewed at +60s, so still a's at +200s; b takes over once a stops renewing
+    assert not reminder_service.hold_scheduler_lease(db, "b", now + timedelta(seconds=200))
+    assert reminder_service.hold_scheduler_lease(db, "b", now + timedelta(seconds=300))
+    assert not reminder_service.hold_scheduler_lease(db, "a", now + timedelta(seconds=300))
+
+    reminder_service.release_scheduler_lease(db, "b")
+    assert reminder_service.hold_scheduler_lease(db, "a", now + timedelta(seconds=301))
+
+
+def test_unloaded_scheduler_ignores_writes(scheduler):
+    scheduler.load([(1, 7, _day(0))])
+    scheduler.unload()
+    scheduler.add(2, 7, _day(0))
+    scheduler.remove(1)
+    assert len(scheduler) == 0 and scheduler.pop_events(_day(1)) == []
+
+
+def test_background_thread_calls_refresh():
+    sched = ReminderScheduler()
+    refreshed = threading.Event()
+    sched.load([])
+    sched.start(refresh=refreshed.set, refresh_seconds=0.01)
+    try:
+        assert refreshed.wait(5)
+    finally:
+        sched.stop()
+
+
+def test_background_thread_announces_due_reminders():
+    sched = ReminderScheduler()
+    received = []
+    done = threading.Event()
+    sched.subscribe(lambda event: (received.append(event), done.set()))
+    sched.load([])
+    sched.start()
+    try:
+        sched.add(1, 7, sched.clock() + timedelta(days=3))
+        sched.add(2, 7, sched.clock())  # wakes the sleeping thread
+        assert done.wait(5)
+    finally:
+        sched.stop()
+    assert received == [ReminderEvent(DUE, 2, 7, sched.clock())]
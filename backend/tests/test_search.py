@@ -0,0 +1,80 @@
+import io
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app import models
+from app.schemas import TxIn
+from app.services import import_service, search_service, transaction_service
+
+
+def _add(db, user_id, note, category="general", kind="expense", when=datetime(2024, 1, 5)):
+    db.add(models.Transaction(user_id=user_id, kind=kind, amount=Decimal("4.50"), category=category,
+                              note=note, created_at=when))
+    db.commit()
+
+
+def test_ranked_results_with_facets(db, user):
+    user_id = user.id
+    other = models.User(email="other@example.com", hashed_password="x")
+    db.add(other)
+    db.commit()
+    _add(db, user_id, "Blue Bottle coffee", "food")
+    _add(db, user_id, "beans", "coffee", when=datetime(2024, 2, 1))
+    _add(db, user_id, "Coffee refund", "food", kind="income", when=datetime(2024, 2, 3))
+    _add(db, user_id, "tea", "food")
+    _add(db, other.id, "coffee", "food")
+
+    result = search_service.search_transactions(db, user_id, "coffee")
+    assert result.total == 3
+    # Note matches first, shorter notes first; category-only matches last
+    assert [tx.note for tx in result.items] == ["Coffee refund", "Blue Bottle coffee", "beans"]
+    assert result.facets.category == {"food": 2, "coffee": 1}
+    assert result.facets.kind == {"expense": 2, "income": 1}
+    assert result.facets.month == {"2024-02": 2, "2024-01": 1}
+
+    # Words match whole, or as a prefix with a trailing *; accents are ignored; all words must match
+    assert search_service.search_transactions(db, user_id, "blue bott").total == 0
+    assert [tx.note for tx in search_service.search_transactions(db, user_id, "blue bott*").items] == [
+        "Blue Bottle coffee"
+    ]
+    _add(db, user_id, "Café crème", "food")
+    assert search_service.search_transactions(db, user_id, "CAFE").total == 1
+    assert search_service.search_transactions(db, user_id, "coffee tea").total == 0
+
+    filtered = search_service.search_transactions(db, user_id, "coffee", kind="expense", month="2024-02")
+    assert [tx.note for tx in filtered.items] == ["beans"]
+    page = search_service.search_transactions(db, user_id, "coffee", limit=2, offset=2)
+    assert len(page.items) == 1 and page.total == 3
+
+
+def test_index_follows_every_write_path(db, user):
+    user_id = user.id
+    created = transaction_service.create_transaction(
+        db, TxIn(kind="expense", amount=Decimal("12"), category="transport", note="Uber to airport"), user_id
+    )
+    csv = io.BytesIO(b"date,amount,category,note\n2024-01-05,-3,food,airport snack\n")
+    import_service.import_transactions(db, user_id, csv, "csv")
+    assert search_service.search_transactions(db, user_id, "airport").total == 2
+
+    transaction_service.delete_transaction(db, created.id, user_id)
+    assert [tx.note for tx in search_service.search_transactions(db, user_id, "airport").items] == ["airport snack"]
+
+    db.query(models.Transaction).update({"note": "duty free"})
+    db.commit()
+    assert search_service.search_transactions(db, user_id, "airport").total == 0
+    assert search_service.search_transactions(db, user_id, "duty").total == 1
+
+
+@pytest.mark.parametrize("q", ["", "  ", "***", " ".join(["word"] * 17)])
+def test_invalid_queries(db, user, q):
+    with pytest.raises(ValueError):
+        search_service.search_transactions(db, user.id, q)
+
+
+def test_query_syntax_is_searched_as_text(db, user):
+    user_id = user.id
+    _add(db, user_id, "NEAR the office")
+    assert search_service.search_transactions(db, user_id, 'near" OR "x').total == 0
+    assert search_service.search_transactions(db, user_id, "near(").total == 1
@@ -0,0 +1,18 @@
+from sqlalchemy import func, select
+
+from app.models import Budget, Goal, GoalContribution, MonthlyRollup, Reminder, Transaction
+from app.seed import generate
+from app.services import rollup_service
+
+
+def test_generate_fills_every_table(db):
+    users = generate(db, users=3, transactions=40, budgets=5, reminders=4, goals=2, months=6)
+    assert [email for _, email in users] == [f"user{i}@bench.example.com" for i in range(3)]
+    for model, per_user in ((Transaction, 40), (Budget, 5), (Reminder, 4), (Goal, 2)):
+        counts = dict(db.execute(select(model.user_id, func.count()).group_by(model.user_id)).all())
+        assert counts == {user_id: per_user for user_id, _ in users}
+    assert db.query(MonthlyRollup).count() > 0
+    assert rollup_service.verify_rollups(db) == []
+    ledger = dict(db.execute(select(GoalContribution.goal_id, func.sum(GoalContribution.amount))
+                             .group_by(GoalContribution.goal_id)).all())
+    assert all(ledger.get(goal.id, 0) == goal.current_amount for goal in db.query(Goal))
@@ -0,0 +1,59 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from pydantic import TypeAdapter
+
+from app import models, schemas, serialization
+from app.services import goal_service, reminder_service, transaction_service
+
+
+def _pydantic_json(model, items):
+    # What FastAPI does with response_model: validate, then dump
+    adapter = TypeAdapter(list[model])
+    return json.loads(adapter.dump_json(adapter.validate_python(items, from_attributes=True)))
+
+
+def _fast_json(model, rows):
+    return json.loads(serialization.json_list(model, rows).body)
+
+
+def test_transaction_rows_match_the_model_path(db, user):
+    user_id = user.id
+    for i, amount in enumerate(["12.50", "0.01", "1000"]):
+        db.add(models.Transaction(user_id=user_id, kind="expense", amount=Decimal(amount), category="food",
+                                  note="n", created_at=datetime(2024, 1, 1 + i, 9, 30, 0, 123456 * i)))
+    db.commit()
+
+    models_page, cursor = transaction_service.list_transactions(db, user_id, limit=2)
+    rows_page, rows_cursor = transaction_service.list_transaction_rows(db, user_id, limit=2)
+    assert rows_cursor == cursor
+    fast = _fast_json(schemas.TxOut, rows_page)
+    assert fast == _pydantic_json(schemas.TxOut, models_page)
+    assert fast[0]["amount"] == "1000.00" and fast[0]["created_at"] == "2024-01-03T09:30:00.246912"
+
+
+def test_reminder_and_goal_rows_match_the_model_path(db, user):
+    user_id = user.id
+    db.add(models.Reminder(user_id=user_id, name="Rent", due_date=date(2024, 3, 1), amount=Decimal("1200.00")))
+    db.add(models.Goal(user_id=user_id, name="Trip", target_amount=Decimal("300"), current_amount=Decimal("100"),
+                       target_date=date(2025, 1, 1)))
+    db.commit()
+
+    reminders = reminder_service.list_reminders(db, user_id)
+    assert _fast_json(schemas.ReminderOut, reminder_service.list_reminder_rows(db, user_id)) == \
+        _pydantic_json(schemas.ReminderOut, reminders)
+    goal = db.query(models.Goal).one()
+    progress = goal_service.progress_percentage(goal.current_amount, goal.target_amount)
+    expected = _pydantic_json(schemas.GoalOut, [{**goal.__dict__, "progress_percentage": progress}])
+    assert _fast_json(schemas.GoalOut, goal_service.list_goal_rows(db, user_id)) == expected
+
+
+def test_cached_budget_rows_with_string_decimals():
+    # The Redis cache backend returns Decimals as strings
+    row = {"id": 1, "category": "food", "month": "2024-01", "cap_amount": "200.00", "utilization": 50.0,
+           "spent": 50.0, "remaining": 150.0, "percentage": 25.0, "over_cap": False}
+    response = serialization.json_list(schemas.BudgetOut, [row], {"ETag": '"v1"'})
+    assert response.headers["etag"] == '"v1"'
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == _pydantic_json(schemas.BudgetOut, [row])
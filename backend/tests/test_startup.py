@@ -0,0 +1,22 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from app import profiling
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+
+def test_heavy_dependencies_load_on_first_use():
+    code = ("import sys, app.main; "
+            "print(sorted(m for m in ('numpy', 'passlib', 'jwt', 'pyarrow') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+
+def test_startup_phases_are_reported(monkeypatch):
+    monkeypatch.setattr(profiling, "startup_seconds", {"import": 0.8125, "lifespan": 0.015})
+    assert profiling.render_startup().splitlines()[2:] == [
+        'pfms_startup_seconds{phase="import"} 0.812500',
+        'pfms_startup_seconds{phase="lifespan"} 0.015000',
+    ]
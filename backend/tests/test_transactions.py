@@ -0,0 +1,62 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.models import Transaction
+from app.services import transaction_service
+
+
+def _add(db, user_id, n, start=datetime(2024, 1, 1), **fields):
+    fields.setdefault("kind", "expense")
+    fields.setdefault("category", "groceries")
+    db.add_all(
+        Transaction(user_id=user_id, amount=10, created_at=start + timedelta(hours=i), **fields)
+        for i in range(n)
+    )
+    db.commit()
+
+
+def test_cursor_pages_cover_every_row_once(db, user):
+    _add(db, user.id, 25)
+    seen, cursor = [], None
+    while True:
+        page, cursor = transaction_service.list_transactions(db, user.id, limit=10, cursor=cursor)
+        seen.extend(tx.id for tx in page)
+        if cursor is None:
+            break
+    all_rows, _ = transaction_service.list_transactions(db, user.id)
+    assert seen == [tx.id for tx in all_rows]
+    assert len(set(seen)) == 25
+
+
+def test_cursor_breaks_ties_on_id(db, user):
+    _add(db, user.id, 1, start=datetime(2024, 1, 1))
+    _add(db, user.id, 1, start=datetime(2024, 1, 1))
+    first, cursor = transaction_service.list_transactions(db, user.id, limit=1)
+    second, cursor = transaction_service.list_transactions(db, user.id, limit=1, cursor=cursor)
+    assert first[0].id != second[0].id
+    assert cursor is None
+
+
+def test_filters(db, user):
+    _add(db, user.id, 3, start=datetime(2024, 1, 10))
+    _add(db, user.id, 2, start=datetime(2024, 2, 10), category="rent")
+    _add(db, user.id, 1, start=datetime(2024, 2, 11), kind="income", category="salary")
+    rows, _ = transaction_service.list_transactions(
+        db, user.id, from_date=date(2024, 2, 1), to_date=date(2024, 2, 10)
+    )
+    assert len(rows) == 2
+    rows, _ = transaction_service.list_transactions(db, user.id, kind="expense", category="rent")
+    assert {tx.category for tx in rows} == {"rent"}
+
+
+def test_invalid_cursor(db, user):
+    with pytest.raises(ValueError):
+        transaction_service.list_transactions(db, user.id, limit=5, cursor="not-a-cursor")
+
+
+def test_stream_matches_list(db, user):
+    _add(db, user.id, 30)
+    streamed = list(transaction_service.stream_transactions(db, user.id, batch_size=7))
+    listed, _ = transaction_service.list_transactions(db, user.id)
+    assert [tx.id for tx in streamed] == [tx.id for tx in listed]